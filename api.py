@@ -0,0 +1,388 @@
+import json
+import uuid
+import threading
+from collections import deque
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from functions import (get_user_config, get_broadcaster_id, get_clips, get_clips_by_id, get_game_ids,
+                       build_clip_filename, download_clips, preflight_check, get_crawl_limiter)
+from clip_filter import ClipFilter
+from jobs import JobControl, JobCancelled, get_lane
+from time_range import parse_time, validate_range
+from quality import parse_quality, resolve_quality
+from scheduler import DownloadQueue, DOWNLOAD_POLICIES, DEFAULT_POLICY
+from download_pool import download_clips_in_processes
+from postprocess import create_postprocessor
+from autotune import create_download_limiter
+import metrics
+
+# The API only listens on the loopback interface
+API_HOST = "127.0.0.1"
+DEFAULT_API_PORT = 8765
+# Status messages kept per job
+JOB_MESSAGES = 50
+# Finished jobs kept for status queries
+FINISHED_JOBS = 200
+
+
+class ApiError(Exception):
+    """Invalid request parameters or a failed step of a job."""
+
+
+class ApiJob:
+    """A search, download or sync job queued through the API."""
+
+    def __init__(self, kind, params, key, clips=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.key = key  # Identical queued or running jobs share this key
+        self.clips = clips  # Clips handed over by a sync job, instead of params["clip_ids"]
+        self.control = JobControl(f"{kind} {self.id}")
+        self.state = "queued"
+        self.created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.messages = deque(maxlen=JOB_MESSAGES)
+
+    def is_active(self):
+        return self.state in ("queued", "running")
+
+    def to_dict(self, details=False):
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "state": "paused" if self.state == "running" and self.control.is_paused() else self.state,
+            "params": self.params,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+        if details:
+            data["result"] = self.result
+            data["messages"] = list(self.messages)
+        return data
+
+
+class JobService:
+    """
+    Queue of the jobs of all API clients.
+
+    Searches run one after another on the process-wide search lane and
+    downloads on the download lane (see jobs.get_lane()), the same ones the
+    GUI uses, so any number of clients neither multiply the Helix request rate
+    nor the download bandwidth. Submitting a job identical to a queued or
+    running one returns that job instead of doing the work twice. Searches
+    use the same response cache and game cache as the GUI, downloads the same
+    download engine (including the process pool) and manifest.
+    """
+
+    def __init__(self, status_callback=None, allow_folder=False):
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.status_callback = status_callback
+        # Any local process can reach the API, so only clients with a token may pick the download folder
+        self.allow_folder = allow_folder
+
+    def validate(self, kind, params):
+        if not isinstance(params, dict):
+            raise ApiError("The request body must be a JSON object.")
+        if kind in ("search", "sync"):
+            if not params.get("broadcaster"):
+                raise ApiError("Missing 'broadcaster'.")
+            try:
+                date_from = parse_time(str(params.get("from", "2d")))
+                date_to = parse_time(str(params.get("to", "now")))
+            except ValueError as e:
+                raise ApiError(f"Invalid time. {e}")
+            result = validate_range(date_from, date_to)
+            if "error" in result:
+                raise ApiError(result["message"])
+            if not isinstance(params.get("filter", {}), dict):
+                raise ApiError("'filter' must be a JSON object.")
+        if kind == "download":
+            clip_ids = params.get("clip_ids")
+            if not isinstance(clip_ids, list) or not clip_ids:
+                raise ApiError("Missing 'clip_ids' (list of clip IDs or URLs).")
+        if kind in ("download", "sync"):
+            if "folder" in params:
+                if not self.allow_folder:
+                    raise ApiError("'folder' is only accepted with an API token (next to \"Job API Port\" on the Settings page).")
+                if not isinstance(params["folder"], str):
+                    raise ApiError("'folder' must be a string.")
+            if params.get("quality"):
+                try:
+                    parse_quality(params["quality"])
+                except ValueError as e:
+                    raise ApiError(str(e))
+            if params.get("order", DEFAULT_POLICY) not in DOWNLOAD_POLICIES:
+                raise ApiError(f"Invalid order, use one of: {', '.join(DOWNLOAD_POLICIES)}.")
+
+    def submit(self, kind, params, clips=None):
+        """
+        Queue a job.
+
+        Returns:
+            tuple: (ApiJob, True if it was created, False if an identical job was queued or running)
+
+        Raises:
+            ApiError: If the parameters are invalid.
+        """
+        if clips is None:
+            self.validate(kind, params)
+        key = (kind, json.dumps(params, sort_keys=True))
+        with self.lock:
+            for job in self.jobs.values():
+                if job.key == key and job.is_active():
+                    return job, False
+            job = ApiJob(kind, params, key, clips)
+            self.jobs[job.id] = job
+            self.prune()
+
+        handler = {"search": self.run_search, "download": self.run_download, "sync": self.run_sync}[kind]
+        get_lane("download" if kind == "download" else "search").submit(self.run, job, handler)
+        metrics.count(f"api.jobs.{kind}")
+        return job, True
+
+    def prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if not job.is_active()]
+        for job_id in finished[:max(0, len(finished) - FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self.lock:
+            return list(self.jobs.values())
+
+    def cancel_all(self):
+        for job in self.list():
+            job.control.cancel()
+
+    def shutdown(self):
+        # The lanes belong to the process, the GUI keeps using them
+        self.cancel_all()
+
+    def status(self, job, message):
+        job.messages.append(message)
+        if self.status_callback:
+            self.status_callback(f"API {job.kind} {job.id}: {message}")
+
+    def run(self, job, handler):
+        if job.control.is_cancelled():
+            job.state = "cancelled"
+        else:
+            job.state = "running"
+            try:
+                job.result = handler(job)
+                job.state = "done"
+            except JobCancelled:
+                job.state = "cancelled"
+            except Exception as e:
+                job.state = "failed"
+                job.error = str(e)
+                self.status(job, f"Error: {e}")
+        job.finished_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        job.clips = None
+        metrics.count(f"api.jobs.{job.state}")
+
+    def search(self, job):
+        params = job.params
+        result = get_broadcaster_id(params["broadcaster"])
+        if "error" in result:
+            raise ApiError(result["message"])
+        broadcaster_id = result["id"]
+
+        clip_filter = None
+        filter_settings = dict(params.get("filter", {}))
+        if filter_settings:
+            if filter_settings.get("games"):
+                result = get_game_ids(filter_settings["games"])
+                if "error" in result:
+                    raise ApiError(result["message"])
+                filter_settings["game_ids"] = result["ids"]
+            clip_filter = ClipFilter.from_dict(filter_settings)
+
+        date_from = parse_time(str(params.get("from", "2d")))
+        date_to = parse_time(str(params.get("to", "now")))
+        clips = get_clips(broadcaster_id, date_from, date_to, clip_filter=clip_filter, job=job.control,
+                          limiter=get_crawl_limiter(self.status_callback))
+        self.status(job, f"{len(clips)} clips found.")
+        return clips
+
+    def run_search(self, job):
+        clips = self.search(job)
+        return {"count": len(clips), "clips": [clip.to_dict() for clip in clips]}
+
+    def run_sync(self, job):
+        clips = self.search(job)
+        if not clips:
+            return {"count": 0, "download_job": None}
+        download_params = {key: job.params[key] for key in ("quality", "order", "folder") if key in job.params}
+        download_params["sync_job"] = job.id
+        download_job, _ = self.submit("download", download_params, clips)
+        return {"count": len(clips), "download_job": download_job.id}
+
+    def run_download(self, job):
+        user_config = get_user_config()
+        clips = job.clips
+        if clips is None:
+            result = get_clips_by_id(job.params["clip_ids"])
+            if "error" in result:
+                raise ApiError(result["message"])
+            clips = result["clips"]
+
+        dl_folder = job.params.get("folder") or user_config.get("dl_folder")
+        if not dl_folder:
+            raise ApiError("Download folder is not set.")
+        for clip in clips:
+            clip.filename = build_clip_filename(clip, user_config.get("spacer"))
+            clip.quality = resolve_quality(clip.broadcaster_name, job.params.get("quality"), user_config)
+
+        result = preflight_check(clips, dl_folder)
+        self.status(job, result["message"])
+        if "error" in result:
+            raise ApiError(result["message"])
+
+        queue = DownloadQueue(clips, job.params.get("order", DEFAULT_POLICY))
+        dedup_mode = user_config.get("dedup_mode", "link")
+        processes = user_config.get("download_processes", 0)
+        status_callback = lambda message: self.status(job, message)
+        postprocessor = create_postprocessor(dl_folder, user_config, status_callback)
+        try:
+            if processes > 0:
+                limiter = create_download_limiter(user_config, processes, status_callback)
+                files = download_clips_in_processes(queue, dl_folder, status_callback, processes, dedup_mode=dedup_mode,
+                                                    job=job.control, postprocessor=postprocessor, limiter=limiter)
+            else:
+                files = download_clips(queue, dl_folder, status_callback, dedup_mode=dedup_mode, job=job.control,
+                                       postprocessor=postprocessor)
+        finally:
+            if postprocessor:
+                postprocessor.close(cancel=job.control.is_cancelled())
+        return {"count": len(clips), "files": files}
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON endpoints of the job API.
+
+    GET  /health, /jobs, /jobs/<id>, /metrics
+    POST /search, /download, /sync, /jobs/<id>/cancel, /jobs/<id>/pause, /jobs/<id>/resume
+    """
+
+    server_version = "tc_guidl"
+
+    def log_message(self, format, *args):
+        pass  # Requests are counted in the metrics instead
+
+    def send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def authorize(self):
+        token = self.server.token
+        if token and self.headers.get("Authorization") != f"Bearer {token}":
+            self.send_json(401, {"error": "Unauthorized"})
+            return False
+        return True
+
+    def do_GET(self):
+        metrics.count("api.requests")
+        if not self.authorize():
+            return
+        service = self.server.service
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+
+        if parts == ["health"]:
+            self.send_json(200, {"status": "ok"})
+        elif parts == ["metrics"]:
+            self.send_json(200, metrics.snapshot())
+        elif parts == ["jobs"]:
+            self.send_json(200, {"jobs": [job.to_dict() for job in service.list()]})
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = service.get(parts[1])
+            if job:
+                self.send_json(200, job.to_dict(details=True))
+            else:
+                self.send_json(404, {"error": "Job not found."})
+        else:
+            self.send_json(404, {"error": "Not found."})
+
+    def do_POST(self):
+        metrics.count("api.requests")
+        if not self.authorize():
+            return
+        # Browsers cannot send JSON cross-origin without a preflight, so web pages cannot post jobs
+        if not self.headers.get("Content-Type", "").startswith("application/json"):
+            self.send_json(415, {"error": "Content-Type must be application/json."})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            params = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_json(400, {"error": "Invalid JSON."})
+            return
+
+        service = self.server.service
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        if len(parts) == 1 and parts[0] in ("search", "download", "sync"):
+            try:
+                job, created = service.submit(parts[0], params)
+            except ApiError as e:
+                self.send_json(400, {"error": str(e)})
+                return
+            self.send_json(202 if created else 200, job.to_dict())
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] in ("cancel", "pause", "resume"):
+            job = service.get(parts[1])
+            if not job:
+                self.send_json(404, {"error": "Job not found."})
+                return
+            getattr(job.control, parts[2])()
+            if parts[2] == "cancel" and job.state == "queued":
+                job.state = "cancelled"
+            self.send_json(200, job.to_dict())
+        else:
+            self.send_json(404, {"error": "Not found."})
+
+
+class ApiServer:
+    """The job API, served from a background thread."""
+
+    def __init__(self, port=DEFAULT_API_PORT, token=None, status_callback=None):
+        self.service = JobService(status_callback, allow_folder=bool(token))
+        self.httpd = ThreadingHTTPServer((API_HOST, port), ApiRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.service = self.service
+        self.httpd.token = token
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="api-server", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.service.shutdown()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def start_api_server(port=DEFAULT_API_PORT, token=None, status_callback=None):
+    """
+    Start the job API on localhost.
+
+    Returns:
+        dict: {"server": ApiServer, "message": ...} or an error message if the port is not available.
+    """
+    try:
+        server = ApiServer(port, token, status_callback)
+    except OSError as e:
+        return {"error": "API_FAILED", "message": f"Error: Unable to start job API on port {port}. {e}"}
+    server.start()
+    return {"server": server, "message": f"Job API listening on http://{API_HOST}:{port}"}
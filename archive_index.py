@@ -0,0 +1,198 @@
+import os
+import re
+import sqlite3
+import threading
+
+# Index database, stored next to config.json
+INDEX_FILE = "tc_guidl_index.db"
+# Results shown per query
+DEFAULT_SEARCH_LIMIT = 200
+# Wait this long for another process (e.g. a download worker) to finish writing
+BUSY_TIMEOUT = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clips (
+    clip_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    broadcaster_name TEXT NOT NULL DEFAULT '',
+    creator_name TEXT NOT NULL DEFAULT '',
+    game_name TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL DEFAULT '',
+    view_count INTEGER NOT NULL DEFAULT 0,
+    duration REAL NOT NULL DEFAULT 0,
+    url TEXT NOT NULL DEFAULT '',
+    path TEXT NOT NULL DEFAULT ''
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS clips_fts USING fts5(
+    title, broadcaster_name, creator_name, game_name, path,
+    content='clips', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+);
+CREATE TRIGGER IF NOT EXISTS clips_insert AFTER INSERT ON clips BEGIN
+    INSERT INTO clips_fts(rowid, title, broadcaster_name, creator_name, game_name, path)
+    VALUES (new.rowid, new.title, new.broadcaster_name, new.creator_name, new.game_name, new.path);
+END;
+CREATE TRIGGER IF NOT EXISTS clips_delete AFTER DELETE ON clips BEGIN
+    INSERT INTO clips_fts(clips_fts, rowid, title, broadcaster_name, creator_name, game_name, path)
+    VALUES ('delete', old.rowid, old.title, old.broadcaster_name, old.creator_name, old.game_name, old.path);
+END;
+CREATE TRIGGER IF NOT EXISTS clips_update AFTER UPDATE ON clips BEGIN
+    INSERT INTO clips_fts(clips_fts, rowid, title, broadcaster_name, creator_name, game_name, path)
+    VALUES ('delete', old.rowid, old.title, old.broadcaster_name, old.creator_name, old.game_name, old.path);
+    INSERT INTO clips_fts(rowid, title, broadcaster_name, creator_name, game_name, path)
+    VALUES (new.rowid, new.title, new.broadcaster_name, new.creator_name, new.game_name, new.path);
+END;
+"""
+COLUMNS = ("clip_id", "title", "broadcaster_name", "creator_name", "game_name", "created_at", "view_count", "duration", "url", "path")
+NUMERIC_DEFAULTS = {"view_count": 0, "duration": 0.0}
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(text):
+    """
+    Turn typed text into an FTS5 query: every word must match, the last one as prefix.
+
+    E.g. 'clutch ac' -> '"clutch" "ac"*', so results show up while the user is still typing.
+    Returns None if the text has no words.
+    """
+    tokens = TOKEN_PATTERN.findall(text)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    if not text[-1:].isspace():
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+class ArchiveIndex:
+    """
+    Full-text index of downloaded clips (SQLite FTS5).
+
+    Every downloaded clip is stored with its metadata and file path, an FTS5
+    table over title, broadcaster, creator, game and path is kept in sync by
+    triggers. Clips are upserted by ID, so indexing a download run again only
+    updates the changed rows. One connection is shared by the threads of a
+    process; other processes (download workers) write through their own.
+    """
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    def add_clips(self, clips):
+        """
+        Insert or update downloaded clips.
+
+        Args:
+            clips (list): Dictionaries with the keys of COLUMNS, "clip_id" and "path" are required.
+
+        Returns:
+            int: The number of indexed clips.
+        """
+        rows = [tuple(clip.get(column) or NUMERIC_DEFAULTS.get(column, "") for column in COLUMNS)
+                for clip in clips if clip.get("clip_id")]
+        if not rows:
+            return 0
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in COLUMNS[1:])
+        with self.lock, self.connection:
+            self.connection.executemany(
+                f"INSERT INTO clips ({', '.join(COLUMNS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT(clip_id) DO UPDATE SET {updates}", rows)
+        return len(rows)
+
+    def remove_clips(self, clip_ids):
+        with self.lock, self.connection:
+            self.connection.executemany("DELETE FROM clips WHERE clip_id = ?", [(clip_id,) for clip_id in clip_ids])
+
+    def search(self, text, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        Find clips by words in their title, broadcaster, creator, game or path.
+
+        Results are ordered by index order (newest first) instead of relevance:
+        every word has to match anyway, and sorting by rank would score every
+        match, which takes too long for broad prefixes on large archives.
+
+        Args:
+            text (str): The typed text, the last word matches as prefix.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list: Clip dictionaries with the keys of COLUMNS, most recently indexed first.
+        """
+        query = build_match_query(text)
+        if query is None:
+            return []
+        with self.lock:
+            cursor = self.connection.execute(
+                f"SELECT {', '.join('clips.' + column for column in COLUMNS)} FROM clips_fts "
+                f"JOIN clips ON clips.rowid = clips_fts.rowid WHERE clips_fts MATCH ? ORDER BY clips_fts.rowid DESC LIMIT ?",
+                (query, limit))
+            return [dict(zip(COLUMNS, row)) for row in cursor.fetchall()]
+
+    def count(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM clips").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+# Shared index of this process, opened on first use
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_archive_index():
+    """Return the archive index of this process."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ArchiveIndex()
+        return _index
+
+
+def index_downloads(downloads, get_game_name, status_callback=None):
+    """
+    Add the clips of a download run to the archive index.
+
+    Indexing errors never fail a download, they are only reported.
+
+    Args:
+        downloads (list): (clip, file path) pairs of the run.
+        get_game_name (callable): Returns the name of a game ID (functions.get_game_name()).
+        status_callback (callable, optional): Receives status messages.
+
+    Returns:
+        int: The number of indexed clips.
+    """
+    if not downloads:
+        return 0
+    entries = []
+    for clip, file_path in downloads:
+        game_name = get_game_name(clip.get("game_id")) if clip.get("game_id") else ""
+        entries.append({
+            "clip_id": clip.get("id"),
+            "title": clip.get("title", ""),
+            "broadcaster_name": clip.get("broadcaster_name", ""),
+            "creator_name": clip.get("creator_name", ""),
+            "game_name": game_name if isinstance(game_name, str) else "",
+            "created_at": clip.get("created_at", ""),
+            "view_count": clip.get("view_count", 0),
+            "duration": clip.get("duration", 0.0),
+            "url": clip.get("url", ""),
+            "path": file_path if "://" in file_path else os.path.abspath(file_path),
+        })
+    try:
+        return get_archive_index().add_clips(entries)
+    except sqlite3.Error as e:
+        message = f"Warning: Unable to update the archive index. {e}"
+        print(message)
+        if status_callback:
+            status_callback(message)
+        return 0
@@ -0,0 +1,85 @@
+import os
+import sqlite3
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QListWidget, QListWidgetItem
+from PySide6.QtCore import Qt, Signal, QTimer, QUrl
+from PySide6.QtGui import QDesktopServices
+from archive_index import get_archive_index, DEFAULT_SEARCH_LIMIT
+
+
+class ArchiveWidget(QWidget):
+    """Instant search over the downloaded clips of all download folders (see archive_index.py)."""
+
+    status_update = Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.layout = QVBoxLayout(self)
+        self.layout.setContentsMargins(20, 10, 20, 10)  # Set margins: left, top, right, bottom
+
+        self.label = QLabel("Archive", self)
+        self.label.setAlignment(Qt.AlignTop | Qt.AlignHCenter)
+        self.label.setStyleSheet("font-size: 24px; font-weight: bold; color: white;")
+        self.layout.addWidget(self.label)
+
+        self.search_input = QLineEdit(self)
+        self.search_input.setPlaceholderText("Search downloaded clips by title, broadcaster, creator, game or file name")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.setStyleSheet("color: white;")
+        self.layout.addWidget(self.search_input)
+
+        self.result_label = QLabel(self)
+        self.result_label.setStyleSheet("color: white;")
+        self.layout.addWidget(self.result_label)
+
+        self.results_list = QListWidget(self)
+        self.results_list.setUniformItemSizes(True)
+        self.results_list.setStyleSheet("color: white;")
+        self.results_list.itemDoubleClicked.connect(self.open_clip)
+        self.layout.addWidget(self.results_list)
+
+        # Search while typing, after a short pause between key strokes
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.timeout.connect(self.search)
+        self.search_input.textChanged.connect(lambda: self.search_timer.start(150))
+
+    def showEvent(self, event):
+        # Downloads may have added clips since the page was shown last
+        super().showEvent(event)
+        self.search()
+
+    def search(self):
+        text = self.search_input.text()
+        try:
+            index = get_archive_index()
+            results = index.search(text) if text.strip() else []
+            total = index.count()
+        except sqlite3.Error as e:
+            self.status_update.emit(f"Error: Unable to search the archive index. {e}")
+            return
+
+        self.results_list.setUpdatesEnabled(False)
+        self.results_list.clear()
+        for result in results:
+            item = QListWidgetItem(" ¦ ".join(filter(None, (
+                result["created_at"][:10], result["broadcaster_name"], result["game_name"], result["title"], result["creator_name"]))))
+            item.setToolTip(f"{result['path']}\n{result['view_count']} views, {result['duration']:.0f} s\nDouble-click to play")
+            item.setData(Qt.UserRole, result["path"])
+            self.results_list.addItem(item)
+        self.results_list.setUpdatesEnabled(True)
+
+        if not text.strip():
+            self.result_label.setText(f"{total} downloaded clips indexed.")
+        elif len(results) >= DEFAULT_SEARCH_LIMIT:
+            self.result_label.setText(f"First {len(results)} matches of {total} clips, type more words to narrow down.")
+        else:
+            self.result_label.setText(f"{len(results)} matches of {total} clips.")
+
+    def open_clip(self, item):
+        path = item.data(Qt.UserRole)
+        if "://" in path:
+            QDesktopServices.openUrl(QUrl(path))
+        elif os.path.exists(path):
+            QDesktopServices.openUrl(QUrl.fromLocalFile(path))
+        else:
+            self.status_update.emit(f"Error: File not found: {path}")
@@ -0,0 +1,197 @@
+import time
+import threading
+import statistics
+from contextlib import contextmanager
+import metrics
+
+# Completed requests per tuning round, a round has at least as many as the current limit
+MIN_ROUND_SIZE = 4
+# A round whose median latency exceeds this multiple of the best median so far counts as congested
+LATENCY_FACTOR = 2.0
+# An increase must raise the throughput by this share, otherwise it is undone
+MIN_GAIN = 0.05
+# Rounds to keep the limit after an increase did not pay off, doubled for every further plateau
+HOLD_ROUNDS = 3
+MAX_HOLD_ROUNDS = 48
+# Default bounds of the user settings
+DEFAULT_CRAWL_CONCURRENCY = (1, 4)
+DEFAULT_DOWNLOAD_CONCURRENCY_MIN = 1
+
+
+class AimdLimiter:
+    """
+    Concurrency limit tuned by additive increase / multiplicative decrease.
+
+    Workers hold a slot while a request runs and report every completed
+    request with record(). Requests are evaluated in rounds of at least
+    `limit` completions:
+
+    - an error or a throttled request (HTTP 429) halves the limit at once,
+      at most once per round, so a burst of failures counts as one signal
+    - a round with a median latency far above the best round lowers the limit by one;
+      after every decrease the next round becomes the new best, so a slow server
+      does not push the limit down round after round
+    - a round whose throughput did not grow after the last increase undoes it
+      and holds the limit for a few rounds, longer every time this repeats
+    - otherwise the limit grows by one
+
+    Every change is printed, passed to status_callback and counted in the metrics.
+    """
+
+    def __init__(self, name, minimum, maximum, unit="requests", latency_factor=LATENCY_FACTOR, status_callback=None):
+        self.name = name
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = self.minimum
+        self.unit = unit
+        self.latency_factor = latency_factor
+        self.status_callback = status_callback
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.best_latency = None
+        self.previous_throughput = None
+        self.increased = False
+        self.hold = 0
+        self.plateaus = 0
+        self.history = [(time.time(), self.limit, "start")]
+        self.start_round()
+
+    def start_round(self):
+        self.round_started = time.monotonic()
+        self.round_latencies = []
+        self.round_units = 0
+        self.round_decreased = False
+
+    def acquire(self, job=None):
+        """Wait for a free slot; a cancelled job raises JobCancelled."""
+        while True:
+            with self.condition:
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                self.condition.wait(0.1)
+            # Outside the lock: a paused job blocks here, not the other users of the limiter
+            if job:
+                job.check()
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    @contextmanager
+    def slot(self, job=None):
+        self.acquire(job)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def record(self, latency, units=0, error=False, throttled=False):
+        """
+        Report a completed request.
+
+        Args:
+            latency (float): Seconds the request took.
+            units (int): Work done by the request (pages, bytes) for the throughput.
+            error (bool): The request failed, e.g. with a timeout or a server error.
+            throttled (bool): The server asked to slow down (HTTP 429).
+        """
+        with self.condition:
+            if error or throttled:
+                metrics.count(f"autotune.{self.name}.{'throttled' if throttled else 'errors'}")
+                if not self.round_decreased:
+                    self.round_decreased = True
+                    self.set_limit(self.limit // 2, "rate limited" if throttled else "errors")
+                    self.increased = False
+                return
+            self.round_latencies.append(latency)
+            self.round_units += units
+            if len(self.round_latencies) >= max(MIN_ROUND_SIZE, self.limit):
+                self.evaluate_round()
+
+    def evaluate_round(self):
+        elapsed = max(time.monotonic() - self.round_started, 1e-6)
+        throughput = self.round_units / elapsed
+        latency = statistics.median(self.round_latencies)
+        if self.best_latency is None or latency < self.best_latency:
+            self.best_latency = latency
+        if self.unit == "bytes":
+            description = f"{throughput / 1024 / 1024:.1f} MB/s"
+        else:
+            description = f"{throughput:.1f} {self.unit}/s, median latency {latency:.2f} s"
+
+        if self.round_decreased:
+            pass  # Already halved in this round
+        elif self.latency_factor and latency > self.best_latency * self.latency_factor:
+            self.set_limit(self.limit - 1, f"latency rising, {description}")
+            self.increased = False
+        elif self.increased and self.previous_throughput is not None \
+                and throughput < self.previous_throughput * (1 + MIN_GAIN):
+            self.set_limit(self.limit - 1, f"no throughput gain, {description}")
+            self.increased = False
+            self.hold = min(HOLD_ROUNDS * 2 ** self.plateaus, MAX_HOLD_ROUNDS)
+            self.plateaus += 1
+        elif self.hold > 0:
+            self.hold -= 1
+        else:
+            if self.increased:
+                self.plateaus = 0  # The last increase paid off
+            self.increased = self.set_limit(self.limit + 1, f"probing, {description}")
+        self.previous_throughput = throughput
+        self.start_round()
+
+    def set_bounds(self, minimum, maximum):
+        """Apply changed settings to a running limiter, the limit is clamped to the new bounds."""
+        with self.condition:
+            self.minimum = max(1, minimum)
+            self.maximum = max(self.minimum, maximum)
+            self.set_limit(self.limit, "settings changed")
+
+    def set_limit(self, limit, reason):
+        """Change the limit within the bounds, returns whether it changed."""
+        limit = min(self.maximum, max(self.minimum, limit))
+        if limit == self.limit:
+            return False
+        message = f"Info: {self.name.capitalize()} concurrency {self.limit} -> {limit} ({reason})"
+        if limit < self.limit:
+            # The best latency was measured under other conditions, the next round sets a new baseline
+            self.best_latency = None
+        self.limit = limit
+        self.history.append((time.time(), limit, reason))
+        metrics.count(f"autotune.{self.name}.changes")
+        self.condition.notify_all()
+        print(message)
+        if self.status_callback:
+            self.status_callback(message)
+        return True
+
+
+def create_crawl_limiter(user_config, status_callback=None):
+    """
+    Create the limiter of concurrent Helix clip requests (see functions.get_crawl_limiter()).
+
+    Returns:
+        AimdLimiter: The limiter, or None if the bounds allow a single request only.
+    """
+    minimum = user_config.get("crawl_concurrency_min", DEFAULT_CRAWL_CONCURRENCY[0])
+    maximum = user_config.get("crawl_concurrency_max", DEFAULT_CRAWL_CONCURRENCY[1])
+    if maximum <= 1:
+        return None
+    return AimdLimiter("crawl", minimum, maximum, unit="pages", status_callback=status_callback)
+
+
+def create_download_limiter(user_config, processes, status_callback=None):
+    """
+    Create the limiter of concurrent downloads in the worker processes.
+
+    The download processes are the upper bound. Clip lengths vary a lot, so
+    only errors and throughput (bytes per second) are used, not latency.
+
+    Returns:
+        AimdLimiter: The limiter, or None if the bounds allow a fixed number of downloads only.
+    """
+    minimum = min(user_config.get("download_concurrency_min", DEFAULT_DOWNLOAD_CONCURRENCY_MIN), processes)
+    if minimum >= processes:
+        return None
+    return AimdLimiter("download", minimum, processes, unit="bytes", latency_factor=None, status_callback=status_callback)
@@ -0,0 +1,386 @@
+import sys
+import argparse
+from datetime import datetime, timedelta
+from functions import load_config, get_user_config, get_broadcaster_id, get_clips, get_game_ids, build_clip_filename, download_clips, preflight_check, redownload_clips, get_crawl_limiter
+from export import EXPORT_FORMATS, open_exporter
+from clip_filter import ClipFilter
+from time_range import parse_time, validate_range
+from watch import Watcher, DEFAULT_MIN_INTERVAL, DEFAULT_MAX_INTERVAL, DEFAULT_REQUESTS_PER_HOUR
+from vod_context import plan_context_windows, download_context_windows
+from scheduler import DownloadQueue, DOWNLOAD_POLICIES, DEFAULT_POLICY
+from quality import parse_quality, resolve_quality
+from api import start_api_server, DEFAULT_API_PORT
+from verify import verify_archive
+from postprocess import create_postprocessor
+from archive_index import get_archive_index
+from leaderboard import get_leaderboard, GROUPINGS, DEFAULT_GROUP_BY, DEFAULT_SIZE, DEFAULT_GROUP_SIZE, DEFAULT_MAX_GROUPS
+import metrics
+
+
+def add_search_arguments(parser):
+    """Add broadcaster, date range and filter options to a sub command."""
+    today = datetime.now().date()
+    parser.add_argument("broadcaster", help="The broadcaster name")
+    parser.add_argument("--from", dest="date_from", type=parse_time, default=str(today - timedelta(days=2)),
+                        help="Start of the window: date (local midnight), ISO date-time or relative like 6h, 2d")
+    parser.add_argument("--to", dest="date_to", type=parse_time, default="now",
+                        help="End of the window (default: now), same formats as --from")
+    add_filter_arguments(parser)
+
+
+def quality_argument(text):
+    """Validate a --quality value."""
+    try:
+        return parse_quality(text)["name"]
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def add_quality_argument(parser):
+    parser.add_argument("--quality", type=quality_argument,
+                        help="source, 1080p, 720p, 480p, 360p, a bitrate like 1500k, 720p@2500k or audio "
+                             "(default: the quality settings per broadcaster)")
+
+
+def add_filter_arguments(parser, top=True):
+    """Add the clip filter options to a sub command, --top only if top is set."""
+    parser.add_argument("--min-views", type=int, help="Only clips with at least this many views")
+    parser.add_argument("--max-views", type=int, help="Only clips with at most this many views")
+    parser.add_argument("--min-duration", type=float, help="Only clips with at least this length in seconds")
+    parser.add_argument("--max-duration", type=float, help="Only clips with at most this length in seconds")
+    parser.add_argument("--game", dest="games", action="append", help="Only clips of this game (name or ID, repeatable)")
+    parser.add_argument("--creator", dest="creators", action="append", help="Only clips by this creator (repeatable)")
+    parser.add_argument("--title", dest="title_pattern", help="Only clips whose title matches this regular expression")
+    if top:
+        parser.add_argument("--top", dest="top_n", type=int, help="Only the N most viewed clips")
+
+
+def build_clip_filter(args):
+    """
+    Build a ClipFilter from the command line options.
+
+    Returns:
+        dict: {"filter": ClipFilter or None} or an error message.
+    """
+    settings = {
+        "min_views": args.min_views,
+        "max_views": args.max_views,
+        "min_duration": args.min_duration,
+        "max_duration": args.max_duration,
+        "creators": args.creators,
+        "title_pattern": args.title_pattern,
+        "top_n": getattr(args, "top_n", None),
+    }
+    if args.games:
+        result = get_game_ids(args.games)
+        if "error" in result:
+            return result
+        settings["game_ids"] = result["ids"]
+
+    clip_filter = ClipFilter.from_dict(settings)
+    return {"filter": None if clip_filter.is_empty() else clip_filter}
+
+
+def export_command(args):
+    """Stream the clips of a broadcaster into an export file."""
+    result = validate_range(args.date_from, args.date_to)
+    if "error" in result:
+        print(result["message"])
+        return 1
+
+    result = get_broadcaster_id(args.broadcaster)
+    if "error" in result:
+        print(f"Error: {result['message']}")
+        return 1
+    broadcaster_id = result["id"]
+
+    result = build_clip_filter(args)
+    if "error" in result:
+        print(f"Error: {result['message']}")
+        return 1
+    clip_filter = result["filter"]
+
+    result = open_exporter(args.output, args.format)
+    if "error" in result:
+        print(f"Error: {result['message']}")
+        return 1
+    exporter = result["exporter"]
+
+    try:
+        get_clips(broadcaster_id, args.date_from, args.date_to, page_callback=exporter.write_clips,
+                  collect=False, clip_filter=clip_filter, limiter=get_crawl_limiter())
+    finally:
+        exporter.close()
+
+    print(f"Info: {exporter.rows} clips exported to {args.output}")
+    return 0
+
+
+def download_command(args):
+    """Search the clips of a broadcaster and download all matching clips."""
+    result = validate_range(args.date_from, args.date_to)
+    if "error" in result:
+        print(result["message"])
+        return 1
+
+    user_config = get_user_config()
+    dl_folder = args.folder or user_config.get("dl_folder")
+    if not dl_folder:
+        print("Error: Download folder is not set.")
+        return 1
+
+    result = get_broadcaster_id(args.broadcaster)
+    if "error" in result:
+        print(f"Error: {result['message']}")
+        return 1
+    broadcaster_id = result["id"]
+
+    result = build_clip_filter(args)
+    if "error" in result:
+        print(f"Error: {result['message']}")
+        return 1
+
+    clips = get_clips(broadcaster_id, args.date_from, args.date_to, clip_filter=result["filter"],
+                      limiter=get_crawl_limiter())
+    print(f"Info: {len(clips)} clips found.")
+
+    spacer_template = user_config.get("spacer")
+    for clip in clips:
+        clip.filename = build_clip_filename(clip, spacer_template)
+        clip.quality = resolve_quality(clip.broadcaster_name, args.quality, user_config)
+
+    result = preflight_check(clips, dl_folder)
+    print(result["message"])
+    if "error" in result:
+        return 1
+
+    queue = DownloadQueue(clips, args.order)
+    postprocessor = create_postprocessor(dl_folder, user_config)
+    try:
+        downloaded_files = download_clips(queue, dl_folder, print, dedup_mode=user_config.get("dedup_mode", "link"),
+                                          postprocessor=postprocessor)
+    finally:
+        if postprocessor:
+            postprocessor.close()
+    print(f"Info: {len(downloaded_files)} clips in {dl_folder}")
+
+    context_seconds = args.context if args.context is not None else user_config.get("vod_context_seconds", 0)
+    if context_seconds > 0:
+        windows = plan_context_windows(clips, context_seconds)
+        skipped = len(clips) - sum(len(window["clip_ids"]) for window in windows)
+        if skipped:
+            print(f"Info: {skipped} clips have no VOD, no context downloaded for them.")
+        sections = download_context_windows(windows, dl_folder, print)
+        print(f"Info: {len(sections)} VOD sections in {dl_folder}")
+    return 0
+
+
+def watch_command(args):
+    """Poll broadcasters for new clips and download them until interrupted."""
+    user_config = get_user_config()
+    dl_folder = args.folder or user_config.get("dl_folder")
+    if not dl_folder:
+        print("Error: Download folder is not set.")
+        return 1
+
+    result = build_clip_filter(args)
+    if "error" in result:
+        print(f"Error: {result['message']}")
+        return 1
+
+    watcher = Watcher(args.broadcasters, dl_folder, user_config.get("spacer"), clip_filter=result["filter"],
+                      dedup_mode=user_config.get("dedup_mode", "link"), min_interval=args.min_interval,
+                      max_interval=args.max_interval, requests_per_hour=args.requests_per_hour, quality=args.quality)
+    try:
+        result = watcher.run()
+    except KeyboardInterrupt:
+        watcher.stop()
+        return 0
+    return 1 if "error" in result else 0
+
+
+def verify_command(args):
+    """Verify the downloaded clips of a folder and optionally download broken clips again."""
+    user_config = get_user_config()
+    dl_folder = args.folder or user_config.get("dl_folder")
+    if not dl_folder:
+        print("Error: Download folder is not set.")
+        return 1
+
+    result = verify_archive(dl_folder, full=args.full, repair=args.repair, workers=args.workers)
+    if "error" in result:
+        print(result["message"])
+        return 1
+    if not args.repair:
+        return 1 if result["bad"] or result["broken_untracked"] else 0
+
+    if result["requeue"]:
+        print(f"Info: Downloading {len(result['requeue'])} broken or missing clips again...")
+        result = redownload_clips(result["requeue"], dl_folder, print, dedup_mode=user_config.get("dedup_mode", "link"))
+        if "error" in result:
+            print(result["message"])
+            return 1
+        print(f"Info: {len(result['files'])} clips downloaded again, {len(result['missing'])} no longer available.")
+    return 0
+
+
+def find_command(args):
+    """Search the archive index of downloaded clips."""
+    results = get_archive_index().search(" ".join(args.words), limit=args.limit)
+    for result in results:
+        print(f"{result['created_at'][:10]} | {result['broadcaster_name']} | {result['title']} | {result['path']}")
+    print(f"Info: {len(results)} matches.")
+    return 0 if results else 1
+
+
+def format_clip(rank, clip):
+    return f"{rank:>3}. {clip.view_count:>9} views | {clip.broadcaster_name} | {clip.title} | {clip.url}"
+
+
+def top_command(args):
+    """Rank the clips of several broadcasters by views."""
+    result = validate_range(args.date_from, args.date_to)
+    if "error" in result:
+        print(result["message"])
+        return 1
+
+    result = build_clip_filter(args)
+    if "error" in result:
+        print(f"Error: {result['message']}")
+        return 1
+
+    results = get_leaderboard(args.broadcasters, args.date_from, args.date_to, size=args.size,
+                              group_by=args.group_by or DEFAULT_GROUP_BY, group_size=args.group_size,
+                              max_groups=args.groups, clip_filter=result["filter"],
+                              limiter=get_crawl_limiter())
+    if "error" in results:
+        print(results["message"])
+        return 1
+
+    print("\nTop clips:")
+    for rank, clip in enumerate(results["overall"], 1):
+        print(format_clip(rank, clip))
+    for grouping in args.group_by or DEFAULT_GROUP_BY:
+        print(f"\nTop clips per {grouping}:")
+        for group in results[grouping]:
+            print(f"{group['name']} ({group['clips']} clips, {group['views']} views)")
+            for rank, clip in enumerate(group["top"], 1):
+                print("  " + format_clip(rank, clip))
+    if results["partial"]:
+        print(f"\n{results['message']}")
+
+    if args.output:
+        result = open_exporter(args.output, args.format)
+        if "error" in result:
+            print(f"Error: {result['message']}")
+            return 1
+        exporter = result["exporter"]
+        try:
+            exporter.write_clips(results["overall"])
+        finally:
+            exporter.close()
+        print(f"Info: {exporter.rows} clips exported to {args.output}")
+    return 0
+
+
+def serve_command(args):
+    """Run the job API until interrupted."""
+    user_config = get_user_config()
+    port = args.port or user_config.get("api_port") or DEFAULT_API_PORT
+    result = start_api_server(port, user_config.get("api_token") or None, print)
+    print(result["message"])
+    if "error" in result:
+        return 1
+    server = result["server"]
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="tc_guidl", description="Twitch-Clip Downloader command line interface.")
+    parser.add_argument("--metrics", help="Write timings, request counts and cache hit rates to this JSON file")
+    parser.add_argument("--profile", help="Capture a cProfile of the run and save it to this file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export clip metadata of a broadcaster")
+    add_search_arguments(export_parser)
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, help="Export format (defaults to the file extension)")
+    export_parser.add_argument("--output", "-o", required=True, help="The export file")
+    export_parser.set_defaults(func=export_command)
+
+    download_parser = subparsers.add_parser("download", help="Download clips of a broadcaster")
+    add_search_arguments(download_parser)
+    download_parser.add_argument("--folder", help="Download folder (defaults to the configured folder)")
+    add_quality_argument(download_parser)
+    download_parser.add_argument("--order", choices=DOWNLOAD_POLICIES, default=DEFAULT_POLICY,
+                                 help="Download order: oldest, views (most viewed), shortest or newest first")
+    download_parser.add_argument("--context", type=int, help="Also download this many seconds of the source VOD around each clip")
+    download_parser.set_defaults(func=download_command)
+
+    watch_parser = subparsers.add_parser("watch", help="Continuously download new clips of broadcasters")
+    watch_parser.add_argument("broadcasters", nargs="+", help="The broadcaster names")
+    watch_parser.add_argument("--folder", help="Download folder (defaults to the configured folder)")
+    watch_parser.add_argument("--min-interval", type=float, default=DEFAULT_MIN_INTERVAL, help="Shortest polling interval per channel in seconds")
+    watch_parser.add_argument("--max-interval", type=float, default=DEFAULT_MAX_INTERVAL, help="Longest polling interval per channel in seconds")
+    watch_parser.add_argument("--requests-per-hour", type=int, default=DEFAULT_REQUESTS_PER_HOUR, help="Helix request budget for all channels")
+    add_quality_argument(watch_parser)
+    add_filter_arguments(watch_parser)
+    watch_parser.set_defaults(func=watch_command)
+
+    verify_parser = subparsers.add_parser("verify", help="Check downloaded clips for missing, truncated or corrupt files")
+    verify_parser.add_argument("--folder", help="Download folder (defaults to the configured folder)")
+    verify_parser.add_argument("--full", action="store_true", help="Hash every file, even files unchanged since the last verification")
+    verify_parser.add_argument("--repair", action="store_true", help="Remove broken files and partial downloads and download broken clips again")
+    verify_parser.add_argument("--workers", type=int, help="Number of threads (default: four per CPU, at most 32)")
+    verify_parser.set_defaults(func=verify_command)
+
+    find_parser = subparsers.add_parser("find", help="Search downloaded clips by title, broadcaster, creator, game or file name")
+    find_parser.add_argument("words", nargs="+", help="Words to search for, the last one also matches as prefix")
+    find_parser.add_argument("--limit", type=int, default=50, help="Maximum number of results")
+    find_parser.set_defaults(func=find_command)
+
+    top_parser = subparsers.add_parser("top", help="Rank the clips of several broadcasters by views, overall and per game or creator")
+    top_parser.add_argument("broadcasters", nargs="+", help="The broadcaster names")
+    top_parser.add_argument("--from", dest="date_from", type=parse_time, default="30d",
+                            help="Start of the window (default: 30 days ago), same formats as for export")
+    top_parser.add_argument("--to", dest="date_to", type=parse_time, default="now", help="End of the window (default: now)")
+    top_parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="Clips in the overall ranking")
+    top_parser.add_argument("--by", dest="group_by", action="append", choices=GROUPINGS,
+                            help="Also rank per game, creator or broadcaster (repeatable, default: game and creator)")
+    top_parser.add_argument("--group-size", type=int, default=DEFAULT_GROUP_SIZE, help="Clips per group")
+    top_parser.add_argument("--groups", type=int, default=DEFAULT_MAX_GROUPS, help="Groups shown per grouping, most viewed first")
+    top_parser.add_argument("--output", "-o", help="Also export the overall ranking to this file")
+    top_parser.add_argument("--format", choices=EXPORT_FORMATS, help="Export format (defaults to the file extension)")
+    add_filter_arguments(top_parser, top=False)
+    top_parser.set_defaults(func=top_command)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the job API for scripts and bots on localhost")
+    serve_parser.add_argument("--port", type=int, help=f"Port of the API (default: the configured port or {DEFAULT_API_PORT})")
+    serve_parser.set_defaults(func=serve_command)
+
+    args = parser.parse_args(argv)
+
+    config_status = load_config()
+    if not config_status.get("success"):
+        print(f"Error: {config_status['message']}")
+        return 1
+
+    if args.profile:
+        result = metrics.start_profiling()
+        if not result["success"]:
+            print(f"Error: {result['message']}")
+            return 1
+    try:
+        return args.func(args)
+    finally:
+        if args.profile:
+            print(metrics.stop_profiling(args.profile)["message"])
+        if args.metrics:
+            print(metrics.export_metrics(args.metrics)["message"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import re
+import heapq
+
+
+class ClipFilter:
+    """
+    Criteria applied to every page of get_clips before clips are kept.
+
+    All criteria are optional; an empty filter lets every clip pass. Game and
+    creator criteria are case-insensitive sets, so a check is O(1) per clip.
+    Game names have to be resolved to IDs before the search (see
+    functions.get_game_ids), so filtered-out clips never trigger a game lookup.
+    """
+
+    def __init__(self, min_views=None, max_views=None, min_duration=None, max_duration=None,
+                 game_ids=None, creators=None, title_pattern=None, top_n=None):
+        self.min_views = min_views
+        self.max_views = max_views
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.game_ids = set(game_ids) if game_ids else None
+        self.creators = {creator.lower() for creator in creators} if creators else None
+        self.title_regex = re.compile(title_pattern, re.IGNORECASE) if title_pattern else None
+        self.top_n = top_n or None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a filter from a dictionary, e.g. the "filter" config section."""
+        return cls(
+            min_views=data.get("min_views"),
+            max_views=data.get("max_views"),
+            min_duration=data.get("min_duration"),
+            max_duration=data.get("max_duration"),
+            game_ids=data.get("game_ids"),
+            creators=data.get("creators"),
+            title_pattern=data.get("title_pattern"),
+            top_n=data.get("top_n"),
+        )
+
+    def is_empty(self):
+        return not any((
+            self.min_views, self.max_views, self.min_duration, self.max_duration,
+            self.game_ids, self.creators, self.title_regex, self.top_n
+        ))
+
+    def matches(self, clip):
+        """Check a clip (Helix dictionary or Clip record) against all criteria."""
+        view_count = clip.get("view_count", 0)
+        if self.min_views is not None and view_count < self.min_views:
+            return False
+        if self.max_views is not None and view_count > self.max_views:
+            return False
+
+        duration = clip.get("duration", 0.0)
+        if self.min_duration is not None and duration < self.min_duration:
+            return False
+        if self.max_duration is not None and duration > self.max_duration:
+            return False
+
+        if self.game_ids is not None and clip.get("game_id", "") not in self.game_ids:
+            return False
+        if self.creators is not None and clip.get("creator_name", "").lower() not in self.creators:
+            return False
+        if self.title_regex is not None and not self.title_regex.search(clip.get("title", "")):
+            return False
+        return True
+
+    def filter_page(self, clips):
+        return [clip for clip in clips if self.matches(clip)]
+
+
+class TopClips:
+    """Bounded min-heap that keeps the N most viewed clips seen so far."""
+
+    def __init__(self, size):
+        self.size = size
+        self.heap = []
+
+    def accepts(self, clip):
+        """Check whether push() would keep a clip, e.g. before converting it to a Clip record."""
+        return len(self.heap) < self.size or (clip.get("view_count", 0), clip.get("id")) > self.heap[0][:2]
+
+    def push(self, clip):
+        entry = (clip.get("view_count", 0), clip.get("id"), clip)
+        if len(self.heap) < self.size:
+            heapq.heappush(self.heap, entry)
+        elif entry[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, entry)
+
+    def extend(self, clips):
+        for clip in clips:
+            self.push(clip)
+
+    def clips(self):
+        """Return the kept clips, most viewed first."""
+        return [entry[2] for entry in sorted(self.heap, key=lambda entry: entry[:2], reverse=True)]
+
+    def __len__(self):
+        return len(self.heap)
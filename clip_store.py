@@ -0,0 +1,168 @@
+import sys
+
+
+class Clip:
+    """
+    Compact representation of a Twitch clip.
+
+    Only the fields used by the app are kept. Repeated strings (broadcaster,
+    creator, game ID) are interned, so thousands of clips of one channel share
+    a single copy. get() mirrors dict.get() so clips can be passed wherever the
+    raw Helix dictionaries were used before.
+    """
+
+    __slots__ = (
+        "id", "url", "broadcaster_id", "broadcaster_name", "creator_name", "title",
+        "game_id", "created_at", "view_count", "duration", "video_id", "vod_offset",
+        "thumbnail_url", "filename", "quality"
+    )
+
+    def __init__(self, id, url, broadcaster_id="", broadcaster_name="", creator_name="", title="",
+                 game_id="", created_at="", view_count=0, duration=0.0, video_id="", vod_offset=None,
+                 thumbnail_url="", filename=None, quality=None):
+        self.id = id
+        self.url = url
+        self.broadcaster_id = sys.intern(broadcaster_id or "")
+        self.broadcaster_name = sys.intern(broadcaster_name or "")
+        self.creator_name = sys.intern(creator_name or "")
+        self.title = title
+        self.game_id = sys.intern(game_id or "")
+        self.created_at = created_at
+        self.view_count = view_count or 0
+        self.duration = duration or 0.0
+        self.video_id = video_id or ""
+        self.vod_offset = vod_offset
+        self.thumbnail_url = thumbnail_url or ""
+        self.filename = filename
+        self.quality = quality  # Quality profile of the download, see quality.py
+
+    @classmethod
+    def from_helix(cls, data):
+        """Create a clip from a clip dictionary of the Twitch Helix API."""
+        return cls(
+            id=data["id"],
+            url=data.get("url"),
+            broadcaster_id=data.get("broadcaster_id"),
+            broadcaster_name=data.get("broadcaster_name"),
+            creator_name=data.get("creator_name"),
+            title=data.get("title", ""),
+            game_id=data.get("game_id"),
+            created_at=data.get("created_at", ""),
+            view_count=data.get("view_count"),
+            duration=data.get("duration"),
+            video_id=data.get("video_id"),
+            vod_offset=data.get("vod_offset"),
+            thumbnail_url=data.get("thumbnail_url"),
+        )
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __repr__(self):
+        return f"Clip(id={self.id!r}, title={self.title!r})"
+
+
+class ClipIndex:
+    """
+    Ordered collection of clips with O(1) lookups by clip ID and URL.
+
+    Iteration yields the clips in insertion order, which is the order returned
+    by get_clips (sorted by creation date).
+    """
+
+    def __init__(self, clips=()):
+        self.clips = []
+        self.positions = {}
+        self.ids_by_url = {}
+        for clip in clips:
+            self.add(clip)
+
+    def add(self, clip):
+        if clip.id in self.positions:
+            return
+        self.positions[clip.id] = len(self.clips)
+        self.clips.append(clip)
+        if clip.url:
+            self.ids_by_url[clip.url] = clip.id
+
+    def get(self, clip_id):
+        position = self.positions.get(clip_id)
+        return self.clips[position] if position is not None else None
+
+    def get_by_url(self, url):
+        clip_id = self.ids_by_url.get(url)
+        return self.get(clip_id) if clip_id else None
+
+    def select(self, clip_ids):
+        """Return the clips for a set of IDs in list order, ignoring unknown IDs."""
+        positions = sorted(self.positions[clip_id] for clip_id in clip_ids if clip_id in self.positions)
+        return [self.clips[position] for position in positions]
+
+    def __contains__(self, clip_id):
+        return clip_id in self.positions
+
+    def __iter__(self):
+        return iter(self.clips)
+
+    def __len__(self):
+        return len(self.clips)
+
+
+class ClipSelection:
+    """
+    The selected clips of a list, updated with every change instead of rescanning the list.
+
+    Adding or removing a clip is O(1). Besides the IDs, the number of clips and
+    their summed duration are kept per broadcaster, so the download size of the
+    selection can be estimated with the quality of every broadcaster at any time.
+    """
+
+    def __init__(self):
+        self.ids = set()
+        self.broadcasters = {}  # Broadcaster name -> [selected clips, summed duration]
+
+    def add(self, clip):
+        if clip.id in self.ids:
+            return
+        self.ids.add(clip.id)
+        totals = self.broadcasters.setdefault(clip.broadcaster_name, [0, 0.0])
+        totals[0] += 1
+        totals[1] += clip.duration
+
+    def remove(self, clip):
+        if clip.id not in self.ids:
+            return
+        self.ids.remove(clip.id)
+        totals = self.broadcasters[clip.broadcaster_name]
+        totals[0] -= 1
+        totals[1] -= clip.duration
+        if totals[0] == 0:
+            del self.broadcasters[clip.broadcaster_name]
+
+    def clear(self):
+        self.ids = set()
+        self.broadcasters = {}
+
+    def estimate_bytes(self, get_bytes_per_second):
+        """
+        Estimate the download size of the selected clips.
+
+        Args:
+            get_bytes_per_second (callable): Returns the bytes per second of a broadcaster's clips.
+        """
+        return sum(int(duration * get_bytes_per_second(name)) for name, (_, duration) in self.broadcasters.items())
+
+    def __contains__(self, clip_id):
+        return clip_id in self.ids
+
+    def __len__(self):
+        return len(self.ids)
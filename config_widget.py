@@ -1,8 +1,17 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QFileDialog, QLineEdit, QHBoxLayout, QFormLayout, QSpacerItem, QSizePolicy, QGroupBox
+import os
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QFileDialog, QLineEdit, QHBoxLayout, QFormLayout, QSpacerItem, QSizePolicy, QGroupBox, QComboBox, QCheckBox, QSpinBox
 from PySide6.QtCore import Qt, Signal, QTimer
 from custom_line_edit import CustomLineEdit
 from functions import get_auth_config, get_user_config, file_name_schema, manage_twitch_oauth_token, get_broadcaster_id, save_config_section
 from home_widget import HomeWidget
+from dedup import DEDUP_MODES
+from postprocess import POSTPROCESS_MODES
+import metrics
+from response_cache import clear_cache
+from quality import QUALITY_PRESETS, parse_quality, parse_quality_by_broadcaster, format_quality_by_broadcaster
+
+# cProfile output written when profiling is switched off
+PROFILE_FILE = "tc_guidl_profile.prof"
 
 class ConfigWidget(QWidget):
     status_update = Signal(str)
@@ -52,8 +61,7 @@ class ConfigWidget(QWidget):
         self.defaults_form_layout.addRow(QLabel("Default Broadcaster:", self), self.default_broadcaster_input)
 
         self.download_folder_input = QLineEdit(self)
-        self.download_folder_input.setPlaceholderText("Download-Folder")
-        self.download_folder_input.setReadOnly(True)
+        self.download_folder_input.setPlaceholderText("Download-Folder or s3://bucket/prefix")
         self.download_folder_input.setStyleSheet("color: white;")
         self.browse_button = QPushButton("Browse", self)
         self.browse_button.setStyleSheet("min-width: 55px;")
@@ -84,6 +92,97 @@ class ConfigWidget(QWidget):
         self.file_name_button_layout.addStretch()  # Fügt einen Spacer rechts von den Buttons hinzu
         self.defaults_form_layout.addRow(QLabel("Available values:", self), self.file_name_button_layout)
 
+        self.dedup_mode_input = QComboBox(self)
+        self.dedup_mode_input.addItems(DEDUP_MODES)
+        self.dedup_mode_input.setToolTip("link: hard-link clips already downloaded under another name\nskip: keep the existing file only\noff: no duplicate detection")
+        self.dedup_mode_input.setStyleSheet("color: white;")
+        self.defaults_form_layout.addRow(QLabel("Duplicates:", self), self.dedup_mode_input)
+
+        self.download_processes_input = QSpinBox(self)
+        self.download_processes_input.setRange(0, os.cpu_count() or 1)
+        self.download_processes_input.setSpecialValueText("off (download in app)")
+        self.download_processes_input.setToolTip("Run yt-dlp in separate worker processes to keep the app responsive during large downloads")
+        self.download_processes_input.setStyleSheet("color: white;")
+        self.download_concurrency_min_input = QSpinBox(self)
+        self.download_concurrency_min_input.setRange(1, os.cpu_count() or 1)
+        self.download_concurrency_min_input.setPrefix("Tune from: ")
+        self.download_concurrency_min_input.setToolTip("Fewest clips downloaded at once. Between this and the number of processes,\n"
+                                                       "the app adds downloads while the throughput grows and halves them on errors.\n"
+                                                       "Set it to the number of processes for a fixed number.")
+        self.download_concurrency_min_input.setStyleSheet("color: white;")
+        self.download_processes_layout = QHBoxLayout()
+        self.download_processes_layout.addWidget(self.download_processes_input, 1)
+        self.download_processes_layout.addWidget(self.download_concurrency_min_input)
+        self.defaults_form_layout.addRow(QLabel("Download Processes:", self), self.download_processes_layout)
+
+        self.crawl_concurrency_min_input = QSpinBox(self)
+        self.crawl_concurrency_min_input.setRange(1, 16)
+        self.crawl_concurrency_min_input.setPrefix("Min: ")
+        self.crawl_concurrency_max_input = QSpinBox(self)
+        self.crawl_concurrency_max_input.setRange(1, 16)
+        self.crawl_concurrency_max_input.setPrefix("Max: ")
+        for widget in (self.crawl_concurrency_min_input, self.crawl_concurrency_max_input):
+            widget.setToolTip("Helix requests of a search at once. Long time ranges are split into parts that are searched\n"
+                              "concurrently; the app adds requests while pages arrive faster and backs off on slow\n"
+                              "responses, errors and rate limits (HTTP 429). Max 1 searches one page after another.")
+            widget.setStyleSheet("color: white;")
+        self.crawl_concurrency_layout = QHBoxLayout()
+        self.crawl_concurrency_layout.addWidget(self.crawl_concurrency_min_input)
+        self.crawl_concurrency_layout.addWidget(self.crawl_concurrency_max_input)
+        self.defaults_form_layout.addRow(QLabel("Search Requests:", self), self.crawl_concurrency_layout)
+
+        self.postprocess_input = QComboBox(self)
+        self.postprocess_input.addItems(POSTPROCESS_MODES)
+        self.postprocess_input.setToolTip("Remux downloaded clips with ffmpeg while the next clips download\n"
+                                          "faststart: move the index to the front, so web players start instantly\n"
+                                          "loudnorm: faststart and normalize the loudness (re-encodes the audio)")
+        self.postprocess_input.setStyleSheet("color: white;")
+        self.postprocess_processes_input = QSpinBox(self)
+        self.postprocess_processes_input.setRange(0, os.cpu_count() or 1)
+        self.postprocess_processes_input.setSpecialValueText("auto")
+        self.postprocess_processes_input.setPrefix("Processes: ")
+        self.postprocess_processes_input.setToolTip("Number of ffmpeg worker processes, auto uses one per CPU")
+        self.postprocess_processes_input.setStyleSheet("color: white;")
+        self.postprocess_layout = QHBoxLayout()
+        self.postprocess_layout.addWidget(self.postprocess_input, 1)
+        self.postprocess_layout.addWidget(self.postprocess_processes_input)
+        self.defaults_form_layout.addRow(QLabel("Post-Processing:", self), self.postprocess_layout)
+
+        self.vod_context_input = QSpinBox(self)
+        self.vod_context_input.setRange(0, 600)
+        self.vod_context_input.setSuffix(" s")
+        self.vod_context_input.setSpecialValueText("off")
+        self.vod_context_input.setToolTip("Also download this many seconds of the source VOD before and after each clip.\nOverlapping sections of the same VOD are merged and downloaded once.")
+        self.vod_context_input.setStyleSheet("color: white;")
+        self.defaults_form_layout.addRow(QLabel("VOD Context:", self), self.vod_context_input)
+
+        self.quality_input = QComboBox(self)
+        self.quality_input.setEditable(True)
+        self.quality_input.addItems(QUALITY_PRESETS)
+        self.quality_input.setToolTip("Maximum quality of downloads: source, a height (480p), a bitrate (1500k), both (720p@2500k) or audio")
+        self.quality_input.setStyleSheet("color: white;")
+        self.quality_by_broadcaster_input = QLineEdit(self)
+        self.quality_by_broadcaster_input.setPlaceholderText("Per broadcaster, e.g. name=480p, other=audio")
+        self.quality_by_broadcaster_input.setStyleSheet("color: white;")
+        self.quality_layout = QHBoxLayout()
+        self.quality_layout.addWidget(self.quality_input)
+        self.quality_layout.addWidget(self.quality_by_broadcaster_input, 1)
+        self.defaults_form_layout.addRow(QLabel("Quality:", self), self.quality_layout)
+
+        self.api_port_input = QSpinBox(self)
+        self.api_port_input.setRange(0, 65535)
+        self.api_port_input.setSpecialValueText("off")
+        self.api_port_input.setToolTip("Let scripts and bots queue searches and downloads through a JSON API on localhost.\nTakes effect after a restart.")
+        self.api_port_input.setStyleSheet("color: white;")
+        self.api_token_input = QLineEdit(self)
+        self.api_token_input.setPlaceholderText("Optional token (Authorization: Bearer ...)")
+        self.api_token_input.setEchoMode(QLineEdit.Password)
+        self.api_token_input.setStyleSheet("color: white;")
+        self.api_layout = QHBoxLayout()
+        self.api_layout.addWidget(self.api_port_input)
+        self.api_layout.addWidget(self.api_token_input, 1)
+        self.defaults_form_layout.addRow(QLabel("Job API Port:", self), self.api_layout)
+
         self.save_config_button = QPushButton("Save Configuration", self)
         self.save_config_button.clicked.connect(self.save_configuration)
         self.defaults_form_layout.addRow(self.save_config_button)
@@ -91,6 +190,29 @@ class ConfigWidget(QWidget):
         self.defaults_group.setLayout(self.defaults_form_layout)
         self.layout.addWidget(self.defaults_group)
 
+        # Diagnostics
+        self.diagnostics_group = QGroupBox("Diagnostics", self)
+        self.diagnostics_layout = QHBoxLayout()
+
+        self.profile_checkbox = QCheckBox("Capture cProfile", self)
+        self.profile_checkbox.setToolTip(f"Profile all searches and downloads until unchecked, then save to {PROFILE_FILE}")
+        self.profile_checkbox.toggled.connect(self.toggle_profiling)
+        self.diagnostics_layout.addWidget(self.profile_checkbox)
+
+        self.export_metrics_button = QPushButton("Export Metrics", self)
+        self.export_metrics_button.setToolTip(f"Write timings, request counts and cache hit rates to {metrics.METRICS_FILE}")
+        self.export_metrics_button.clicked.connect(self.export_metrics)
+        self.diagnostics_layout.addWidget(self.export_metrics_button)
+
+        self.clear_cache_button = QPushButton("Clear API Cache", self)
+        self.clear_cache_button.setToolTip("Remove stored Twitch API responses, the next searches fetch fresh data")
+        self.clear_cache_button.clicked.connect(self.clear_api_cache)
+        self.diagnostics_layout.addWidget(self.clear_cache_button)
+        self.diagnostics_layout.addStretch()
+
+        self.diagnostics_group.setLayout(self.diagnostics_layout)
+        self.layout.addWidget(self.diagnostics_group)
+
         self.bottomspacer = QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding)
         self.layout.addItem(self.bottomspacer)
 
@@ -112,6 +234,18 @@ class ConfigWidget(QWidget):
         self.default_broadcaster_input.setText(user_config.get("default_user_name", ""))
         self.download_folder_input.setText(user_config.get("dl_folder", ""))
         self.file_name_schema_input.setText(user_config.get("spacer"))
+        self.dedup_mode_input.setCurrentText(user_config.get("dedup_mode", "link"))
+        self.download_processes_input.setValue(user_config.get("download_processes", 0))
+        self.download_concurrency_min_input.setValue(user_config.get("download_concurrency_min", 1))
+        self.crawl_concurrency_min_input.setValue(user_config.get("crawl_concurrency_min", 1))
+        self.crawl_concurrency_max_input.setValue(user_config.get("crawl_concurrency_max", 4))
+        self.postprocess_input.setCurrentText(user_config.get("postprocess", "off"))
+        self.postprocess_processes_input.setValue(user_config.get("postprocess_processes", 0))
+        self.vod_context_input.setValue(user_config.get("vod_context_seconds", 0))
+        self.quality_input.setCurrentText(user_config.get("quality", "source"))
+        self.quality_by_broadcaster_input.setText(format_quality_by_broadcaster(user_config.get("quality_by_broadcaster", {})))
+        self.api_port_input.setValue(user_config.get("api_port", 0))
+        self.api_token_input.setText(user_config.get("api_token", ""))
 
     def test_connection(self):
         client_id = self.client_id_input.text()
@@ -146,11 +280,39 @@ class ConfigWidget(QWidget):
             self.status_update.emit("Error: File Name Schema cannot be empty.")
             self.file_name_schema_input.setFocus()
             return
+        try:
+            quality = parse_quality(self.quality_input.currentText())["name"]
+        except ValueError as e:
+            self.status_update.emit(f"Error: {e}")
+            self.quality_input.setFocus()
+            return
+        if self.crawl_concurrency_min_input.value() > self.crawl_concurrency_max_input.value():
+            self.status_update.emit("Error: Minimum search requests cannot be larger than the maximum.")
+            self.crawl_concurrency_min_input.setFocus()
+            return
+        result = parse_quality_by_broadcaster(self.quality_by_broadcaster_input.text())
+        if "error" in result:
+            self.status_update.emit(result["message"])
+            self.quality_by_broadcaster_input.setFocus()
+            return
+        quality_by_broadcaster = result["qualities"]
 
         result = save_config_section("user", {
             "default_user_name": default_broadcaster,
             "dl_folder": download_folder,
-            "spacer": file_name_schema
+            "spacer": file_name_schema,
+            "dedup_mode": self.dedup_mode_input.currentText(),
+            "download_processes": self.download_processes_input.value(),
+            "download_concurrency_min": self.download_concurrency_min_input.value(),
+            "crawl_concurrency_min": self.crawl_concurrency_min_input.value(),
+            "crawl_concurrency_max": self.crawl_concurrency_max_input.value(),
+            "postprocess": self.postprocess_input.currentText(),
+            "postprocess_processes": self.postprocess_processes_input.value(),
+            "vod_context_seconds": self.vod_context_input.value(),
+            "quality": quality,
+            "quality_by_broadcaster": quality_by_broadcaster,
+            "api_port": self.api_port_input.value(),
+            "api_token": self.api_token_input.text().strip()
         })
         if result["success"]:
             self.status_update.emit(result["message"])
@@ -176,6 +338,26 @@ class ConfigWidget(QWidget):
 
         self.file_name_schema_input.setFocus()
 
+    def toggle_profiling(self, checked):
+        if checked:
+            result = metrics.start_profiling()
+            if not result["success"]:
+                self.profile_checkbox.blockSignals(True)
+                self.profile_checkbox.setChecked(False)
+                self.profile_checkbox.blockSignals(False)
+            self.status_update.emit(result["message"])
+        else:
+            result = metrics.stop_profiling(PROFILE_FILE)
+            self.status_update.emit(result["message"])
+
+    def export_metrics(self):
+        result = metrics.export_metrics()
+        self.status_update.emit(result["message"])
+
+    def clear_api_cache(self):
+        result = clear_cache()
+        self.status_update.emit(result["message"])
+
     def update_test_button_state(self):
         client_id = self.client_id_input.text().strip()
         client_secret = self.client_secret_input.text().strip()
@@ -0,0 +1,242 @@
+import os
+import json
+import hashlib
+import argparse
+from datetime import datetime
+from storage import get_storage, link_file
+from quality import DEFAULT_QUALITY, satisfies
+from locks import LOCK_FOLDER
+
+# Manifest file stored inside every download folder
+MANIFEST_FILE = "tc_guidl_manifest.jsonl"
+# Read files in 1 MiB chunks while hashing
+HASH_CHUNK_SIZE = 1024 * 1024
+# Valid values for the "dedup_mode" user setting
+DEDUP_MODES = ("link", "skip", "off")
+
+
+def hash_file(file_path):
+    """
+    Calculate the SHA-256 hash of a file.
+
+    Args:
+        file_path (str): The file to hash.
+
+    Returns:
+        str: The hex digest of the file content.
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def load_manifest(dl_folder):
+    """
+    Load the manifest of a download folder.
+
+    The manifest is an append-only JSON Lines file. Every line describes one
+    downloaded file; later lines win over earlier lines for the same clip ID.
+
+    Args:
+        dl_folder (str): The download folder or storage target (see storage.get_storage()).
+
+    Returns:
+        dict: {"clips": {clip_id: entry}, "hashes": {sha256: file_name}}
+    """
+    manifest = {"clips": {}, "hashes": {}}
+    text = get_storage(dl_folder).read_text(MANIFEST_FILE)
+    if text is None:
+        return manifest
+
+    for line in text.splitlines():
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            # A killed run may leave a truncated last line
+            continue
+        clip_id = entry.get("clip_id")
+        if clip_id:
+            manifest["clips"][clip_id] = entry
+        if entry.get("sha256"):
+            manifest["hashes"].setdefault(entry["sha256"], entry["file"])
+    return manifest
+
+
+def append_manifest_entry(dl_folder, entry):
+    """Append a single entry to the manifest of a download folder."""
+    get_storage(dl_folder).append_text(MANIFEST_FILE, json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def record_download(dl_folder, manifest, clip_id, file_path, quality=DEFAULT_QUALITY):
+    """
+    Hash a downloaded file and record it in the manifest.
+
+    Args:
+        dl_folder (str): The download folder.
+        manifest (dict): The manifest returned by load_manifest().
+        clip_id (str): The Twitch clip ID.
+        file_path (str): The path of the downloaded file.
+        quality (str): The quality profile of the file.
+
+    Returns:
+        dict: The recorded manifest entry.
+    """
+    stat = os.stat(file_path)
+    file_name = os.path.relpath(file_path, dl_folder).replace(os.sep, "/")
+    return record_entry(dl_folder, manifest, clip_id, file_name, hash_file(file_path), stat.st_size, stat.st_mtime, quality)
+
+
+def record_entry(dl_folder, manifest, clip_id, file_name, sha256, size, mtime=None, quality=DEFAULT_QUALITY):
+    """
+    Record a file that was stored without a local copy, e.g. streamed to object storage.
+
+    Args:
+        dl_folder (str): The download folder or storage target.
+        manifest (dict): The manifest returned by load_manifest().
+        clip_id (str): The Twitch clip ID.
+        file_name (str): The storage key of the file.
+        sha256 (str): The hash calculated while the file was written, or None if unknown.
+        size (int): The file size in bytes.
+        mtime (float, optional): The modification time, defaults to now.
+        quality (str): The quality profile of the file.
+
+    Returns:
+        dict: The recorded manifest entry.
+    """
+    entry = {
+        "clip_id": clip_id,
+        "file": file_name,
+        "sha256": sha256,
+        "size": size,
+        "mtime": mtime if mtime is not None else datetime.now().timestamp(),
+        "quality": quality,
+        "recorded_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    append_manifest_entry(dl_folder, entry)
+    manifest["clips"][clip_id] = entry
+    if sha256:
+        manifest["hashes"].setdefault(sha256, file_name)
+    return entry
+
+
+def find_existing_clip(dl_folder, manifest, clip_id, quality=DEFAULT_QUALITY):
+    """
+    Return the file name of an already downloaded copy of a clip.
+
+    A source quality copy serves every quality, a lower quality copy only the same quality.
+
+    Args:
+        dl_folder (str): The download folder or storage target.
+        manifest (dict): The manifest returned by load_manifest().
+        clip_id (str): The Twitch clip ID.
+        quality (str): The wanted quality profile.
+
+    Returns:
+        str: The file name (storage key) of the existing file, or None if the clip is unknown or its file is gone.
+    """
+    entry = manifest["clips"].get(clip_id)
+    if entry and satisfies(entry.get("quality", DEFAULT_QUALITY), quality) and get_storage(dl_folder).exists(entry["file"]):
+        return entry["file"]
+    return None
+
+
+def find_duplicate_content(dl_folder, manifest, entry):
+    """
+    Return the file name of another file with the same content as a manifest entry.
+
+    Returns:
+        str: The file name (storage key) of the other file, or None if the content is unique.
+    """
+    other_file = manifest["hashes"].get(entry["sha256"])
+    if not other_file or other_file == entry["file"]:
+        return None
+    if get_storage(dl_folder).exists(other_file):
+        return other_file
+    return None
+
+
+def scan_duplicates(dl_folder, reclaim=False, status_callback=None):
+    """
+    Find files with identical content in a download folder and optionally replace them with hard links.
+
+    Files are grouped by size first, so only files with a size collision are hashed.
+
+    Args:
+        dl_folder (str): The download folder to scan (including sub folders).
+        reclaim (bool): Replace duplicates with hard links to the first copy.
+        status_callback (callable, optional): Receives status messages.
+
+    Returns:
+        dict: A dictionary with the scan results or an error message.
+    """
+    if not get_storage(dl_folder).is_local:
+        return {"success": False, "error": "NotSupported", "message": "Duplicate scans only work on local folders."}
+    if not os.path.isdir(dl_folder):
+        return {"success": False, "error": "FolderNotFound", "message": f"Folder '{dl_folder}' does not exist."}
+
+    files_by_size = {}
+    for root, dirs, files in os.walk(dl_folder):
+        dirs[:] = [name for name in dirs if name != LOCK_FOLDER]
+        for name in files:
+            if name == MANIFEST_FILE:
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files_by_size.setdefault(stat.st_size, []).append((path, stat))
+
+    groups = 0
+    reclaimable_bytes = 0
+    reclaimed_bytes = 0
+    for size, candidates in files_by_size.items():
+        if size == 0 or len(candidates) < 2:
+            continue
+
+        # Hard links to the same inode are already deduplicated
+        unique_inodes = {}
+        for path, stat in candidates:
+            unique_inodes.setdefault((stat.st_dev, stat.st_ino), path)
+        if len(unique_inodes) < 2:
+            continue
+
+        files_by_hash = {}
+        for path in unique_inodes.values():
+            try:
+                files_by_hash.setdefault(hash_file(path), []).append(path)
+            except OSError as e:
+                if status_callback:
+                    status_callback(f"Warning: Unable to read {path}. {e}")
+
+        for paths in files_by_hash.values():
+            if len(paths) < 2:
+                continue
+            groups += 1
+            original = paths[0]
+            for duplicate in paths[1:]:
+                reclaimable_bytes += size
+                if reclaim and link_file(original, duplicate):
+                    reclaimed_bytes += size
+                    if status_callback:
+                        status_callback(f"Info: Linked {duplicate} -> {original}")
+
+    return {
+        "success": True,
+        "groups": groups,
+        "reclaimable_bytes": reclaimable_bytes,
+        "reclaimed_bytes": reclaimed_bytes,
+        "message": f"{groups} duplicate groups found, {reclaimed_bytes} of {reclaimable_bytes} bytes reclaimed.",
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find duplicate clips in a download folder.")
+    parser.add_argument("dl_folder", help="The download folder to scan")
+    parser.add_argument("--reclaim", action="store_true", help="Replace duplicates with hard links")
+    args = parser.parse_args()
+
+    result = scan_duplicates(args.dl_folder, reclaim=args.reclaim, status_callback=print)
+    print(result["message"])
@@ -0,0 +1,287 @@
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from functions import download_clips, get_game_name
+from archive_index import index_downloads
+from dedup import load_manifest
+from storage import get_storage
+from jobs import JobControl, JobCancelled
+from postprocess import FinishedDownloads
+import metrics
+
+# Worker process state, set by init_worker()
+_status_queue = None
+_job = None
+_manifests = {}  # Download folder -> (run ID, manifest)
+
+
+def init_worker(status_queue, cancel_event, resume_event):
+    """Initialize a download worker process with the IPC channel and the shared job flags."""
+    global _status_queue, _job
+    _status_queue = status_queue
+    _job = JobControl("download", cancel_event, resume_event)
+
+
+def download_worker(clip, dl_folder, dedup_mode, run_id, postprocess=False):
+    """
+    Download a single clip in a worker process.
+
+    The manifest of a download folder is loaded once per run and reused for
+    all clips of the run the process handles; the pool outlives runs, so a
+    new run ID loads it again with the entries written since.
+
+    Returns:
+        dict: {"state": "done" or "cancelled", "files": [file paths], "postprocess": [(file path, clip ID, quality)],
+            "bytes": downloaded bytes, "failed": True if the download failed,
+            "appended": manifest lines for object storage, written by the parent once per run}
+    """
+    manifest = None
+    if dedup_mode != "off":
+        loaded_run_id, manifest = _manifests.get(dl_folder, (None, None))
+        if loaded_run_id != run_id:
+            manifest = load_manifest(dl_folder)
+            _manifests[dl_folder] = (run_id, manifest)
+    finished = FinishedDownloads() if postprocess else None
+    # The counters of this process tell the parent how much was transferred, for the download limiter
+    downloaded_bytes = metrics.get_counter("download.bytes")
+    failed = metrics.get_counter("download.failed")
+    result = {"state": "done", "files": [], "postprocess": [], "bytes": 0, "failed": False}
+    try:
+        result["files"] = download_clips([clip], dl_folder, _status_queue.put, dedup_mode=dedup_mode, job=_job,
+                                         manifest=manifest, postprocessor=finished, index=False, flush=False)
+    except JobCancelled:
+        result["state"] = "cancelled"
+    # A segment object per clip would make every later manifest load slower
+    result["appended"] = get_storage(dl_folder).take_pending()
+    result["postprocess"] = finished.items if finished else []
+    result["bytes"] = metrics.get_counter("download.bytes") - downloaded_bytes
+    result["failed"] = metrics.get_counter("download.failed") > failed
+    return result
+
+
+class DownloadPool:
+    """
+    Worker processes with their IPC channel, shared by all downloads of this process.
+
+    The status queue and the job flags are passed to the workers once when
+    they start, so a run resets them instead of creating new ones; run_lock
+    makes sure only one run uses them at a time.
+    """
+
+    def __init__(self, processes):
+        self.processes = processes
+        self.status_queue = multiprocessing.Queue()
+        self.cancel_event = multiprocessing.Event()
+        self.resume_event = multiprocessing.Event()
+        self.resume_event.set()
+        self.run_lock = threading.Lock()
+        self.runs = 0
+        self.executor = ProcessPoolExecutor(max_workers=processes, initializer=init_worker,
+                                            initargs=(self.status_queue, self.cancel_event, self.resume_event))
+
+    def shutdown(self):
+        self.cancel_event.set()
+        self.resume_event.set()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_download_pool(processes):
+    """
+    Return the process-wide download pool, created on first use.
+
+    GUI and job API downloads reuse its worker processes (and the manifests
+    they have loaded). A changed number of processes replaces the pool once
+    no run is using it.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.processes != processes:
+            with _pool.run_lock:
+                _pool.shutdown()
+            _pool = None
+        if _pool is None:
+            _pool = DownloadPool(processes)
+        return _pool
+
+
+def shutdown_download_pool():
+    """Stop the worker processes, e.g. when the app closes."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def discard_download_pool(pool):
+    """Drop a pool whose worker process died, the next run starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def download_clips_in_processes(clips, dl_folder, status_callback, processes, dedup_mode="link", job=None, postprocessor=None,
+                                limiter=None):
+    """
+    Download clips in the shared pool of worker processes (see get_download_pool()).
+
+    yt-dlp extraction and post-processing run outside the calling process, so
+    they neither hold its GIL nor stall the Qt event loop. Status messages
+    travel back through a multiprocessing queue and are passed to
+    status_callback in the calling thread. The downloaded clips are added to
+    the archive index here, not in the workers: spawned workers have neither
+    the config nor the game name cache. Pausing and cancelling the job is
+    mirrored to the workers through shared events. A clip is only handed to
+    the pool when a worker is free, so a DownloadQueue can still be
+    reprioritized while the pool runs.
+
+    Args:
+        clips (list or DownloadQueue): The clips to download.
+        dl_folder (str): The download folder.
+        status_callback (callable): Receives status messages.
+        processes (int): Number of worker processes.
+        dedup_mode (str): See download_clips().
+        job (JobControl, optional): The job controlling this download.
+        postprocessor (PostProcessor, optional): Receives every newly downloaded clip; the caller closes it.
+        limiter (AimdLimiter, optional): Tunes how many of the processes download at once, by
+            throughput and failed downloads (see autotune.create_download_limiter()).
+
+    Returns:
+        list: The paths of the downloaded clips in the order they finished.
+
+    Raises:
+        JobCancelled: If the job was cancelled.
+    """
+    pool = get_download_pool(processes)
+    with pool.run_lock:
+        return run_in_pool(pool, clips, dl_folder, status_callback, dedup_mode, job, postprocessor, limiter)
+
+
+def run_in_pool(pool, clips, dl_folder, status_callback, dedup_mode, job, postprocessor, limiter):
+    """Download clips with a pool that is locked for this run, see download_clips_in_processes()."""
+    status_queue = pool.status_queue
+    cancel_event = pool.cancel_event
+    resume_event = pool.resume_event
+    processes = pool.processes
+    executor = pool.executor
+    pool.runs += 1
+    run_id = pool.runs
+
+    def drain_status_queue(timeout):
+        try:
+            message = status_queue.get(timeout=timeout)
+            while True:
+                if status_callback:
+                    status_callback(message)
+                message = status_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    # Flags and messages left over from a cancelled run belong to that run
+    cancel_event.clear()
+    resume_event.set()
+    try:
+        while True:
+            status_queue.get_nowait()
+    except queue.Empty:
+        pass
+
+    storage = get_storage(dl_folder)
+    downloaded_clips = []
+    indexed_clips = []  # (clip, file path) pairs for the archive index
+    # The manifest entries of remuxed clips are appended by the post-processor of this process
+    postprocess_manifest = {"clips": {}, "hashes": {}} if dedup_mode != "off" else None
+    clip_iterator = iter(clips)
+    pending = {}  # future -> start time
+    clips_by_future = {}
+    exhausted = False
+
+    def submit_next():
+        clip = next(clip_iterator, None)
+        if clip is None:
+            return None
+        future = executor.submit(download_worker, clip, dl_folder, dedup_mode, run_id, postprocessor is not None)
+        clips_by_future[future] = clip
+        return future
+
+    def fill_slots():
+        nonlocal exhausted
+        slots = limiter.limit if limiter else processes
+        while not exhausted and not cancel_event.is_set() and len(pending) < slots:
+            future = submit_next()
+            if future is None:
+                exhausted = True
+                break
+            pending[future] = time.monotonic()
+
+    try:
+        fill_slots()
+        while pending:
+            # Mirror the state of the GUI job to the worker processes
+            if job and job.is_cancelled():
+                cancel_event.set()
+                resume_event.set()
+                for future in pending:
+                    future.cancel()
+            elif job and job.is_paused():
+                resume_event.clear()
+            else:
+                resume_event.set()
+
+            done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                started = pending.pop(future)
+                clip = clips_by_future.pop(future)
+                if future.cancelled():
+                    continue
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    discard_download_pool(pool)
+                    raise
+                for key, text in result["appended"].items():
+                    storage.append_text(key, text)
+                if result["state"] == "done":
+                    downloaded_clips.extend(result["files"])
+                    indexed_clips.extend((clip, file_path) for file_path in result["files"])
+                for file_path, clip_id, quality in result["postprocess"]:
+                    postprocessor.submit(file_path, clip_id, quality, postprocess_manifest)
+                # Clips that already existed say nothing about the connection
+                if limiter and result["state"] == "done" and (result["bytes"] or result["failed"]):
+                    limiter.record(time.monotonic() - started, units=result["bytes"], error=result["failed"])
+            fill_slots()
+            drain_status_queue(0)
+            if postprocessor:
+                postprocessor.collect()
+    finally:
+        if pending:
+            # Failed run: stop its clips before the next run gets the pool
+            cancel_event.set()
+            resume_event.set()
+            for future in pending:
+                future.cancel()
+            wait(pending)
+            # Clips that finished anyway are on the disk or bucket, keep their manifest lines
+            for future in pending:
+                if not future.cancelled() and future.exception() is None:
+                    for key, text in future.result()["appended"].items():
+                        storage.append_text(key, text)
+        # The manifest lines of all workers as one segment (object storage)
+        storage.flush()
+        # Make the clips of this run searchable, also when it was cancelled
+        with metrics.span("download.index"):
+            index_downloads(indexed_clips, get_game_name, status_callback)
+
+    drain_status_queue(0.1)
+    if job and job.is_cancelled():
+        raise JobCancelled("Download cancelled.")
+    return downloaded_clips
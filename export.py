@@ -0,0 +1,121 @@
+import os
+import csv
+import json
+
+# Available export formats (file extension == format name)
+EXPORT_FORMATS = ("jsonl", "csv", "parquet")
+# Clip fields written to the export, in column order
+EXPORT_COLUMNS = (
+    "id", "url", "broadcaster_id", "broadcaster_name", "creator_id", "creator_name",
+    "video_id", "game_id", "language", "title", "view_count", "created_at",
+    "duration", "vod_offset", "is_featured", "thumbnail_url"
+)
+# Rows buffered before a Parquet row group is written
+PARQUET_ROW_GROUP_SIZE = 5000
+
+
+class JsonlExporter:
+    """Write one JSON object per clip and line."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.rows = 0
+        self.file = open(file_path, "w", encoding="utf-8")
+
+    def write_clips(self, clips):
+        for clip in clips:
+            row = {column: clip.get(column) for column in EXPORT_COLUMNS}
+            self.file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.rows += len(clips)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class CsvExporter:
+    """Write clips as CSV rows with a header line."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.rows = 0
+        self.file = open(file_path, "w", encoding="utf-8", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write_clips(self, clips):
+        self.writer.writerows(clips)
+        self.rows += len(clips)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetExporter:
+    """Write clips as a columnar Parquet file in row groups (requires pyarrow)."""
+
+    def __init__(self, file_path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.file_path = file_path
+        self.rows = 0
+        self.schema = pa.schema([
+            (column, pa.int64() if column in ("view_count", "vod_offset")
+             else pa.float64() if column == "duration"
+             else pa.bool_() if column == "is_featured"
+             else pa.string())
+            for column in EXPORT_COLUMNS
+        ])
+        self.writer = pq.ParquetWriter(file_path, self.schema, compression="zstd")
+        self.buffer = {column: [] for column in EXPORT_COLUMNS}
+        self.buffered_rows = 0
+
+    def write_clips(self, clips):
+        for clip in clips:
+            for column in EXPORT_COLUMNS:
+                self.buffer[column].append(clip.get(column))
+        self.buffered_rows += len(clips)
+        self.rows += len(clips)
+        if self.buffered_rows >= PARQUET_ROW_GROUP_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.buffered_rows:
+            return
+        table = self.pa.Table.from_pydict(self.buffer, schema=self.schema)
+        self.writer.write_table(table)
+        self.buffer = {column: [] for column in EXPORT_COLUMNS}
+        self.buffered_rows = 0
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def open_exporter(file_path, export_format=None):
+    """
+    Create an exporter that writes clip metadata incrementally.
+
+    Args:
+        file_path (str): The export file.
+        export_format (str, optional): One of EXPORT_FORMATS. Defaults to the file extension.
+
+    Returns:
+        dict: {"exporter": exporter} or an error message.
+    """
+    export_format = export_format or os.path.splitext(file_path)[1].lstrip(".").lower()
+    try:
+        if export_format == "jsonl":
+            return {"exporter": JsonlExporter(file_path)}
+        if export_format == "csv":
+            return {"exporter": CsvExporter(file_path)}
+        if export_format == "parquet":
+            return {"exporter": ParquetExporter(file_path)}
+    except ImportError:
+        return {"error": "MISSING_DEPENDENCY", "message": "Parquet export requires pyarrow. Install it using: pip install pyarrow"}
+    except OSError as e:
+        return {"error": "EXPORT_FAILED", "message": f"Unable to create export file {file_path}. {e}"}
+    return {"error": "UNKNOWN_FORMAT", "message": f"Unknown export format '{export_format}'."}
@@ -36,7 +36,25 @@ import argparse
 from datetime import datetime, timedelta
 import subprocess
 import shutil
+import hashlib
+import time
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from PySide6.QtCore import QObject
+from clip_store import Clip
+from clip_filter import TopClips
+import metrics
+from jobs import JobCancelled
+from time_range import to_rfc3339, split_range
+from response_cache import get_cache_path, read_cached_pages, CacheWriter
+from dedup import load_manifest, record_download, record_entry, find_existing_clip, find_duplicate_content
+from storage import get_storage
+from quality import parse_quality, get_format_options, get_quality_filename, get_source_filename, get_bytes_per_second, is_source
+from verify import check_container
+from archive_index import index_downloads
+from autotune import create_crawl_limiter, DEFAULT_CRAWL_CONCURRENCY
+from locks import ClipLock, ClipLocked, WAIT_INTERVAL
 
 # Default values
 CONFIG_FILE = "config.json"
@@ -51,8 +69,15 @@ file_name_schema = {
     "Title": "{clip_title}",
     "Creator": "{clip_creator}",
     "Broadcaster": "{broadcaster_name}",
-    " \u00a6 ": " \u00a6 "
+    "Year": "{clip_year}",
+    "Month": "{clip_month}",
+    " \u00a6 ": " \u00a6 ",
+    "Folder /": "/"
 }
+# Extra free space required on top of the estimate
+FREE_SPACE_MARGIN = 0.1
+# Bytes read per chunk when streaming a clip to object storage
+STREAM_CHUNK_SIZE = 1024 * 1024
 
 # Twitch API URLs
 USER_API_URL = "https://api.twitch.tv/helix/users"
@@ -60,6 +85,12 @@ CLIPS_API_URL = "https://api.twitch.tv/helix/clips"
 GAME_API_URL = "https://api.twitch.tv/helix/games"
 VALIDATE_TOKEN_URL = "https://id.twitch.tv/oauth2/validate"
 TOKEN_URL = "https://id.twitch.tv/oauth2/token"
+# Connect and read timeout for Helix requests, bounds how long a cancelled job may hang
+REQUEST_TIMEOUT = (5, 30)
+# Retries of throttled (429) or failed Helix page requests, with exponential backoff
+MAX_PAGE_RETRIES = 3
+RETRY_BACKOFF = 2
+MAX_RETRY_DELAY = 60
 
 def load_config():
     """Load configuration from config.json if it exists."""
@@ -161,7 +192,20 @@ def get_user_config():
     return {
         "default_user_name": user_config.get("default_user_name"),
         "spacer": user_config.get("spacer", "{clip_date} \u00a6 {game_name} \u00a6 {clip_title} \u00a6 {clip_creator}"),
-        "dl_folder": user_config.get("dl_folder")
+        "dl_folder": user_config.get("dl_folder"),
+        "dedup_mode": user_config.get("dedup_mode", "link"),
+        "thumbnail_cache_mb": user_config.get("thumbnail_cache_mb", 200),
+        "download_processes": user_config.get("download_processes", 0),
+        "vod_context_seconds": user_config.get("vod_context_seconds", 0),
+        "quality": user_config.get("quality", "source"),
+        "quality_by_broadcaster": user_config.get("quality_by_broadcaster", {}),
+        "api_port": user_config.get("api_port", 0),
+        "api_token": user_config.get("api_token", ""),
+        "postprocess": user_config.get("postprocess", "off"),
+        "postprocess_processes": user_config.get("postprocess_processes", 0),
+        "crawl_concurrency_min": user_config.get("crawl_concurrency_min", 1),
+        "crawl_concurrency_max": user_config.get("crawl_concurrency_max", 4),
+        "download_concurrency_min": user_config.get("download_concurrency_min", 1)
     }
 
 def get_auth_config():
@@ -189,7 +233,9 @@ def get_broadcaster_id(user_name):
     params = {"login": user_name}
     
     try:
-        response = requests.get(USER_API_URL, headers=headers, params=params)
+        with metrics.span("helix.users"):
+            response = requests.get(USER_API_URL, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
+        metrics.record_response("helix.users", response)
         response.raise_for_status()
         data = response.json()
         
@@ -200,54 +246,281 @@ def get_broadcaster_id(user_name):
     except requests.exceptions.RequestException as e:
         return {"error": "REQUEST_FAILED", "message": f"Failed to fetch broadcaster ID for user '{user_name}'. {e}"}
 
-def get_clips(broadcaster_id, start_timestamp, end_timestamp):
-    """Fetch clips from the Twitch API."""
+def get_clips_by_id(clip_ids):
+    """
+    Fetch clips by their IDs (or clip URLs).
+
+    Args:
+        clip_ids (list): Clip IDs or URLs like "https://clips.twitch.tv/<id>".
+
+    Returns:
+        dict: {"clips": [Clip, ...]} in the order of clip_ids (unknown clips are left out) or an error message.
+    """
+    auth_config = get_auth_config()
+    headers = {"Client-ID": auth_config["client_id"], "Authorization": f"Bearer {auth_config['access_token']}"}
+    ids = [clip_id.rstrip("/").rsplit("/", 1)[-1].split("?")[0] for clip_id in clip_ids]
+    clips_by_id = {}
+    try:
+        # Helix accepts up to 100 IDs per request
+        for index in range(0, len(ids), 100):
+            with metrics.span("helix.clips.by_id"):
+                response = requests.get(CLIPS_API_URL, headers=headers, params={"id": ids[index:index + 100]}, timeout=REQUEST_TIMEOUT)
+            metrics.record_response("helix.clips", response)
+            response.raise_for_status()
+            for clip in response.json().get("data", []):
+                clips_by_id[clip["id"]] = Clip.from_helix(clip)
+    except requests.exceptions.RequestException as e:
+        return {"error": "REQUEST_FAILED", "message": f"Error: Failed to fetch clips. {e}"}
+    return {"clips": [clips_by_id[clip_id] for clip_id in dict.fromkeys(ids) if clip_id in clips_by_id]}
+
+# Concurrency limit of the clip requests of all searches of this process, see get_crawl_limiter()
+crawl_limiter = None
+crawl_limiter_lock = threading.Lock()
+
+def get_crawl_limiter(status_callback=None):
+    """
+    Return the crawl limiter shared by all searches of this process.
+
+    GUI, job API and leaderboard searches take their request slots from the
+    same limit, so the tuning carries over from one search to the next and a
+    429 seen by one search slows down all of them. The bounds follow the
+    settings. Status messages go to the first status_callback passed in
+    (the window's status bar in the GUI), all changes are printed.
+
+    Returns:
+        AimdLimiter: The limiter, or None if the settings allow a single request only.
+    """
+    global crawl_limiter
+    user_config = get_user_config()
+    minimum = user_config.get("crawl_concurrency_min", DEFAULT_CRAWL_CONCURRENCY[0])
+    maximum = user_config.get("crawl_concurrency_max", DEFAULT_CRAWL_CONCURRENCY[1])
+    if maximum <= 1:
+        return None
+    with crawl_limiter_lock:
+        if crawl_limiter is None:
+            crawl_limiter = create_crawl_limiter(user_config, status_callback)
+        else:
+            crawl_limiter.set_bounds(minimum, maximum)
+            if crawl_limiter.status_callback is None:
+                crawl_limiter.status_callback = status_callback
+        return crawl_limiter
+
+def get_clips(broadcaster_id, start_timestamp, end_timestamp, page_callback=None, collect=True, clip_filter=None,
+              page_sizes=(2, 99, 50), job=None, use_cache=True, limiter=None, errors=None):
+    """
+    Fetch clips from the Twitch API.
+
+    Args:
+        broadcaster_id (str): The broadcaster ID.
+        start_timestamp (datetime or str): Start of the time window. Aware datetimes are
+            converted to UTC; naive datetimes and ISO 8601 strings without offset are UTC.
+        end_timestamp (datetime or str): End of the time window, see start_timestamp.
+        page_callback (callable, optional): Receives the list of new clips of every page as it arrives.
+        collect (bool): Keep the clips in memory. Set to False when only page_callback consumes them.
+        clip_filter (ClipFilter, optional): Drops non-matching clips of every page before they are
+            passed to page_callback or kept. With a top_n limit, page_callback receives the N most
+            viewed clips once after the search (sorted by creation date) instead of every page.
+        page_sizes (tuple): The API is queried once per page size; the passes complement each
+            other because Helix skips clips on some pages. Short windows can use a single pass.
+        job (JobControl, optional): Checked before every page; raises JobCancelled when cancelled.
+        use_cache (bool): Replay the unfiltered result of an identical earlier search from the
+            response cache. Windows in the past are cached forever, windows reaching up to
+            now for a few minutes.
+        limiter (AimdLimiter, optional): Crawl parts of the window concurrently, as many at
+            once as the limiter allows (see get_crawl_limiter()). Without it the
+            pages are requested one after another.
+        errors (list, optional): Receives the exception of every window whose pages could not all be
+            fetched (after the retries). The clips are incomplete if it is not empty.
+
+    Returns:
+        list: Compact Clip records sorted by creation date (empty if collect is False).
+    """
     auth_config = get_auth_config()
     headers = {"Client-ID": auth_config["client_id"], "Authorization": f"Bearer {auth_config['access_token']}"}
     clips = []
     seen_clip_ids = set()
+    top_clips = TopClips(clip_filter.top_n) if collect and clip_filter and clip_filter.top_n else None
+    # Helix data of the top clips for page_callback, the ranking is only final after the last page
+    callback_top_clips = TopClips(clip_filter.top_n) if page_callback and clip_filter and clip_filter.top_n else None
+    fetch_errors = []
+    page_lock = threading.Lock()  # Pages of concurrent requests are handled one at a time
+
+    # Convert timestamps to RFC 3339 UTC format
+    start_timestamp = to_rfc3339(start_timestamp)
+    end_timestamp = to_rfc3339(end_timestamp)
+
+    def handle_page(new_clips):
+        if clip_filter:
+            new_clips = clip_filter.filter_page(new_clips)
+        metrics.count("helix.clips.kept", len(new_clips))
+        # Callbacks receive the full Helix data, memory only keeps compact records
+        if callback_top_clips is not None:
+            callback_top_clips.extend(new_clips)
+        elif page_callback and new_clips:
+            page_callback(new_clips)
+        if top_clips is not None:
+            top_clips.extend(Clip.from_helix(clip) for clip in new_clips)
+        elif collect:
+            clips.extend(Clip.from_helix(clip) for clip in new_clips)
 
-    # Convert timestamps to ISO 8601 format
-    start_timestamp = datetime.fromisoformat(start_timestamp).isoformat() + 'Z'
-    end_timestamp = datetime.fromisoformat(end_timestamp).isoformat() + 'Z'
+    def request_page(params):
+        """Request a page of clips, throttled and failed requests are retried with backoff."""
+        for attempt in range(MAX_PAGE_RETRIES + 1):
+            if job:
+                job.check()
+            latency = None
+            retry_after = None
+            try:
+                with limiter.slot(job) if limiter else nullcontext():
+                    # Timed inside the slot, the wait for a slot says nothing about the server
+                    started = time.monotonic()
+                    with metrics.span("helix.clips.page"):
+                        response = requests.get(CLIPS_API_URL, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
+                    latency = time.monotonic() - started
+                metrics.record_response("helix.clips", response)
+                throttled = response.status_code == 429
+                if not throttled and response.status_code < 500:
+                    response.raise_for_status()
+                    if limiter:
+                        limiter.record(latency, units=1)
+                    return response.json()
+                error = requests.exceptions.HTTPError(f"{response.status_code} Error: {response.reason}", response=response)
+                reset = response.headers.get("Ratelimit-Reset")
+                if throttled and reset and reset.isdigit():
+                    retry_after = min(max(int(reset) - time.time(), 0), MAX_RETRY_DELAY)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                throttled = False
+                error = e
+            if limiter:
+                limiter.record(latency or 0.0, error=not throttled, throttled=throttled)
+            if attempt == MAX_PAGE_RETRIES:
+                raise error
+            delay = retry_after if retry_after is not None else RETRY_BACKOFF * 2 ** attempt
+            print(f"Warning: Helix request failed ({error}), retrying in {delay:.0f} s.")
+            if job:
+                job.cancel_event.wait(delay)
+            else:
+                time.sleep(delay)
 
-    def fetch_clips(limit):
+    def fetch_clips(limit, window):
         params = {
             "broadcaster_id": broadcaster_id,
             "first": limit,
-            "started_at": start_timestamp,
-            "ended_at": end_timestamp,
+            "started_at": window[0],
+            "ended_at": window[1],
         }
         cursor = None
         while True:
             try:
                 if cursor:
                     params["after"] = cursor
-                response = requests.get(CLIPS_API_URL, headers=headers, params=params)
-                response.raise_for_status()
-                
-                data = response.json()
+                data = request_page(params)
+            except requests.exceptions.RequestException as e:
+                fetch_errors.append(e)
+                print(f"Error: Failed to fetch clips. {e}")
+                return
+
+            with page_lock:
+                new_clips = []
                 for clip in data.get("data", []):
                     if clip["id"] not in seen_clip_ids:
-                        clips.append(clip)
+                        new_clips.append(clip)
                         seen_clip_ids.add(clip["id"])
-                cursor = data.get("pagination", {}).get("cursor")
-                
-                if not cursor:
-                    break
-            except requests.exceptions.RequestException as e:
-                return {"error": "REQUEST_FAILED", "message": f"Error: Failed to fetch clips. {e}"}
+                metrics.count("helix.clips.received", len(data.get("data", [])))
+                if cache_writer:
+                    cache_writer.write_clips(new_clips)
+                handle_page(new_clips)
+            cursor = data.get("pagination", {}).get("cursor")
+
+            if not cursor:
                 break
 
-    # Fetch clips with different limits
-    fetch_clips(2)
-    fetch_clips(99)
-    fetch_clips(50)
+    cache_path = get_cache_path(broadcaster_id, start_timestamp, end_timestamp, page_sizes)
+    cached_pages = read_cached_pages(cache_path) if use_cache else None
+    cache_writer = None
 
-    clips.sort(key=lambda x: x["created_at"])
+    if cached_pages is not None:
+        metrics.cache_hit("helix_cache")
+        for page in cached_pages:
+            if job:
+                job.check()
+            handle_page(page)
+    else:
+        if use_cache:
+            metrics.cache_miss("helix_cache")
+            cache_writer = CacheWriter(cache_path, end_timestamp)
+        try:
+            # Fetch clips with different limits
+            if limiter:
+                # Parts of the window are crawled concurrently, the limiter decides how many at once
+                windows = split_range(start_timestamp, end_timestamp, limiter.maximum * 2)
+                tasks = [(page_size, window) for page_size in page_sizes for window in windows]
+                with ThreadPoolExecutor(max_workers=limiter.maximum, thread_name_prefix="crawl") as executor:
+                    for _ in executor.map(lambda task: fetch_clips(*task), tasks):
+                        pass
+            else:
+                for page_size in page_sizes:
+                    fetch_clips(page_size, (start_timestamp, end_timestamp))
+        except BaseException:
+            if cache_writer:
+                cache_writer.abort()
+            raise
+        if cache_writer:
+            # Incomplete results must not be replayed later
+            if fetch_errors:
+                cache_writer.abort()
+            else:
+                cache_writer.commit()
+
+    if errors is not None:
+        errors.extend(fetch_errors)
+    if callback_top_clips is not None and len(callback_top_clips):
+        page_callback(sorted(callback_top_clips.clips(), key=lambda clip: clip.get("created_at", "")))
+    if top_clips is not None and collect:
+        clips = top_clips.clips()
+    clips.sort(key=lambda x: x.created_at)
     #print(f"Info: {clips}")
     return clips
 
+def get_game_ids(game_names):
+    """
+    Resolve game names to game IDs. Entries that are already numeric IDs are kept as they are.
+
+    Args:
+        game_names (list): Game names and/or game IDs.
+
+    Returns:
+        dict: {"ids": [...]} or an error message if a game could not be found.
+    """
+    game_ids = [name for name in game_names if name.isdigit()]
+    names = [name for name in game_names if not name.isdigit()]
+    if not names:
+        return {"ids": game_ids}
+
+    auth_config = get_auth_config()
+    headers = {"Client-ID": auth_config["client_id"], "Authorization": f"Bearer {auth_config['access_token']}"}
+    params = [("name", name) for name in names]
+
+    try:
+        with metrics.span("helix.games"):
+            response = requests.get(GAME_API_URL, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
+        metrics.record_response("helix.games", response)
+        response.raise_for_status()
+        data = response.json()
+    except requests.exceptions.RequestException as e:
+        return {"error": "REQUEST_FAILED", "message": f"Error: Failed to fetch game IDs for {', '.join(names)}. {e}"}
+
+    found = {}
+    for game in data.get("data", []):
+        game_cache[game["id"]] = game["name"]  # Resolved names are cache hits later on
+        found[game["name"].lower()] = game["id"]
+
+    missing = [name for name in names if name.lower() not in found]
+    if missing:
+        return {"error": "GAME_NOT_FOUND", "message": f"Game(s) not found: {', '.join(missing)}"}
+
+    return {"ids": game_ids + list(found.values())}
+
 def get_game_name(game_id):
     """
     Fetch the name of a game based on its game_id, with in-memory caching.
@@ -260,7 +533,9 @@ def get_game_name(game_id):
     """
     # Check the cache first
     if game_id in game_cache:
+        metrics.cache_hit("game_cache")
         return game_cache[game_id]
+    metrics.cache_miss("game_cache")
 
     # If not in cache, fetch from API
     auth_config = get_auth_config()
@@ -268,7 +543,9 @@ def get_game_name(game_id):
     params = {"id": game_id}
 
     try:
-        response = requests.get(GAME_API_URL, headers=headers, params=params)
+        with metrics.span("helix.games"):
+            response = requests.get(GAME_API_URL, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
+        metrics.record_response("helix.games", response)
         response.raise_for_status()
         data = response.json()
         if "data" in data and len(data["data"]) > 0:
@@ -280,55 +557,438 @@ def get_game_name(game_id):
     
     return "Unknown"
 
-def download_clips(clips, dl_folder, status_callback):
-    """Download clips using yt-dlp and format file names as specified."""
-    downloaded_clips = []  # List to store paths of downloaded clips
+def build_clip_filename(clip, spacer_template):
+    """
+    Build the file name of a clip from the file name schema.
+
+    A "/" in the schema creates sub folders, e.g. "{broadcaster_name}/{clip_year}/{clip_month}/{clip_title}"
+    shards a large archive by broadcaster, year and month.
+
+    Args:
+        clip (Clip): The clip.
+        spacer_template (str): The file name schema, e.g. "{clip_date} - {game_name} - {clip_title}".
+
+    Returns:
+        str: The file name (relative path) including the ".mp4" extension.
+    """
+    broadcaster_name = re.sub(r"[<>:\"/\\|?*.'’‘]", "", clip.get("broadcaster_name", "unknown")).strip()
+    clip_title = re.sub(r"[<>:\"/\\|?*.'’‘]", "", clip.get("title", "untitled")).strip()
+    clip_creator = re.sub(r"[<>:\"/\\|?*.'’‘]", "", clip.get("creator_name", "unknown")).strip()
+    clip_date = clip.get("created_at", "").split("T")[0]
+    game_id = clip.get("game_id", "0")
+    game_name = re.sub(r"[<>:\"/\\|?*.'’‘]", "", get_game_name(game_id)).strip()
+
+    file_name = spacer_template.format(
+        clip_date=clip_date,
+        clip_year=clip_date[:4],
+        clip_month=clip_date[5:7],
+        game_name=game_name,
+        clip_title=clip_title,
+        clip_creator=clip_creator,
+        broadcaster_name=broadcaster_name
+    )
+    # Keep every folder level non-empty and relative to the download folder
+    parts = [part.strip() for part in re.split(r"[/\\]", file_name)]
+    file_name = "/".join(part for part in parts if part)
+    return file_name + ".mp4"
+
+def estimate_download_size(clips, dl_folder, bytes_per_second=None):
+    """
+    Estimate the bytes still needed to download clips, based on their durations and quality profiles.
+
+    Clips whose file already exists are not counted.
 
+    Args:
+        bytes_per_second (int, optional): Fixed rate for all clips instead of the rate of their quality.
+
+    Returns:
+        int: The estimated number of bytes.
+    """
+    storage = get_storage(dl_folder)
+    total = 0
     for clip in clips:
+        profile = parse_quality(clip.get("quality", "source"))
+        filename = get_quality_filename(clip.get("filename", "unknown").strip(), profile)
+        if not storage.exists(filename):
+            total += int(clip.get("duration", 0.0) * (bytes_per_second or get_bytes_per_second(profile)))
+    return total
+
+def preflight_check(clips, dl_folder):
+    """
+    Check that the download folder has enough free space for clips before a run starts.
+
+    Returns:
+        dict: The estimate and free space, or an error message if the space is insufficient.
+    """
+    with metrics.span("download.preflight"):
         try:
-            filename = clip.get("filename", "unknown").strip()
-            clip_url = clip.get("url")
+            required_bytes = estimate_download_size(clips, dl_folder)
+            free_bytes = get_storage(dl_folder).free_space()
+        except Exception as e:
+            return {"error": "FOLDER_ERROR", "message": f"Error: Unable to access download folder {dl_folder}. {e}"}
 
-            if not clip_url:
-                if status_callback:
-                    status_callback(f"Warning: Skipping clip with missing URL: {clip}")
-                print(f"Warning: Skipping clip with missing data: {clip}")
-                continue
+    required_mb = required_bytes / 1024 / 1024
+    if free_bytes is None:
+        # Object storage, not limited by the local disk
+        return {
+            "success": True,
+            "message": f"Info: About {required_mb:.0f} MB to upload to {dl_folder}.",
+            "required_bytes": required_bytes,
+            "free_bytes": None
+        }
+    free_mb = free_bytes / 1024 / 1024
+    if required_bytes * (1 + FREE_SPACE_MARGIN) > free_bytes:
+        return {
+            "error": "INSUFFICIENT_SPACE",
+            "message": f"Error: Not enough disk space. About {required_mb:.0f} MB needed, {free_mb:.0f} MB free.",
+            "required_bytes": required_bytes,
+            "free_bytes": free_bytes
+        }
+    return {
+        "success": True,
+        "message": f"Info: About {required_mb:.0f} MB to download, {free_mb:.0f} MB free.",
+        "required_bytes": required_bytes,
+        "free_bytes": free_bytes
+    }
+
+def remove_partial_download(file_path):
+    """Remove the output of an aborted yt-dlp download."""
+    if not file_path:
+        return
+    for partial_path in (file_path, file_path + ".part"):
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
 
-            # Define the download-path + file name
-            file_path = os.path.join(dl_folder, filename)
-            print(f"File path: {file_path}")
+def stream_clip(clip_url, storage, key, job=None, profile=None):
+    """
+    Stream a clip straight into a storage backend without a local copy.
 
-            # Skip download if file already exists
-            if os.path.exists(file_path):
-                if status_callback:
-                    status_callback(f"Info: Skipping download, file already exists: {filename}")
-                print(f"Info: Skipping download, file already exists: {filename}")
-                downloaded_clips.append(file_path)
-                continue
+    yt-dlp only resolves the media URL of the clip (in the format of the
+    quality profile), the bytes are read in chunks and written to the upload
+    while they are hashed.
+
+    Returns:
+        tuple: (sha256 hex digest, size in bytes)
+    """
+    ydl_opts = {"quiet": True}
+    if profile:
+        if profile["audio_only"]:
+            raise ValueError("Audio-only downloads need ffmpeg and a local download folder.")
+        ydl_opts.update(get_format_options(profile))
+    with YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(clip_url, download=False)
+    media_url = info.get("url")
+    if not media_url:
+        raise ValueError("No direct media URL found for clip.")
+
+    sha256 = hashlib.sha256()
+    size = 0
+    upload = storage.open_upload(key)
+    try:
+        with requests.get(media_url, headers=info.get("http_headers", {}), stream=True, timeout=REQUEST_TIMEOUT) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                if job:
+                    job.check()
+                upload.write(chunk)
+                sha256.update(chunk)
+                size += len(chunk)
+        upload.commit()
+    except BaseException:
+        upload.abort()
+        raise
+    return sha256.hexdigest(), size
+
+def remove_preview(storage, preview_entry, filename):
+    """Remove the lower quality copy of a clip after it was upgraded to source quality."""
+    if not preview_entry or preview_entry.get("quality", "source") == "source" or preview_entry["file"] == filename:
+        return
+    try:
+        storage.remove(preview_entry["file"])
+        print(f"Info: Upgraded {preview_entry['file']} to {filename}")
+    except Exception as e:
+        print(f"Warning: Unable to remove preview {preview_entry['file']}. {e}")
+
+def download_clip(clip, dl_folder, storage, status_callback, dedup_mode, job, manifest, postprocessor=None):
+    """
+    Download a single clip for download_clips().
+
+    Returns:
+        str: The path of the downloaded (or already existing) clip, or None if it failed.
+
+    Raises:
+        ClipLocked: If another instance sharing the download folder is downloading the clip.
+    """
+    def progress_hook(progress):
+        job.check()
+
+    file_path = None
+    clip_url = None
+    clip_lock = None
+    try:
+        quality = clip.get("quality", "source")
+        profile = parse_quality(quality)
+        filename = get_quality_filename(clip.get("filename", "unknown").strip(), profile)
+        clip_url = clip.get("url")
+        clip_id = clip.get("id")
 
-            print(f"Downloading clip: {filename}")
+        if not clip_url:
             if status_callback:
-                status_callback(f"Downloading clip: {filename}")
+                status_callback(f"Warning: Skipping clip with missing URL: {clip}")
+            print(f"Warning: Skipping clip with missing data: {clip}")
+            return None
+
+        # Claim the clip before looking at its file, so instances sharing the folder do not download it twice
+        if storage.is_local and clip_id:
+            clip_lock = ClipLock(dl_folder, f"{clip_id}.{quality}")
+            clip_lock.acquire()
+
+        # Define the download-path + file name
+        file_path = storage.path(filename)
+        print(f"File path: {file_path}")
 
-            # Options for yt-dlp
-            ydl_opts = {
-                "outtmpl": file_path,  # File name template
-                "quiet": True,         # Minimal output
-            }
+        # A file cut off by a killed download is downloaded again instead of skipped
+        if storage.is_local and storage.exists(filename):
+            reason = check_container(file_path)
+            if reason:
+                print(f"Warning: Replacing incomplete file {filename}: {reason}")
+                os.remove(file_path)
+
+        # Skip download if file already exists
+        if storage.exists(filename):
+            if status_callback:
+                status_callback(f"Info: Skipping download, file already exists: {filename}")
+            print(f"Info: Skipping download, file already exists: {filename}")
+            if manifest is not None and clip_id and clip_id not in manifest["clips"]:
+                with metrics.span("download.record"):
+                    if storage.is_local:
+                        record_download(dl_folder, manifest, clip_id, file_path, quality)
+                    else:
+                        # Hashing would mean downloading the object again
+                        record_entry(dl_folder, manifest, clip_id, filename, None, storage.size(filename), quality=quality)
+            metrics.count("download.skipped")
+            return file_path
 
+        # Reuse an earlier download of the same clip stored under another file name
+        existing_file = find_existing_clip(dl_folder, manifest, clip_id, quality) if manifest is not None and clip_id else None
+        if existing_file:
+            if dedup_mode == "link" and storage.copy(existing_file, filename):
+                if status_callback:
+                    status_callback(f"Info: Linked duplicate clip: {filename}")
+                print(f"Info: Linked duplicate clip {existing_file} -> {filename}")
+                metrics.count("download.linked")
+                return file_path
+            if status_callback:
+                status_callback(f"Info: Skipping download, clip already exists: {os.path.basename(existing_file)}")
+            print(f"Info: Skipping download, clip already exists: {existing_file}")
+            metrics.count("download.skipped")
+            return storage.path(existing_file)
+
+        print(f"Downloading clip: {filename}")
+        if status_callback:
+            status_callback(f"Downloading clip: {filename}")
+
+        # A lower quality preview of the clip, replaced by a source quality download
+        preview_entry = manifest["clips"].get(clip_id) if manifest is not None and clip_id and is_source(profile) else None
+
+        if not storage.is_local:
+            with metrics.span("download.stream"):
+                sha256, size = stream_clip(clip_url, storage, filename, job, profile)
+            metrics.count("download.downloaded")
+            metrics.count("download.bytes", size)
+            if manifest is not None and clip_id:
+                record_entry(dl_folder, manifest, clip_id, filename, sha256, size, quality=quality)
+            remove_preview(storage, preview_entry, filename)
+            return file_path
+
+        # Sub folders of a sharding file name schema
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        # Options for yt-dlp
+        ydl_opts = {
+            "outtmpl": file_path,  # File name template
+            "quiet": True,         # Minimal output
+        }
+        ydl_opts.update(get_format_options(profile))
+        if profile["audio_only"]:
+            # The extracted audio is named after the downloaded file, so its extension must stay variable
+            ydl_opts["outtmpl"] = os.path.splitext(file_path)[0].replace("%", "%%") + ".%(ext)s"
+        if job:
+            ydl_opts["progress_hooks"] = [progress_hook]
+
+        with metrics.span("download.ytdlp"):
             with YoutubeDL(ydl_opts) as ydl:
                 ydl.download([clip_url])
+        metrics.count("download.downloaded")
+        if os.path.exists(file_path):
+            metrics.count("download.bytes", os.path.getsize(file_path))
 
-            downloaded_clips.append(file_path)  # Add the file path to the list
+        deduplicated = False
+        if manifest is not None and clip_id and os.path.exists(file_path):
+            with metrics.span("download.record"):
+                entry = record_download(dl_folder, manifest, clip_id, file_path, quality)
+            # Same content under another clip ID: keep a single copy on disk
+            duplicate_file = find_duplicate_content(dl_folder, manifest, entry)
+            if duplicate_file and dedup_mode == "link" and storage.copy(duplicate_file, filename):
+                print(f"Info: Replaced duplicate content {file_path} with link to {duplicate_file}")
+                deduplicated = True
+            elif duplicate_file and dedup_mode == "skip":
+                storage.remove(filename)
+                # The later manifest line wins, the clip now points to the existing file
+                record_entry(dl_folder, manifest, clip_id, duplicate_file, entry["sha256"], entry["size"],
+                             os.path.getmtime(storage.path(duplicate_file)), quality)
+                print(f"Info: Removed duplicate content {file_path}, the clip is kept as {duplicate_file}")
+                file_path = storage.path(duplicate_file)
+                deduplicated = True
+            remove_preview(storage, preview_entry, filename)
 
-        except Exception as e:
-            print(f"Error: Failed to download {clip_url}. {e}")
+        # Remuxed in another process while the next clips download
+        if postprocessor and not deduplicated and os.path.exists(file_path):
+            postprocessor.submit(file_path, clip_id, quality, manifest)
+
+        return file_path
+
+    except ClipLocked:
+        raise
+    except JobCancelled:
+        if storage.is_local:
+            remove_partial_download(file_path)
+        raise
+    except Exception as e:
+        if job and job.is_cancelled():
+            # yt-dlp may wrap the exception raised in the progress hook
+            if storage.is_local:
+                remove_partial_download(file_path)
+            raise JobCancelled(str(e))
+        metrics.count("download.failed")
+        print(f"Error: Failed to download {clip_url}. {e}")
+        if status_callback:
+            status_callback(f"Error: Failed to download {clip_url}. {e}")
+        return None
+    finally:
+        if clip_lock:
+            clip_lock.release()
+
+def download_clips(clips, dl_folder, status_callback, dedup_mode="link", job=None, manifest=None, postprocessor=None,
+                   index=True, flush=True):
+    """
+    Download clips using yt-dlp and format file names as specified.
+
+    Clips for a local folder are downloaded by yt-dlp, clips for object
+    storage (see storage.get_storage()) are streamed to it with multipart uploads.
+
+    Several instances can share a local download folder (see locks.py): a clip
+    that another instance is downloading is put back and tried again after the
+    other clips, by then it is usually skipped as already existing.
+
+    Args:
+        clips (list): The clips to download. Each clip needs "url", "id" and "filename".
+        dl_folder (str): The download folder or an "s3://bucket/prefix" target.
+        status_callback (callable): Receives status messages.
+        dedup_mode (str): "link" hard-links (object storage: copies on the server) clips that were
+            already downloaded under another file name, "skip" reuses the existing file, "off"
+            disables deduplication. A new download with the same content as another clip is
+            replaced with a link ("link") or removed in favor of the existing file ("skip").
+        job (JobControl, optional): Checked before every clip and on every yt-dlp progress
+            update, so a cancel aborts the running transfer and a pause stalls it.
+        manifest (dict, optional): An already loaded manifest of dl_folder, e.g. when called per clip.
+        postprocessor (PostProcessor, optional): Receives every newly downloaded clip (see
+            postprocess.create_postprocessor()); the caller closes it.
+        index (bool): Add the clips to the archive index. Download workers leave that to the
+            parent process, which has the config and game name cache loaded.
+        flush (bool): Write the manifest lines kept in memory for object storage. Download
+            workers pass them to the parent process instead, which writes them once per run.
+
+    Returns:
+        list: The paths of the downloaded (or already existing) clips. Their metadata and
+            paths are added to the archive index (see archive_index.py).
+    """
+    downloaded_clips = []  # List to store paths of downloaded clips
+    storage = get_storage(dl_folder)
+    if dedup_mode == "off":
+        manifest = None
+    elif manifest is None:
+        with metrics.span("download.load_manifest"):
+            manifest = load_manifest(dl_folder)
+
+    indexed_clips = []
+    try:
+        pending = clips
+        while True:
+            locked = []
+            for clip in pending:
+                if job:
+                    job.check()
+                try:
+                    downloaded_path = download_clip(clip, dl_folder, storage, status_callback, dedup_mode, job, manifest, postprocessor)
+                except ClipLocked as e:
+                    if not locked:
+                        print(f"Info: {e} Trying it again later.")
+                    metrics.count("download.locked")
+                    locked.append(clip)
+                    continue
+                if downloaded_path:
+                    downloaded_clips.append(downloaded_path)
+                    indexed_clips.append((clip, downloaded_path))
+                if postprocessor:
+                    postprocessor.collect()
+            if not locked:
+                break
             if status_callback:
-                status_callback(f"Error: Failed to download {clip_url}. {e}")
+                status_callback(f"Info: Waiting for {len(locked)} clips another instance is downloading.")
+            wait_until = time.monotonic() + WAIT_INTERVAL
+            while time.monotonic() < wait_until:
+                if job:
+                    job.check()
+                time.sleep(0.2)
+            pending = locked
+    finally:
+        # Object storage keeps the manifest lines of this run in memory until here
+        if flush:
+            storage.flush()
+        # Make the clips of this run searchable, also when it was cancelled
+        if index:
+            with metrics.span("download.index"):
+                index_downloads(indexed_clips, get_game_name, status_callback)
 
     return downloaded_clips
 
+def redownload_clips(entries, dl_folder, status_callback, dedup_mode="link", job=None):
+    """
+    Download the clips of manifest entries again, e.g. the broken clips found by verify.verify_archive().
+
+    The clips are looked up by ID and stored under their recorded file name and quality.
+
+    Args:
+        entries (list): Manifest entries with "clip_id", "file" and "quality".
+        dl_folder (str): The download folder.
+        status_callback (callable): Receives status messages.
+        dedup_mode (str): See download_clips().
+        job (JobControl, optional): See download_clips().
+
+    Returns:
+        dict: {"files": downloaded paths, "missing": clip IDs no longer available} or an error message.
+    """
+    entries_by_id = {entry["clip_id"]: entry for entry in entries}
+    if not entries_by_id:
+        return {"files": [], "missing": []}
+    result = get_clips_by_id(list(entries_by_id))
+    if "error" in result:
+        return result
+
+    clips = result["clips"]
+    for clip in clips:
+        entry = entries_by_id[clip.id]
+        clip.quality = entry.get("quality", "source")
+        clip.filename = get_source_filename(entry["file"], parse_quality(clip.quality))
+    found_ids = {clip.id for clip in clips}
+    missing = [clip_id for clip_id in entries_by_id if clip_id not in found_ids]
+    for clip_id in missing:
+        print(f"Warning: Clip {clip_id} ({entries_by_id[clip_id]['file']}) is no longer available on Twitch.")
+
+    files = download_clips(clips, dl_folder, status_callback, dedup_mode=dedup_mode, job=job)
+    return {"files": files, "missing": missing}
+
 def is_vlc_available():
     """
     Check if VLC media player is installed and accessible.
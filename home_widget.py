@@ -1,48 +1,145 @@
 import re
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QFileDialog, QLineEdit, QHBoxLayout, QFormLayout, QSpacerItem, QSizePolicy, QGroupBox, QDateEdit, QListWidget, QListWidgetItem, QAbstractItemView
+import os
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QFileDialog, QLineEdit, QHBoxLayout, QFormLayout, QSpacerItem, QSizePolicy, QGroupBox, QDateTimeEdit, QListWidget, QListWidgetItem, QAbstractItemView, QComboBox, QSpinBox, QDoubleSpinBox, QMenu
 from PySide6.QtCore import Qt, Signal, QTimer, QThread
+from PySide6.QtGui import QIcon, QPixmap
 from custom_line_edit import CustomLineEdit
 from datetime import datetime, timedelta
-from functions import get_clips, download_clips, get_auth_config, get_user_config, get_broadcaster_id, get_game_name, is_vlc_available, open_clips_in_vlc
+from functions import get_clips, get_crawl_limiter, download_clips, build_clip_filename, preflight_check, get_game_ids, get_auth_config, get_user_config, get_broadcaster_id, is_vlc_available, open_clips_in_vlc
+from clip_store import ClipIndex, ClipSelection
+from clip_filter import ClipFilter
+import metrics
+from thumbnails import ThumbnailCache, ThumbnailLoader, THUMBNAIL_SIZE
+from export import EXPORT_FORMATS, open_exporter
+from jobs import JobManager, JobCancelled, run_in_lane
+from time_range import PRESETS, day_range, preset_range, localize, validate_range
+from download_pool import download_clips_in_processes
+from postprocess import create_postprocessor
+from autotune import create_download_limiter
+from vod_context import plan_context_windows, download_context_windows
+from storage import is_remote_target
+from scheduler import DownloadQueue, DOWNLOAD_POLICIES, DEFAULT_POLICY
+from quality import QUALITY_PRESETS, parse_quality, resolve_quality, get_bytes_per_second
 
 
 class SearchClipsThread(QThread):
     search_completed = Signal(list)
     search_failed = Signal(str)
+    search_cancelled = Signal()
 
-    def __init__(self, broadcaster_id, date_from, date_to, parent=None):
+    def __init__(self, broadcaster_id, date_from, date_to, export_path=None, filter_settings=None, job=None, parent=None):
         super().__init__(parent)
+        self.job = job
         self.broadcaster_id = broadcaster_id
         self.date_from = date_from
         self.date_to = date_to
+        self.export_path = export_path
+        self.filter_settings = filter_settings
 
     def run(self):
+        metrics.profile_current_thread()
         try:
-            clips = get_clips(self.broadcaster_id, self.date_from, self.date_to)
+            # Queued behind the searches of the job API and the leaderboard
+            clips = run_in_lane("search", self.search, job=self.job)
             self.search_completed.emit(clips)
+        except JobCancelled:
+            self.search_cancelled.emit()
         except Exception as e:
             self.search_failed.emit(str(e))
 
+    def search(self):
+        """Run the search on the search lane, failures are raised with their message."""
+        metrics.profile_current_thread()
+        clip_filter = None
+        if self.filter_settings:
+            filter_settings = dict(self.filter_settings)
+            if filter_settings.get("games"):
+                result = get_game_ids(filter_settings["games"])
+                if "error" in result:
+                    raise ValueError(result["message"])
+                filter_settings["game_ids"] = result["ids"]
+            clip_filter = ClipFilter.from_dict(filter_settings)
+
+        # Export pages while they arrive instead of after the search
+        exporter = None
+        if self.export_path:
+            result = open_exporter(self.export_path)
+            if "error" in result:
+                raise ValueError(result["message"])
+            exporter = result["exporter"]
+
+        try:
+            limiter = get_crawl_limiter(self.parent().status_update.emit)
+            return get_clips(self.broadcaster_id, self.date_from, self.date_to, limiter=limiter,
+                             page_callback=exporter.write_clips if exporter else None,
+                             clip_filter=clip_filter, job=self.job)
+        finally:
+            if exporter:
+                exporter.close()
+
 
 class DownloadClipsThread(QThread):
     download_completed = Signal(list)
     download_failed = Signal(str)
+    download_cancelled = Signal()
 
-    def __init__(self, clips, download_folder, parent=None):
+    def __init__(self, clips, download_folder, job=None, parent=None, policy=DEFAULT_POLICY, pinned_ids=()):
         super().__init__(parent)
+        self.job = job
         self.clips = clips
         self.download_folder = download_folder
+        # Reprioritized from the GUI thread while the download runs
+        self.queue = DownloadQueue(clips, policy, pinned_ids)
 
     def run(self):
+        metrics.profile_current_thread()
         try:
-            downloaded_files = download_clips(self.clips, self.download_folder, self.parent().status_update.emit)
+            # Queued behind the downloads of the job API
+            downloaded_files = run_in_lane("download", self.download, job=self.job)
             self.download_completed.emit(downloaded_files)
+        except JobCancelled:
+            self.download_cancelled.emit()
         except Exception as e:
             self.download_failed.emit(str(e))
 
+    def download(self):
+        """Run the download on the download lane, failures are raised with their message."""
+        metrics.profile_current_thread()
+        result = preflight_check(self.clips, self.download_folder)
+        if "error" in result:
+            raise ValueError(result["message"])
+        self.parent().status_update.emit(result["message"])
+
+        user_config = get_user_config()
+        dedup_mode = user_config.get("dedup_mode", "link")
+        processes = user_config.get("download_processes", 0)
+        postprocessor = create_postprocessor(self.download_folder, user_config, self.parent().status_update.emit)
+        try:
+            if processes > 0:
+                # yt-dlp runs in the shared worker processes, this thread only relays status messages
+                limiter = create_download_limiter(user_config, processes, self.parent().status_update.emit)
+                downloaded_files = download_clips_in_processes(self.queue, self.download_folder, self.parent().status_update.emit,
+                                                               processes, dedup_mode=dedup_mode, job=self.job,
+                                                               postprocessor=postprocessor, limiter=limiter)
+            else:
+                downloaded_files = download_clips(self.queue, self.download_folder, self.parent().status_update.emit,
+                                                  dedup_mode=dedup_mode, job=self.job, postprocessor=postprocessor)
+        finally:
+            if postprocessor:
+                postprocessor.close(cancel=bool(self.job and self.job.is_cancelled()))
+
+        context_seconds = user_config.get("vod_context_seconds", 0)
+        if context_seconds > 0:
+            windows = plan_context_windows(self.clips, context_seconds)
+            downloaded_files += download_context_windows(windows, self.download_folder,
+                                                         self.parent().status_update.emit, job=self.job)
+        return downloaded_files
+
 
 class HomeWidget(QWidget):
     status_update = Signal(str)
+    # Replaced by the load test (loadtest.py) with a thread that simulates downloads
+    download_thread_class = DownloadClipsThread
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -66,43 +163,103 @@ class HomeWidget(QWidget):
         self.broadcaster_input.setStyleSheet("color: white;")
         self.settings_form_layout.addRow(QLabel("Broadcaster:", self), self.broadcaster_input)
 
-        # Date Range Selection with Calendar
-        self.date_from_input = QDateEdit(self)
+        # Time Range Selection with Calendar, in the local time zone with hour granularity
+        self.range_preset_input = QComboBox(self)
+        self.range_preset_input.addItems(PRESETS.keys())
+        self.range_preset_input.setStyleSheet("color: white;")
+        self.range_preset_input.currentTextChanged.connect(self.apply_range_preset)
+
+        self.date_from_input = QDateTimeEdit(self)
         self.date_from_input.setCalendarPopup(True)
-        self.date_from_input.setDisplayFormat("yyyy-MM-dd")
+        self.date_from_input.setDisplayFormat("yyyy-MM-dd HH:mm")
         self.date_from_input.setStyleSheet("color: white;")
         self.date_from_input.setFocusPolicy(Qt.StrongFocus)
 
-        self.date_to_input = QDateEdit(self)
+        self.date_to_input = QDateTimeEdit(self)
         self.date_to_input.setCalendarPopup(True)
-        self.date_to_input.setDisplayFormat("yyyy-MM-dd")
+        self.date_to_input.setDisplayFormat("yyyy-MM-dd HH:mm")
         self.date_to_input.setStyleSheet("color: white;")
         self.date_to_input.setFocusPolicy(Qt.StrongFocus)
 
-        # Disable manual input for date fields without affecting calendar interaction
-        self.date_from_input.lineEdit().setEnabled(False)
-        self.date_to_input.lineEdit().setEnabled(False)
-
         # Prevent year change by clicking into the field
-        self.date_from_input.setButtonSymbols(QDateEdit.NoButtons)
-        self.date_to_input.setButtonSymbols(QDateEdit.NoButtons)
-
-        # Set default dates: yesterday and today
-        today = datetime.now().date()
-        yesterday = today - timedelta(days=2)
+        self.date_from_input.setButtonSymbols(QDateTimeEdit.NoButtons)
+        self.date_to_input.setButtonSymbols(QDateTimeEdit.NoButtons)
 
-        self.date_from_input.setDate(yesterday)
-        self.date_to_input.setDate(today)
+        # Set default range: two days ago (midnight) until now
+        start, end = day_range(datetime.now().date() - timedelta(days=2), datetime.now().date())
+        self.date_from_input.setDateTime(start.replace(tzinfo=None))
+        self.date_to_input.setDateTime(end.replace(tzinfo=None))
 
         self.date_range_layout = QHBoxLayout()
+        self.date_range_layout.addWidget(self.range_preset_input)
         self.date_range_layout.addWidget(self.date_from_input)
         self.date_range_layout.addWidget(self.date_to_input)
 
-        self.settings_form_layout.addRow(QLabel("Date Range:", self), self.date_range_layout)
+        self.settings_form_layout.addRow(QLabel("Time Range:", self), self.date_range_layout)
+
+        self.export_format_input = QComboBox(self)
+        self.export_format_input.addItems(("none",) + EXPORT_FORMATS)
+        self.export_format_input.setToolTip("Export the clip metadata of every search into the download folder")
+        self.export_format_input.setStyleSheet("color: white;")
+        self.settings_form_layout.addRow(QLabel("Export Metadata:", self), self.export_format_input)
+
+        # Filters applied while the clip pages arrive
+        self.filter_group = QGroupBox("Filters", self)
+        self.filter_group.setCheckable(True)
+        self.filter_group.setChecked(False)
+        self.filter_form_layout = QFormLayout()
+
+        self.min_views_input = QSpinBox(self)
+        self.min_views_input.setRange(0, 1000000000)
+        self.min_views_input.setPrefix("≥ ")
+        self.min_views_input.setSuffix(" views")
+        self.min_duration_input = QDoubleSpinBox(self)
+        self.min_duration_input.setRange(0, 60)
+        self.min_duration_input.setSuffix(" s")
+        self.min_duration_input.setSpecialValueText("min. length")
+        self.max_duration_input = QDoubleSpinBox(self)
+        self.max_duration_input.setRange(0, 60)
+        self.max_duration_input.setSuffix(" s")
+        self.max_duration_input.setSpecialValueText("max. length")
+        self.top_n_input = QSpinBox(self)
+        self.top_n_input.setRange(0, 100000)
+        self.top_n_input.setPrefix("Top ")
+        self.top_n_input.setSpecialValueText("all clips")
+        self.filter_numbers_layout = QHBoxLayout()
+        for widget in (self.min_views_input, self.min_duration_input, self.max_duration_input, self.top_n_input):
+            widget.setStyleSheet("color: white;")
+            self.filter_numbers_layout.addWidget(widget)
+        self.filter_form_layout.addRow(QLabel("Views/Length:", self), self.filter_numbers_layout)
+
+        self.games_filter_input = QLineEdit(self)
+        self.games_filter_input.setPlaceholderText("Games (comma separated names or IDs)")
+        self.creators_filter_input = QLineEdit(self)
+        self.creators_filter_input.setPlaceholderText("Creators (comma separated)")
+        self.filter_names_layout = QHBoxLayout()
+        for widget in (self.games_filter_input, self.creators_filter_input):
+            widget.setStyleSheet("color: white;")
+            self.filter_names_layout.addWidget(widget)
+        self.filter_form_layout.addRow(QLabel("Games/Creators:", self), self.filter_names_layout)
+
+        self.title_filter_input = QLineEdit(self)
+        self.title_filter_input.setPlaceholderText("Regular expression, e.g. clutch|ace")
+        self.title_filter_input.setStyleSheet("color: white;")
+        self.filter_form_layout.addRow(QLabel("Title:", self), self.title_filter_input)
+
+        self.filter_group.setLayout(self.filter_form_layout)
+        self.settings_form_layout.addRow(self.filter_group)
 
         self.search_button = QPushButton("Search Clips", self)
         self.search_button.clicked.connect(self.search_clips)
-        self.settings_form_layout.addRow(self.search_button)
+        self.pause_search_button = QPushButton("Pause", self)
+        self.pause_search_button.clicked.connect(lambda: self.toggle_pause("search", self.pause_search_button))
+        self.cancel_search_button = QPushButton("Cancel", self)
+        self.cancel_search_button.clicked.connect(lambda: self.cancel_job("search"))
+        search_buttons_layout = QHBoxLayout()
+        search_buttons_layout.addWidget(self.search_button, 1)
+        search_buttons_layout.addWidget(self.pause_search_button)
+        search_buttons_layout.addWidget(self.cancel_search_button)
+        self.settings_form_layout.addRow(search_buttons_layout)
 
         self.settings_group.setLayout(self.settings_form_layout)
         self.layout.addWidget(self.settings_group)
@@ -114,8 +271,14 @@ class HomeWidget(QWidget):
         self.clips_list = QListWidget(self)
         self.clips_list.setSelectionMode(QAbstractItemView.ExtendedSelection)  # Ermöglicht das Markieren mehrerer Clips
         self.clips_list.setMinimumHeight(200)  # Setzt eine Mindesthöhe für die Liste
+        self.clips_list.setIconSize(THUMBNAIL_SIZE)
+        self.clips_list.setUniformItemSizes(True)
         self.clips_form_layout.addRow(self.clips_list)
 
+        self.selection_label = QLabel(self)
+        self.selection_label.setToolTip("Estimated from the clip durations and the download quality, existing files are counted too.")
+        self.clips_form_layout.addRow(self.selection_label)
+
         self.download_folder_input = QLineEdit(self)
         self.download_folder_input.setPlaceholderText("Download-Folder")
         self.download_folder_input.setReadOnly(True)
@@ -137,15 +300,65 @@ class HomeWidget(QWidget):
         else:
             self.download_vlc_button.hide()
 
+        self.pause_download_button = QPushButton("Pause", self)
+        self.pause_download_button.clicked.connect(lambda: self.toggle_pause("download", self.pause_download_button))
+        self.cancel_download_button = QPushButton("Cancel", self)
+        self.cancel_download_button.clicked.connect(lambda: self.cancel_job("download"))
+
+        self.download_order_input = QComboBox(self)
+        for policy, (label, _) in DOWNLOAD_POLICIES.items():
+            self.download_order_input.addItem(label, policy)
+        self.download_order_input.setToolTip("Order of the download queue, can be changed while downloading.\nRight-click clips to download them first.")
+        self.download_order_input.setStyleSheet("color: white;")
+        self.download_order_input.currentIndexChanged.connect(self.on_download_order_changed)
+        self.download_quality_input = QComboBox(self)
+        self.download_quality_input.setEditable(True)
+        self.download_quality_input.addItems(("default",) + QUALITY_PRESETS)
+        self.download_quality_input.setToolTip("Quality of this download, \"default\" uses the settings per broadcaster.\n"
+                                               "Download a low quality preview first and upgrade selected clips with \"source\" later.")
+        self.download_quality_input.setStyleSheet("color: white;")
+        self.download_quality_input.currentTextChanged.connect(self.update_download_button_state)
+        self.download_options_layout = QHBoxLayout()
+        self.download_options_layout.addWidget(self.download_order_input, 1)
+        self.download_options_layout.addWidget(QLabel("Quality:", self))
+        self.download_options_layout.addWidget(self.download_quality_input, 1)
+        self.clips_form_layout.addRow(QLabel("Download Order:", self), self.download_options_layout)
+
+        # Clips pinned with the context menu are downloaded first
+        self.pinned_ids = []
+        self.clips_list.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.clips_list.customContextMenuRequested.connect(self.show_clip_menu)
+
         download_buttons_layout = QHBoxLayout()
         download_buttons_layout.addWidget(self.download_button)
         download_buttons_layout.addWidget(self.download_vlc_button)
+        download_buttons_layout.addWidget(self.pause_download_button)
+        download_buttons_layout.addWidget(self.cancel_download_button)
         self.clips_form_layout.addRow(download_buttons_layout)
 
         self.clips_group.setLayout(self.clips_form_layout)
         self.layout.addWidget(self.clips_group)  # Sicherstellen, dass die QGroupBox korrekt im Hauptlayout eingebettet ist
 
-        self.clips = []  # Liste für alle Clips
+        self.jobs = JobManager()  # Laufende Such- und Download-Jobs
+        self.search_thread = None
+        self.download_thread = None
+        self.update_job_buttons()
+
+        self.clips = ClipIndex()  # Alle Clips, indiziert nach Clip-ID
+        self.clip_rows = {}  # Clip-ID -> Zeile in clips_list
+        self.row_ids = []  # Zeile in clips_list -> Clip-ID
+        self.selection = ClipSelection()  # Markierte Clips, bei jeder Änderung nachgeführt
+
+        # Thumbnails are loaded in the background for visible rows only
+        cache_mb = get_user_config().get("thumbnail_cache_mb")
+        self.thumbnail_loader = ThumbnailLoader(ThumbnailCache(max_bytes=cache_mb * 1024 * 1024), self)
+        self.thumbnail_loader.thumbnail_loaded.connect(self.on_thumbnail_loaded)
+        self.thumbnail_loader.thumbnail_failed.connect(self.on_thumbnail_failed)
+        self.thumbnail_warning_shown = False
+        self.thumbnail_timer = QTimer(self)
+        self.thumbnail_timer.setSingleShot(True)
+        self.thumbnail_timer.timeout.connect(self.request_visible_thumbnails)
+        self.clips_list.verticalScrollBar().valueChanged.connect(lambda: self.thumbnail_timer.start(100))
 
         # Load existing configuration
         self.load_existing_config()
@@ -156,15 +369,18 @@ class HomeWidget(QWidget):
 
         self.broadcaster_input.line_edit.textChanged.connect(self.on_broadcaster_input_changed)
 
-        # Validate date range
+        # Validate date range, manual changes switch back to a custom range
         def validate_date_range():
-            if self.date_to_input.date() < self.date_from_input.date():
-                self.status_update.emit("Error: End date cannot be earlier than start date.")
+            if not self.applying_preset:
+                self.range_preset_input.setCurrentText("Custom")
+            if self.date_to_input.dateTime() <= self.date_from_input.dateTime():
+                self.status_update.emit("Error: End time must be later than start time.")
 
-        self.date_from_input.dateChanged.connect(validate_date_range)
-        self.date_to_input.dateChanged.connect(validate_date_range)
+        self.applying_preset = False
+        self.date_from_input.dateTimeChanged.connect(validate_date_range)
+        self.date_to_input.dateTimeChanged.connect(validate_date_range)
 
-        self.clips_list.itemSelectionChanged.connect(self.update_download_button_state)
+        self.clips_list.selectionModel().selectionChanged.connect(self.on_selection_changed)
         self.update_download_button_state()
 
     def load_existing_config(self):
@@ -216,19 +432,108 @@ class HomeWidget(QWidget):
             self.toggle_spinner(False)
             return
 
-        date_from = self.date_from_input.date().toString("yyyy-MM-dd")
-        date_to = self.date_to_input.date().toString("yyyy-MM-dd")
+        date_from, date_to = self.get_time_range()
+        result = validate_range(date_from, date_to)
+        if "error" in result:
+            self.status_update.emit(result["message"])
+            return
 
-        self.toggle_spinner(True)
-        self.clips_list.clear()
+        export_path = None
+        export_format = self.export_format_input.currentText()
+        if export_format != "none":
+            download_folder = self.download_folder_input.text().strip()
+            if not download_folder:
+                self.status_update.emit("Error: Download folder is not set.")
+                return
+            if is_remote_target(download_folder):
+                download_folder = ""  # Exports are written locally, next to config.json
+            export_path = os.path.join(download_folder, f"{broadcaster_name}_{date_from:%Y%m%d-%H%M}_{date_to:%Y%m%d-%H%M}.{export_format}")
+
+        filter_settings = self.get_filter_settings()
+        if filter_settings and filter_settings.get("title_pattern"):
+            try:
+                re.compile(filter_settings["title_pattern"])
+            except re.error as e:
+                self.status_update.emit(f"Error: Invalid title filter. {e}")
+                self.title_filter_input.setFocus()
+                return
 
-        self.search_thread = SearchClipsThread(broadcaster_id, date_from, date_to, self)
-        self.search_thread.search_completed.connect(self.on_search_completed)
-        self.search_thread.search_failed.connect(self.on_search_failed)
+        self.toggle_spinner(True)
+        self.reset_clip_list()
+
+        # A running search is cancelled and its results are ignored
+        previous_thread = getattr(self, "search_thread", None)
+        if previous_thread is not None:
+            previous_thread.search_completed.disconnect()
+            previous_thread.search_failed.disconnect()
+            previous_thread.search_cancelled.disconnect()
+        job = self.jobs.start("search")
+
+        search_thread = SearchClipsThread(broadcaster_id, date_from, date_to, export_path, filter_settings, job, self)
+        search_thread.search_completed.connect(self.on_search_completed)
+        search_thread.search_failed.connect(self.on_search_failed)
+        search_thread.search_cancelled.connect(self.on_search_cancelled)
+        search_thread.finished.connect(lambda: self.on_search_thread_finished(search_thread, job))
+        self.search_thread = search_thread
         self.search_thread.start()
+        self.update_job_buttons()
+
+    def reset_clip_list(self):
+        """Remove the results of the previous search."""
+        self.clips_list.clear()
+        self.clips = ClipIndex()
+        self.clip_rows = {}
+        self.row_ids = []
+        self.selection.clear()
+        self.update_download_button_state()
+        self.pinned_ids = []
+        self.thumbnail_loader.reset()
+        self.thumbnail_warning_shown = False
+
+    def apply_range_preset(self, preset):
+        """Show the window of a relative preset in the From/To fields."""
+        window = preset_range(preset)
+        if window is None:
+            return
+        self.applying_preset = True
+        self.date_from_input.setDateTime(window[0].replace(tzinfo=None))
+        self.date_to_input.setDateTime(window[1].replace(tzinfo=None))
+        self.applying_preset = False
+
+    def get_time_range(self):
+        """
+        Return the search window as aware datetimes in the local time zone.
+
+        Relative presets are resolved again at search time, so "Last hour" always ends now.
+        """
+        window = preset_range(self.range_preset_input.currentText())
+        if window is not None:
+            self.apply_range_preset(self.range_preset_input.currentText())
+            return window
+        date_from = localize(self.date_from_input.dateTime().toPython().replace(second=0, microsecond=0))
+        date_to = localize(self.date_to_input.dateTime().toPython().replace(second=0, microsecond=0))
+        return date_from, date_to
+
+    def get_filter_settings(self):
+        """Return the filter settings of the filter group, or None if filtering is disabled."""
+        if not self.filter_group.isChecked():
+            return None
+
+        def split_names(text):
+            return [name.strip() for name in text.split(",") if name.strip()]
+
+        return {
+            "min_views": self.min_views_input.value() or None,
+            "min_duration": self.min_duration_input.value() or None,
+            "max_duration": self.max_duration_input.value() or None,
+            "top_n": self.top_n_input.value() or None,
+            "games": split_names(self.games_filter_input.text()),
+            "creators": split_names(self.creators_filter_input.text()),
+            "title_pattern": self.title_filter_input.text().strip() or None,
+        }
 
     def on_search_completed(self, clips):
-        self.clips = clips
+        self.clips = ClipIndex(clips)
         self.status_update.emit(f"{len(clips)} clips found.")
         self.clips_group.setTitle(f"Clips ({len(clips)} found)")
         self.toggle_spinner(False)
@@ -236,55 +541,198 @@ class HomeWidget(QWidget):
         user_config = get_user_config()
         spacer_template = user_config.get("spacer", "{clip_date} - {game_name} - {clip_title}")
 
-        for clip in self.clips:
-            try:
-                broadcaster_name = re.sub(r"[<>:\"/\\|?*.'’‘]", "", clip.get("broadcaster_name", "unknown")).strip()
-                clip_url = clip.get("url")
-                clip_title = re.sub(r"[<>:\"/\\|?*.'’‘]", "", clip.get("title", "untitled")).strip()
-                clip_creator = re.sub(r"[<>:\"/\\|?*.'’‘]", "", clip.get("creator_name", "unknown")).strip()
-                clip_date = clip.get("created_at", "").split("T")[0]
-                game_id = clip.get("game_id", "0")
-                game_name = re.sub(r"[<>:\"/\\|?*.'’‘]", "", get_game_name(game_id)).strip()
-
-                display_text = spacer_template.format(
-                    clip_date=clip_date,
-                    game_name=game_name,
-                    clip_title=clip_title,
-                    clip_creator=clip_creator,
-                    broadcaster_name=broadcaster_name
-                )
-                display_text = display_text + ".mp4"
-
-                clip["filename"] = display_text
-
-                item = QListWidgetItem(display_text)
-                item.setData(Qt.UserRole, clip_url)
-                self.clips_list.addItem(item)
-            except Exception as e:
-                self.status_update.emit(f"Error processing clip: {e}")
-                continue
-
-        for i in range(self.clips_list.count()):
-            self.clips_list.item(i).setSelected(True)
+        with metrics.span("gui.list_build"):
+            for clip in self.clips:
+                try:
+                    display_text = build_clip_filename(clip, spacer_template)
+
+                    clip.filename = display_text
+
+                    item = QListWidgetItem(display_text)
+                    item.setData(Qt.UserRole, clip.id)
+                    self.clip_rows[clip.id] = self.clips_list.count()
+                    self.row_ids.append(clip.id)
+                    self.clips_list.addItem(item)
+                except Exception as e:
+                    self.status_update.emit(f"Error processing clip: {e}")
+                    continue
+
+            # A single selection change instead of one per clip
+            self.clips_list.selectAll()
+
+        self.thumbnail_timer.start(0)
+
+    def request_visible_thumbnails(self):
+        """Queue thumbnails for the rows currently visible in the clip list."""
+        viewport = self.clips_list.viewport().rect()
+        first_row = self.clips_list.indexAt(viewport.topLeft()).row()
+        last_row = self.clips_list.indexAt(viewport.bottomLeft()).row()
+        if first_row < 0:
+            return
+        if last_row < 0:
+            last_row = self.clips_list.count() - 1
+
+        for row in range(first_row, last_row + 1):
+            item = self.clips_list.item(row)
+            if item.icon().isNull():
+                clip = self.clips.get(item.data(Qt.UserRole))
+                if clip:
+                    self.thumbnail_loader.request(clip.id, clip.thumbnail_url)
+
+    def on_thumbnail_loaded(self, clip_id, image, generation):
+        if generation != self.thumbnail_loader.generation:
+            return
+        self.thumbnail_loader.finished(clip_id)
+        row = self.clip_rows.get(clip_id)
+        if row is not None:
+            self.clips_list.item(row).setIcon(QIcon(QPixmap.fromImage(image)))
+
+    def on_thumbnail_failed(self, clip_id, message, generation):
+        if generation != self.thumbnail_loader.generation:
+            return
+        self.thumbnail_loader.finished(clip_id)
+        # Once per search, a network problem fails every thumbnail
+        if not self.thumbnail_warning_shown:
+            self.thumbnail_warning_shown = True
+            self.status_update.emit(f"Warning: Failed to load thumbnail for clip {clip_id}. {message}")
 
     def on_search_failed(self, error_message):
         self.status_update.emit(f"Error: {error_message}")
         self.toggle_spinner(False)
 
+    def on_search_cancelled(self):
+        self.status_update.emit("Search cancelled.")
+        self.toggle_spinner(False)
+
+    def toggle_pause(self, kind, button):
+        job = self.jobs.get(kind)
+        if not job:
+            return
+        if job.is_paused():
+            job.resume()
+            button.setText("Pause")
+            self.status_update.emit(f"{kind.capitalize()} resumed.")
+        else:
+            job.pause()
+            button.setText("Resume")
+            self.status_update.emit(f"{kind.capitalize()} paused.")
+
+    def cancel_job(self, kind):
+        self.jobs.cancel(kind)
+        self.update_job_buttons()
+
+    def on_search_thread_finished(self, thread, job):
+        if self.search_thread is thread:
+            self.search_thread = None
+        thread.deleteLater()
+        self.on_job_finished(job)
+
+    def show_clip_menu(self, position):
+        item = self.clips_list.itemAt(position)
+        if item is None:
+            return
+        menu = QMenu(self)
+        pinned = item.data(Qt.UserRole) in self.pinned_ids
+        if pinned:
+            action = menu.addAction("Don't download first")
+        else:
+            action = menu.addAction("Download first")
+        if menu.exec(self.clips_list.viewport().mapToGlobal(position)) != action:
+            return
+
+        # Applies to all selected clips if the clicked clip is part of the selection
+        if item.isSelected():
+            items = [self.clips_list.item(self.clip_rows[clip_id]) for clip_id in self.selection.ids]
+        else:
+            items = [item]
+        queue = self.download_thread.queue if self.download_thread is not None else None
+        for selected_item in items:
+            clip_id = selected_item.data(Qt.UserRole)
+            font = selected_item.font()
+            if pinned and clip_id in self.pinned_ids:
+                self.pinned_ids.remove(clip_id)
+                if queue:
+                    queue.unpin(clip_id)
+                font.setBold(False)
+            elif not pinned and clip_id not in self.pinned_ids:
+                self.pinned_ids.append(clip_id)
+                if queue:
+                    queue.pin(clip_id)
+                font.setBold(True)
+            selected_item.setFont(font)
+
+    def on_download_order_changed(self):
+        # Reorder the clips of a running download that have not been started yet
+        if self.download_thread is not None:
+            self.download_thread.queue.set_policy(self.download_order_input.currentData())
+
+    def on_download_thread_finished(self, thread, job):
+        if self.download_thread is thread:
+            self.download_thread = None
+        thread.deleteLater()
+        self.on_job_finished(job)
+
+    def on_job_finished(self, job):
+        self.jobs.finish(job)
+        self.update_job_buttons()
+
+    def update_job_buttons(self):
+        for kind, pause_button, cancel_button in (
+            ("search", self.pause_search_button, self.cancel_search_button),
+            ("download", self.pause_download_button, self.cancel_download_button),
+        ):
+            running = self.jobs.is_running(kind)
+            pause_button.setEnabled(running)
+            cancel_button.setEnabled(running)
+            if not running:
+                pause_button.setText("Pause")
+
     def select_download_folder(self):
         current_folder = self.download_folder_input.text()
         folder = QFileDialog.getExistingDirectory(self, "Select Download Folder", current_folder)
         if folder:
             self.download_folder_input.setText(folder)
 
+    def on_selection_changed(self, selected, deselected):
+        # Only the changed rows are visited: a select-all or shift-click range arrives as one range
+        for selection, update in ((deselected, self.selection.remove), (selected, self.selection.add)):
+            for selection_range in selection:
+                for row in range(selection_range.top(), min(selection_range.bottom() + 1, len(self.row_ids))):
+                    clip = self.clips.get(self.row_ids[row])
+                    if clip is not None:
+                        update(clip)
+        self.update_download_button_state()
+
     def update_download_button_state(self):
-        self.download_button.setEnabled(len(self.clips_list.selectedItems()) > 0)
-        self.download_vlc_button.setEnabled(len(self.clips_list.selectedItems()) > 0)
+        count = len(self.selection)
+        self.download_button.setEnabled(count > 0)
+        self.download_vlc_button.setEnabled(count > 0)
+        if not count:
+            self.selection_label.setText("No clips selected")
+            return
+
+        run_quality = self.download_quality_input.currentText().strip().lower()
+        user_config = get_user_config()
+
+        def bytes_per_second(broadcaster_name):
+            try:
+                return get_bytes_per_second(parse_quality(resolve_quality(broadcaster_name, run_quality, user_config)))
+            except ValueError:
+                # Quality still being typed
+                return get_bytes_per_second(parse_quality(resolve_quality(broadcaster_name, "default", user_config)))
+
+        estimated_mb = self.selection.estimate_bytes(bytes_per_second) / 1024 / 1024
+        self.selection_label.setText(f"{count} selected / {estimated_mb:.0f} MB estimated")
 
     def download_selected_clips(self):
+        # Before the spinner: it belongs to the running download
+        if self.jobs.is_running("download"):
+            self.status_update.emit("Error: A download is already running.")
+            return
+
         self.toggle_spinner(True)  # Spinner aktivieren
 
-        selected_clips = [item.data(Qt.UserRole) for item in self.clips_list.selectedItems()]
+        selected_clips = self.selection.ids
         download_folder = self.download_folder_input.text().strip()
         if not download_folder:
             self.status_update.emit("Error: Download folder is not set.")
@@ -295,16 +743,35 @@ class HomeWidget(QWidget):
             self.toggle_spinner(False)  # Spinner deaktivieren
             return
 
-        filtered_clips = [clip for clip in self.clips if clip.get("url") in selected_clips]
+        filtered_clips = self.clips.select(selected_clips)
 
-        self.download_thread = DownloadClipsThread(filtered_clips, download_folder, self)
-        self.download_thread.download_completed.connect(self.on_download_completed)
-        self.download_thread.download_failed.connect(self.on_download_failed)
+        run_quality = self.download_quality_input.currentText().strip().lower()
+        if run_quality != "default":
+            try:
+                run_quality = parse_quality(run_quality)["name"]
+            except ValueError as e:
+                self.status_update.emit(f"Error: {e}")
+                self.toggle_spinner(False)
+                return
+        user_config = get_user_config()
+        for clip in filtered_clips:
+            clip.quality = resolve_quality(clip.broadcaster_name, run_quality, user_config)
+
+        job = self.jobs.start("download")
+        download_thread = self.download_thread_class(filtered_clips, download_folder, job, self,
+                                                     policy=self.download_order_input.currentData(),
+                                                     pinned_ids=self.pinned_ids)
+        download_thread.download_completed.connect(self.on_download_completed)
+        download_thread.download_failed.connect(self.on_download_failed)
+        download_thread.download_cancelled.connect(self.on_download_cancelled)
+        download_thread.finished.connect(lambda: self.on_download_thread_finished(download_thread, job))
+        self.download_thread = download_thread
 
         # Speichern, ob der VLC-Button verwendet wurde
         self.download_thread.is_vlc_download = self.sender() == self.download_vlc_button
 
         self.download_thread.start()
+        self.update_job_buttons()
 
     def on_download_completed(self, downloaded_files):
         self.status_update.emit("Download completed.")
@@ -319,3 +786,7 @@ class HomeWidget(QWidget):
         self.status_update.emit(f"Error: {error_message}")
         self.toggle_spinner(False)  # Spinner deaktivieren
 
+    def on_download_cancelled(self):
+        self.status_update.emit("Download cancelled.")
+        self.toggle_spinner(False)  # Spinner deaktivieren
+
@@ -0,0 +1,146 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when it has been cancelled."""
+
+
+class JobControl:
+    """
+    Cancel and pause flag shared between the GUI and a worker.
+
+    Workers call check() between units of work (API pages, clips, yt-dlp
+    progress updates). check() blocks while the job is paused and raises
+    JobCancelled once it is cancelled, so no further HTTP or yt-dlp work is
+    started after cancel() returns.
+    """
+
+    def __init__(self, name="", cancel_event=None, resume_event=None):
+        # Events can be multiprocessing.Event objects to control worker processes
+        self.name = name
+        self.cancel_event = cancel_event or threading.Event()
+        self.resume_event = resume_event or threading.Event()
+        if resume_event is None:
+            self.resume_event.set()
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.resume_event.set()  # Wake up a paused worker so it can stop
+
+    def pause(self):
+        if not self.cancel_event.is_set():
+            self.resume_event.clear()
+
+    def resume(self):
+        self.resume_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def is_paused(self):
+        return not self.resume_event.is_set()
+
+    def check(self):
+        self.resume_event.wait()
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.name} cancelled.")
+
+
+class JobManager:
+    """
+    Registry of the running jobs, one per kind ("search", "download", ...).
+
+    Starting a job of a kind that is still running cancels the old job first,
+    so an abandoned search never keeps consuming bandwidth and rate budget.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.jobs = {}
+
+    def start(self, kind):
+        """Cancel the running job of this kind and return the control of a new one."""
+        job = JobControl(kind)
+        with self.lock:
+            old_job = self.jobs.get(kind)
+            self.jobs[kind] = job
+        if old_job:
+            old_job.cancel()
+        return job
+
+    def get(self, kind):
+        with self.lock:
+            return self.jobs.get(kind)
+
+    def is_running(self, kind):
+        job = self.get(kind)
+        return job is not None and not job.is_cancelled()
+
+    def finish(self, job):
+        """Remove a job from the registry once its worker has returned."""
+        with self.lock:
+            if self.jobs.get(job.name) is job:
+                del self.jobs[job.name]
+
+    def cancel(self, kind):
+        job = self.get(kind)
+        if job:
+            job.cancel()
+
+    def pause(self, kind):
+        job = self.get(kind)
+        if job:
+            job.pause()
+
+    def resume(self, kind):
+        job = self.get(kind)
+        if job:
+            job.resume()
+
+    def cancel_all(self):
+        with self.lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            job.cancel()
+
+
+# Work of all front ends of this process (GUI pages, job API) queues up on one worker thread per kind
+_lanes = {}
+_lanes_lock = threading.Lock()
+
+
+def get_lane(kind):
+    """
+    Return the process-wide single-thread executor of a kind of work ("search" or "download").
+
+    Searches of the GUI, the leaderboard and the job API run one after another
+    on the "search" lane, downloads on the "download" lane, so several front
+    ends neither multiply the Helix request rate nor download into the same
+    folder at the same time.
+    """
+    with _lanes_lock:
+        lane = _lanes.get(kind)
+        if lane is None:
+            lane = _lanes[kind] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"lane-{kind}")
+        return lane
+
+
+def run_in_lane(kind, function, *args, job=None, **kwargs):
+    """
+    Run a function on the lane of its kind and wait for its result.
+
+    A job cancelled while it waits for the lane is not started. Called from
+    the lane itself, the function runs right away instead of waiting for itself.
+
+    Raises:
+        JobCancelled: If the job was cancelled before it started.
+    """
+    def run():
+        if job:
+            job.check()
+        return function(*args, **kwargs)
+
+    if threading.current_thread().name.startswith(f"lane-{kind}"):
+        return run()
+    return get_lane(kind).submit(run).result()
@@ -0,0 +1,194 @@
+from clip_store import Clip
+from clip_filter import TopClips
+from functions import get_broadcaster_id, get_clips, get_game_name
+
+# Clip field each grouping ranks by
+GROUPINGS = {"game": "game_id", "creator": "creator_name", "broadcaster": "broadcaster_name"}
+DEFAULT_GROUP_BY = ("game", "creator")
+# Clips in the overall ranking
+DEFAULT_SIZE = 50
+# Clips per game, creator or broadcaster
+DEFAULT_GROUP_SIZE = 5
+# Groups per grouping in the result, the ones with the most views
+DEFAULT_MAX_GROUPS = 10
+
+
+class Leaderboard:
+    """
+    Most viewed clips of a stream of clip pages, overall and per group.
+
+    Pages are consumed as they arrive (e.g. as page_callback of get_clips), so
+    the clips of a search are never held as a whole. Every ranking is a
+    bounded min-heap (TopClips); a clip is only turned into a Clip record
+    when it makes it into one of them.
+
+    The groups are ranked in two passes: the first (add_page()) keeps the
+    overall ranking and only the clip count and view sum of every group;
+    select_groups() then picks the groups with the most views, and the
+    second pass (add_group_page()) over the same pages keeps the top clips of
+    those groups only. Memory grows with size + max_groups * group_size and
+    the number of groups, not with the number of clips.
+    """
+
+    def __init__(self, size=DEFAULT_SIZE, group_by=DEFAULT_GROUP_BY, group_size=DEFAULT_GROUP_SIZE):
+        unknown = [grouping for grouping in group_by if grouping not in GROUPINGS]
+        if unknown:
+            raise ValueError(f"Unknown grouping: {', '.join(unknown)}. Use {', '.join(GROUPINGS)}.")
+        self.overall = TopClips(size)
+        self.group_by = tuple(group_by)
+        self.group_size = group_size
+        self.groups = {grouping: {} for grouping in self.group_by}  # grouping -> {selected key: TopClips}
+        self.totals = {grouping: {} for grouping in self.group_by}  # grouping -> {key: [clips, views]}
+        self.clips_seen = 0
+
+    def add_page(self, clips):
+        """Rank a page of clips (Helix dictionaries or Clip records) overall and count them per group."""
+        for clip in clips:
+            self.clips_seen += 1
+            view_count = clip.get("view_count", 0)
+            if self.overall.accepts(clip):
+                self.overall.push(clip if isinstance(clip, Clip) else Clip.from_helix(clip))
+            for grouping in self.group_by:
+                key = clip.get(GROUPINGS[grouping]) or ""
+                totals = self.totals[grouping].get(key)
+                if totals is None:
+                    totals = self.totals[grouping][key] = [0, 0]
+                totals[0] += 1
+                totals[1] += view_count
+
+    def select_groups(self, max_groups=DEFAULT_MAX_GROUPS):
+        """
+        Pick the groups with the most views after the first pass.
+
+        Returns:
+            bool: True if a second pass (add_group_page()) is needed for their top clips.
+        """
+        for grouping in self.group_by:
+            totals = self.totals[grouping]
+            keys = sorted(totals, key=lambda key: totals[key][1], reverse=True)[:max_groups]
+            self.groups[grouping] = {key: TopClips(self.group_size) for key in keys}
+        return any(self.groups.values())
+
+    def add_group_page(self, clips):
+        """Rank a page of clips within the selected groups (second pass)."""
+        for clip in clips:
+            record = None
+            for grouping in self.group_by:
+                top_clips = self.groups[grouping].get(clip.get(GROUPINGS[grouping]) or "")
+                if top_clips is not None and top_clips.accepts(clip):
+                    if record is None:
+                        record = clip if isinstance(clip, Clip) else Clip.from_helix(clip)
+                    top_clips.push(record)
+
+    def results(self):
+        """
+        Return the rankings of the selected groups.
+
+        Returns:
+            dict: {"overall": clips, "<grouping>": [{"key", "name", "clips", "views", "top"}]}, clips most viewed first.
+        """
+        results = {"overall": self.overall.clips(), "clips_seen": self.clips_seen}
+        for grouping in self.group_by:
+            totals = self.totals[grouping]
+            groups = []
+            for key, top_clips in self.groups[grouping].items():
+                name = key
+                if grouping == "game":
+                    # Only the reported games are looked up
+                    name = get_game_name(key) if key else ""
+                    name = name if isinstance(name, str) else key
+                groups.append({
+                    "key": key,
+                    "name": name or "Unknown",
+                    "clips": totals[key][0],
+                    "views": totals[key][1],
+                    "top": top_clips.clips(),
+                })
+            results[grouping] = groups
+        return results
+
+
+def get_leaderboard(broadcasters, date_from, date_to, size=DEFAULT_SIZE, group_by=DEFAULT_GROUP_BY,
+                    group_size=DEFAULT_GROUP_SIZE, max_groups=DEFAULT_MAX_GROUPS, clip_filter=None, job=None,
+                    limiter=None, status_callback=None):
+    """
+    Rank the clips of several channels by views, overall and per game, creator or broadcaster.
+
+    The channels are searched one after another, their pages stream into one
+    Leaderboard (see get_clips(): cached windows are replayed, a limiter
+    crawls each channel concurrently). With groupings, every channel is
+    searched twice (see Leaderboard); the second search is answered from the
+    response cache unless the first one failed or its cached window expired.
+
+    Args:
+        broadcasters (list): The broadcaster names.
+        date_from (datetime): Start of the time window.
+        date_to (datetime): End of the time window.
+        size (int): Clips in the overall ranking.
+        group_by (tuple): Groupings of GROUPINGS to rank separately.
+        group_size (int): Clips per group.
+        max_groups (int): Groups per grouping in the result.
+        clip_filter (ClipFilter, optional): Only matching clips are ranked.
+        job (JobControl, optional): Checked before every page; raises JobCancelled when cancelled.
+        limiter (AimdLimiter, optional): See get_clips().
+        status_callback (callable, optional): Receives status messages.
+
+    Returns:
+        dict: The results of Leaderboard.results() with "message", "failed" (broadcasters
+            that could not be searched) and "partial" (broadcasters with pages that failed to
+            load, their clips are only ranked in part), or an error message.
+    """
+    def report(message):
+        print(message)
+        if status_callback:
+            status_callback(message)
+
+    try:
+        leaderboard = Leaderboard(size, group_by, group_size)
+    except ValueError as e:
+        return {"error": "INVALID_GROUPING", "message": f"Error: {e}"}
+
+    failed = []
+    partial = []
+    searched = []  # (broadcaster, ID) of the channels ranked in the first pass
+    for index, broadcaster in enumerate(broadcasters, 1):
+        if job:
+            job.check()
+        result = get_broadcaster_id(broadcaster)
+        if "error" in result:
+            report(f"Warning: {result['message']}")
+            failed.append(broadcaster)
+            continue
+        report(f"Info: Ranking clips of {broadcaster} ({index}/{len(broadcasters)}), {leaderboard.clips_seen} clips so far...")
+        searched.append((broadcaster, result["id"]))
+        errors = []
+        get_clips(result["id"], date_from, date_to, page_callback=leaderboard.add_page, collect=False,
+                  clip_filter=clip_filter, job=job, limiter=limiter, errors=errors)
+        if errors:
+            report(f"Warning: {len(errors)} requests for {broadcaster} failed, its clips are only ranked in part.")
+            partial.append(broadcaster)
+
+    if len(failed) == len(broadcasters):
+        return {"error": "NO_CHANNELS", "message": "Error: None of the broadcasters could be searched."}
+
+    # Second pass for the top clips of the leading groups, complete searches are replayed from the response cache
+    if leaderboard.select_groups(max_groups):
+        for index, (broadcaster, broadcaster_id) in enumerate(searched, 1):
+            report(f"Info: Ranking the top groups of {broadcaster} ({index}/{len(searched)})...")
+            errors = []
+            get_clips(broadcaster_id, date_from, date_to, page_callback=leaderboard.add_group_page, collect=False,
+                      clip_filter=clip_filter, job=job, limiter=limiter, errors=errors)
+            if errors and broadcaster not in partial:
+                report(f"Warning: {len(errors)} requests for {broadcaster} failed, its clips are only ranked in part.")
+                partial.append(broadcaster)
+
+    results = leaderboard.results()
+    results["failed"] = failed
+    results["partial"] = partial
+    results["message"] = (f"Info: Ranked {leaderboard.clips_seen} clips of {len(broadcasters) - len(failed)} channels, "
+                          f"top {len(results['overall'])} shown.")
+    if partial:
+        results["message"] = (f"Warning: Partial result, not all clips of {', '.join(partial)} could be loaded. "
+                              f"Ranked {leaderboard.clips_seen} clips, top {len(results['overall'])} shown.")
+    report(results["message"])
+    return results
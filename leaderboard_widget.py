@@ -0,0 +1,163 @@
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox, QSpinBox, QTreeWidget, QTreeWidgetItem
+from PySide6.QtCore import Qt, Signal, QThread, QUrl
+from PySide6.QtGui import QDesktopServices
+from functions import get_crawl_limiter
+from jobs import JobManager, JobCancelled, run_in_lane
+from time_range import PRESETS, preset_range
+from leaderboard import get_leaderboard, GROUPINGS, DEFAULT_SIZE, DEFAULT_GROUP_SIZE, DEFAULT_MAX_GROUPS
+import metrics
+
+
+class LeaderboardThread(QThread):
+    leaderboard_completed = Signal(dict)
+    leaderboard_failed = Signal(str)
+    leaderboard_cancelled = Signal()
+
+    def __init__(self, broadcasters, preset, size, job, parent=None):
+        super().__init__(parent)
+        self.broadcasters = broadcasters
+        self.preset = preset
+        self.size = size
+        self.job = job
+
+    def run(self):
+        metrics.profile_current_thread()
+        try:
+            # Resolved at start, so "Last 30 days" always ends now
+            date_from, date_to = preset_range(self.preset)
+            status_callback = self.parent().status_update.emit
+            # Shares the search lane with the search page and the job API
+            results = run_in_lane("search", lambda: get_leaderboard(
+                self.broadcasters, date_from, date_to, size=self.size, group_by=tuple(GROUPINGS),
+                limiter=get_crawl_limiter(status_callback), job=self.job, status_callback=status_callback), job=self.job)
+            if "error" in results:
+                self.leaderboard_failed.emit(results["message"])
+            else:
+                self.leaderboard_completed.emit(results)
+        except JobCancelled:
+            self.leaderboard_cancelled.emit()
+        except Exception as e:
+            self.leaderboard_failed.emit(str(e))
+
+
+class LeaderboardWidget(QWidget):
+    """Most viewed clips of several channels, overall and per game, creator and broadcaster (see leaderboard.py)."""
+
+    status_update = Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = JobManager()
+        self.results = None
+        self.layout = QVBoxLayout(self)
+        self.layout.setContentsMargins(20, 10, 20, 10)  # Set margins: left, top, right, bottom
+
+        self.label = QLabel("Leaderboard", self)
+        self.label.setAlignment(Qt.AlignTop | Qt.AlignHCenter)
+        self.label.setStyleSheet("font-size: 24px; font-weight: bold; color: white;")
+        self.layout.addWidget(self.label)
+
+        self.broadcasters_input = QLineEdit(self)
+        self.broadcasters_input.setPlaceholderText("Broadcaster names, separated by commas")
+        self.broadcasters_input.setStyleSheet("color: white;")
+        self.broadcasters_input.returnPressed.connect(self.start_ranking)
+        self.layout.addWidget(self.broadcasters_input)
+
+        self.options_layout = QHBoxLayout()
+        self.range_preset_input = QComboBox(self)
+        self.range_preset_input.addItems([preset for preset, value in PRESETS.items() if value is not None])
+        self.range_preset_input.setCurrentText("Last 30 days")
+        self.range_preset_input.setStyleSheet("color: white;")
+        self.options_layout.addWidget(self.range_preset_input)
+
+        self.size_input = QSpinBox(self)
+        self.size_input.setRange(1, 1000)
+        self.size_input.setValue(DEFAULT_SIZE)
+        self.size_input.setPrefix("Top ")
+        self.size_input.setStyleSheet("color: white;")
+        self.options_layout.addWidget(self.size_input)
+
+        self.grouping_input = QComboBox(self)
+        self.grouping_input.addItem("Overall", "overall")
+        for grouping in GROUPINGS:
+            self.grouping_input.addItem(f"Per {grouping}", grouping)
+        self.grouping_input.setToolTip(f"Per group: the {DEFAULT_GROUP_SIZE} most viewed clips of the "
+                                       f"{DEFAULT_MAX_GROUPS} groups with the most views")
+        self.grouping_input.setStyleSheet("color: white;")
+        self.grouping_input.currentIndexChanged.connect(self.show_results)
+        self.options_layout.addWidget(self.grouping_input)
+
+        self.rank_button = QPushButton("Rank", self)
+        self.rank_button.setStyleSheet("color: white;")
+        self.rank_button.clicked.connect(self.start_ranking)
+        self.options_layout.addWidget(self.rank_button)
+
+        self.cancel_button = QPushButton("Cancel", self)
+        self.cancel_button.setStyleSheet("color: white;")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(lambda: self.jobs.cancel("leaderboard"))
+        self.options_layout.addWidget(self.cancel_button)
+        self.layout.addLayout(self.options_layout)
+
+        self.results_tree = QTreeWidget(self)
+        self.results_tree.setHeaderLabels(["Views", "Broadcaster", "Title", "Created"])
+        self.results_tree.setUniformRowHeights(True)
+        self.results_tree.setStyleSheet("color: white;")
+        self.results_tree.itemDoubleClicked.connect(self.open_clip)
+        self.layout.addWidget(self.results_tree)
+
+    def start_ranking(self):
+        broadcasters = [name.strip() for name in self.broadcasters_input.text().split(",") if name.strip()]
+        if not broadcasters:
+            self.status_update.emit("Error: Enter at least one broadcaster name.")
+            return
+        job = self.jobs.start("leaderboard")
+        thread = LeaderboardThread(list(dict.fromkeys(broadcasters)), self.range_preset_input.currentText(),
+                                   self.size_input.value(), job, self)
+        thread.leaderboard_completed.connect(self.on_completed)
+        thread.leaderboard_failed.connect(lambda message: self.status_update.emit(message))
+        thread.leaderboard_cancelled.connect(lambda: self.status_update.emit("Info: Ranking cancelled."))
+        thread.finished.connect(lambda: self.on_finished(job))
+        thread.finished.connect(thread.deleteLater)
+        self.rank_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        thread.start()
+
+    def on_finished(self, job):
+        self.jobs.finish(job)
+        if not self.jobs.is_running("leaderboard"):
+            self.rank_button.setEnabled(True)
+            self.cancel_button.setEnabled(False)
+
+    def on_completed(self, results):
+        self.results = results
+        self.status_update.emit(results["message"])
+        self.show_results()
+
+    def add_clip_item(self, parent, clip):
+        item = QTreeWidgetItem(parent, [str(clip.view_count), clip.broadcaster_name, clip.title, clip.created_at[:10]])
+        item.setTextAlignment(0, Qt.AlignRight)
+        item.setToolTip(2, f"{clip.title}\nby {clip.creator_name}\nDouble-click to open")
+        item.setData(0, Qt.UserRole, clip.url)
+        return item
+
+    def show_results(self):
+        self.results_tree.clear()
+        if not self.results:
+            return
+        grouping = self.grouping_input.currentData()
+        if grouping == "overall":
+            for clip in self.results["overall"]:
+                self.add_clip_item(self.results_tree, clip)
+            return
+        for group in self.results[grouping]:
+            group_item = QTreeWidgetItem(self.results_tree, [str(group["views"]), "", f"{group['name']} ({group['clips']} clips)", ""])
+            group_item.setTextAlignment(0, Qt.AlignRight)
+            for clip in group["top"]:
+                self.add_clip_item(group_item, clip)
+            group_item.setExpanded(True)
+
+    def open_clip(self, item):
+        url = item.data(0, Qt.UserRole)
+        if url:
+            QDesktopServices.openUrl(QUrl(url))
@@ -0,0 +1,280 @@
+import gc
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QObject, QTimer, QItemSelection, QItemSelectionModel
+from clip_store import Clip
+from functions import game_cache
+from home_widget import DownloadClipsThread
+from window import MainWindow
+from jobs import JobCancelled
+import metrics
+
+# Default report file, stored next to config.json
+LOADTEST_FILE = "tc_guidl_loadtest.json"
+# Interval of the frame probe, one frame at 60 Hz
+FRAME_INTERVAL_MS = 16
+# Event loop gaps longer than this count as stall
+STALL_THRESHOLD_MS = 100
+# Types whose live instances are counted after every cycle
+TRACKED_TYPES = ("Clip", "ClipIndex", "SearchClipsThread", "DownloadClipsThread", "SyntheticDownloadThread",
+                 "QListWidgetItem", "ThumbnailTask", "JobControl")
+# Words for synthetic clip titles
+TITLE_WORDS = ("clutch", "insane", "fail", "win", "chat", "rage", "lol", "ace", "boss", "speedrun", "glitch", "pog")
+# Synthetic games, put into the game cache so no Helix request is made
+SYNTHETIC_GAMES = {str(100000 + index): f"Synthetic Game {index}" for index in range(20)}
+
+
+def generate_clips(count, seed=0):
+    """
+    Generate Helix-like clips.
+
+    The same seed always produces the same clips. Thumbnail URLs are left
+    empty, so the thumbnail loader does not make network requests.
+
+    Returns:
+        list: Clip records.
+    """
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    game_ids = sorted(SYNTHETIC_GAMES)
+    clips = []
+    for index in range(count):
+        clip_id = f"SyntheticClip{seed}x{index:06d}"
+        has_vod = rng.random() < 0.7
+        clips.append(Clip.from_helix({
+            "id": clip_id,
+            "url": f"https://clips.twitch.tv/{clip_id}",
+            "broadcaster_id": "0",
+            "broadcaster_name": "loadtest",
+            "creator_name": f"creator{rng.randrange(500)}",
+            "title": " ".join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(2, 8))),
+            "game_id": rng.choice(game_ids),
+            "created_at": (start + timedelta(seconds=rng.randrange(365 * 86400))).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "view_count": int(rng.paretovariate(1.2) * 10),
+            "duration": round(rng.uniform(5, 60), 1),
+            "video_id": str(rng.randrange(10 ** 9)) if has_vod else "",
+            "vod_offset": rng.randrange(36000) if has_vod else None,
+            "thumbnail_url": "",
+        }))
+    return clips
+
+
+class SyntheticDownloadThread(DownloadClipsThread):
+    """Download thread that only simulates the work, nothing is fetched or written."""
+
+    # Simulated seconds per clip
+    delay = 0.002
+
+    def run(self):
+        downloaded_files = []
+        try:
+            for clip in self.queue:
+                if self.job:
+                    self.job.check()
+                time.sleep(self.delay)
+                self.parent().status_update.emit(f"Downloading clip: {clip.filename}")
+                downloaded_files.append(clip.filename)
+            self.download_completed.emit(downloaded_files)
+        except JobCancelled:
+            self.download_cancelled.emit()
+
+
+class FrameProbe(QObject):
+    """
+    Measure how long the Qt event loop is blocked.
+
+    A timer fires every frame; a late tick means the GUI thread was busy and
+    the window could not repaint for that long.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.last_tick = None
+        self.stalls = 0
+        self.max_gap_ms = 0.0
+        self.timer = QTimer(self)
+        self.timer.setInterval(FRAME_INTERVAL_MS)
+        self.timer.timeout.connect(self.tick)
+
+    def start(self):
+        self.last_tick = time.perf_counter()
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    def tick(self):
+        now = time.perf_counter()
+        gap_ms = (now - self.last_tick) * 1000
+        self.last_tick = now
+        metrics.observe("gui.frame_ms", gap_ms)
+        self.max_gap_ms = max(self.max_gap_ms, gap_ms)
+        if gap_ms > STALL_THRESHOLD_MS:
+            self.stalls += 1
+            metrics.count("gui.frame_stalls")
+
+
+def get_peak_rss_mb():
+    """Return the peak resident memory of this process in MB, or None if unknown on this platform."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return round(peak / 1024 / (1024 if sys.platform == "darwin" else 1), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / 1024 / 1024, 1)
+    except (ImportError, AttributeError):
+        return None
+
+
+def count_objects():
+    """Count the live instances of the tracked types."""
+    counts = Counter(type(obj).__name__ for obj in gc.get_objects())
+    return {name: counts.get(name, 0) for name in TRACKED_TYPES}
+
+
+def process_events(app, seconds):
+    """Run the event loop for a while, as if the user was watching."""
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def run_load_test(clips_per_search=20000, downloads_per_cycle=2000, cycles=5, hours=None, seed=0, status_callback=None):
+    """
+    Feed synthetic searches and downloads through the main window.
+
+    Every cycle shows a new set of generated clips with
+    HomeWidget.on_search_completed(), selects the first clips and runs a
+    simulated download through HomeWidget.download_selected_clips(). After
+    each cycle the frame stalls, the peak RSS and the live object counts are
+    sampled, so growth between cycles points to retained clips, threads or
+    list items.
+
+    Args:
+        clips_per_search (int): Clips per simulated search.
+        downloads_per_cycle (int): Clips queued for the simulated download.
+        cycles (int): Number of search/download cycles.
+        hours (float, optional): Soak mode, repeat cycles for this many hours instead.
+        seed (int): Seed of the generated data, the same seed gives the same run.
+        status_callback (callable, optional): Receives progress messages.
+
+    Returns:
+        dict: The samples per cycle and a summary.
+    """
+    app = QApplication.instance() or QApplication(sys.argv)
+    game_cache.update(SYNTHETIC_GAMES)
+    metrics.reset_metrics()
+
+    window = MainWindow()
+    window.show()
+    home = window.home_widget
+    home.download_thread_class = SyntheticDownloadThread
+    home.download_folder_input.setText(tempfile.gettempdir())
+    window.show_home_widget()
+
+    probe = FrameProbe()
+    probe.start()
+    samples = []
+    started = time.monotonic()
+    cycle = 0
+    while (hours is not None and time.monotonic() - started < hours * 3600) or (hours is None and cycle < cycles):
+        clips = generate_clips(clips_per_search, seed + cycle)
+        cycle_stalls = probe.stalls
+
+        home.reset_clip_list()
+        with metrics.span("loadtest.search_completed"):
+            home.on_search_completed(clips)
+        del clips
+        process_events(app, 0.5)
+
+        # Select the first clips at once, like a Shift+Click
+        home.clips_list.clearSelection()
+        last_row = min(downloads_per_cycle, home.clips_list.count()) - 1
+        if last_row >= 0:
+            model = home.clips_list.model()
+            selection = QItemSelection(model.index(0, 0), model.index(last_row, 0))
+            home.clips_list.selectionModel().select(selection, QItemSelectionModel.Select)
+        download_started = time.perf_counter()
+        home.download_selected_clips()
+        while home.jobs.is_running("download") or home.download_thread is not None:
+            process_events(app, 0.05)
+        metrics.observe("loadtest.download", (time.perf_counter() - download_started) * 1000)
+        process_events(app, 0.2)
+
+        gc.collect()
+        sample = {
+            "cycle": cycle,
+            "elapsed_s": round(time.monotonic() - started, 1),
+            "peak_rss_mb": get_peak_rss_mb(),
+            "frame_stalls": probe.stalls - cycle_stalls,
+            "list_items": home.clips_list.count(),
+            "objects": count_objects(),
+        }
+        samples.append(sample)
+        if status_callback:
+            status_callback(f"Cycle {cycle}: peak RSS {sample['peak_rss_mb']} MB, {sample['frame_stalls']} stalls, objects {sample['objects']}")
+        cycle += 1
+
+    probe.stop()
+    home.jobs.cancel_all()
+    window.close()
+
+    first, last = samples[0], samples[-1]
+    rss_growth = None
+    if first["peak_rss_mb"] is not None:
+        rss_growth = round(last["peak_rss_mb"] - first["peak_rss_mb"], 1)
+    return {
+        "settings": {"clips_per_search": clips_per_search, "downloads_per_cycle": downloads_per_cycle,
+                     "cycles": cycle, "hours": hours, "seed": seed},
+        "summary": {
+            "frame_stalls": probe.stalls,
+            "max_frame_gap_ms": round(probe.max_gap_ms, 1),
+            "peak_rss_mb": last["peak_rss_mb"],
+            "rss_growth_mb": rss_growth,
+            "object_growth": {name: last["objects"][name] - first["objects"][name] for name in TRACKED_TYPES},
+        },
+        "samples": samples,
+        "metrics": metrics.snapshot(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load and soak test of the GUI clip pipeline with synthetic clips.")
+    parser.add_argument("--clips", type=int, default=20000, help="Clips per simulated search")
+    parser.add_argument("--downloads", type=int, default=2000, help="Clips per simulated download")
+    parser.add_argument("--cycles", type=int, default=5, help="Number of search/download cycles")
+    parser.add_argument("--hours", type=float, help="Soak mode: repeat cycles for this many hours")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data")
+    parser.add_argument("--output", "-o", default=LOADTEST_FILE, help="The report file")
+    parser.add_argument("--max-stall-ms", type=float, help="Fail if the event loop was ever blocked longer")
+    parser.add_argument("--max-rss-growth-mb", type=float, help="Fail if the peak RSS grew more between the first and last cycle")
+    args = parser.parse_args()
+
+    report = run_load_test(args.clips, args.downloads, args.cycles, args.hours, args.seed, status_callback=print)
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=4)
+    print(f"Report saved to {args.output}.")
+    print(json.dumps(report["summary"], indent=4))
+
+    summary = report["summary"]
+    failed = False
+    if args.max_stall_ms is not None and summary["max_frame_gap_ms"] > args.max_stall_ms:
+        print(f"Error: Event loop blocked for {summary['max_frame_gap_ms']} ms (limit {args.max_stall_ms} ms).")
+        failed = True
+    if args.max_rss_growth_mb is not None and summary["rss_growth_mb"] is not None \
+            and summary["rss_growth_mb"] > args.max_rss_growth_mb:
+        print(f"Error: Peak RSS grew by {summary['rss_growth_mb']} MB (limit {args.max_rss_growth_mb} MB).")
+        failed = True
+    sys.exit(1 if failed else 0)
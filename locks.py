@@ -0,0 +1,222 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import socket
+import threading
+
+# Lock files of clips that are being downloaded, inside every download folder
+LOCK_FOLDER = ".tc_guidl_locks"
+# A lock whose owner did not renew it for this long is stale and can be taken over
+LEASE_SECONDS = 300
+# Held locks are renewed this often
+RENEW_INTERVAL = 60
+# Seconds between attempts to claim a clip that another instance is downloading
+WAIT_INTERVAL = 2
+
+HOST = socket.gethostname()
+UNSAFE_CHARACTERS = re.compile(r"[^\w.@-]")
+
+
+class ClipLocked(Exception):
+    """Raised when another instance is downloading a clip."""
+
+    def __init__(self, holder):
+        super().__init__(f"Clip is being downloaded by {holder.get('host', 'another instance')}.")
+        self.holder = holder
+
+
+def is_process_alive(pid):
+    """Check whether a process of this computer is still running, True if unknown."""
+    if sys.platform == "win32":
+        try:
+            import psutil
+            return psutil.pid_exists(pid)
+        except ImportError:
+            return True  # os.kill() would terminate the process on Windows; wait for the lease to expire
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ClipLock:
+    """
+    Lease on a clip in a download folder that several instances share, e.g. on a network drive.
+
+    The lock file is created exclusively (O_CREAT | O_EXCL), so exactly one
+    instance gets it. While it is held, the lease is renewed in the
+    background; a lock that was not renewed within LEASE_SECONDS, or whose
+    process on the same computer is gone, is stale. A stale lock is renamed
+    away before it is claimed again, so two instances recovering the same
+    lock cannot both win.
+    """
+
+    def __init__(self, dl_folder, name):
+        self.path = os.path.join(dl_folder, LOCK_FOLDER, UNSAFE_CHARACTERS.sub("_", name) + ".lock")
+        self.token = uuid.uuid4().hex
+        self.held = False
+        self.lost = False
+
+    def content(self):
+        return {"token": self.token, "host": HOST, "pid": os.getpid(), "expires_at": time.time() + LEASE_SECONDS}
+
+    def read_holder(self, path=None):
+        """Return the content of a lock file, {} if it does not exist."""
+        path = path or self.path
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            # Being written right now, or left half-written by a crash: the file time tells the age
+            try:
+                return {"expires_at": os.path.getmtime(path) + LEASE_SECONDS}
+            except OSError:
+                return {}
+
+    def is_stale(self, holder):
+        if holder.get("expires_at", 0) < time.time():
+            return True
+        return holder.get("host") == HOST and holder.get("pid") and not is_process_alive(holder["pid"])
+
+    def acquire(self):
+        """
+        Claim the clip.
+
+        Returns:
+            bool: True if the lock is held now.
+
+        Raises:
+            ClipLocked: If another instance holds a valid lease.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        for _ in range(3):
+            try:
+                descriptor = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                holder = self.read_holder()
+                if holder and not self.is_stale(holder):
+                    raise ClipLocked(holder)
+                if holder:
+                    self.break_stale(holder)
+                continue
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                json.dump(self.content(), file)
+            self.held = True
+            get_lease_keeper().add(self)
+            return True
+        raise ClipLocked(self.read_holder())
+
+    def break_stale(self, holder):
+        """Move a stale lock out of the way, restoring it if another instance claimed it in the meantime."""
+        stale_path = f"{self.path}.{self.token}.stale"
+        try:
+            os.rename(self.path, stale_path)
+        except OSError:
+            return  # Already broken by another instance
+        if self.read_holder(stale_path).get("token") != holder.get("token") and not os.path.exists(self.path):
+            os.rename(stale_path, self.path)
+            return
+        print(f"Info: Recovered stale download lock of {holder.get('host', 'unknown host')}: {os.path.basename(self.path)}")
+        try:
+            os.remove(stale_path)
+        except OSError:
+            pass
+
+    def renew(self):
+        """Extend the lease; marks the lock as lost if another instance took it over."""
+        if not self.held:
+            return
+        if self.read_holder().get("token") not in (self.token, None):
+            self.lost = True
+            print(f"Warning: Download lock was taken over by another instance: {os.path.basename(self.path)}")
+            return
+        try:
+            with open(self.path, "w", encoding="utf-8") as file:
+                json.dump(self.content(), file)
+        except OSError as e:
+            print(f"Warning: Unable to renew download lock {os.path.basename(self.path)}. {e}")
+
+    def release(self):
+        if not self.held:
+            return
+        self.held = False
+        get_lease_keeper().remove(self)
+        if not self.lost and self.read_holder().get("token") == self.token:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class LeaseKeeper:
+    """Background thread that renews the locks held by this process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.locks = set()
+        self.thread = threading.Thread(target=self.run, name="lease-keeper", daemon=True)
+        self.thread.start()
+
+    def add(self, clip_lock):
+        with self.lock:
+            self.locks.add(clip_lock)
+
+    def remove(self, clip_lock):
+        with self.lock:
+            self.locks.discard(clip_lock)
+
+    def run(self):
+        while True:
+            time.sleep(RENEW_INTERVAL)
+            with self.lock:
+                locks = list(self.locks)
+            for clip_lock in locks:
+                clip_lock.renew()
+
+
+_lease_keeper = None
+_lease_keeper_lock = threading.Lock()
+
+
+def get_lease_keeper():
+    global _lease_keeper
+    with _lease_keeper_lock:
+        if _lease_keeper is None:
+            _lease_keeper = LeaseKeeper()
+        return _lease_keeper
+
+
+def active_locks(dl_folder):
+    """
+    Return the holders of the valid (not stale) locks of a download folder.
+
+    Returns:
+        list: The content of every lock file whose lease is still running.
+    """
+    lock_folder = os.path.join(dl_folder, LOCK_FOLDER)
+    if not os.path.isdir(lock_folder):
+        return []
+    holders = []
+    for name in os.listdir(lock_folder):
+        if not name.endswith(".lock"):
+            continue
+        clip_lock = ClipLock(dl_folder, name[:-len(".lock")])
+        holder = clip_lock.read_holder()
+        if holder and not clip_lock.is_stale(holder):
+            holders.append(holder)
+    return holders
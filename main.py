@@ -1,10 +1,13 @@
 from PySide6.QtWidgets import QApplication
 import sys
+import multiprocessing
 from qt_material import apply_stylesheet
 from window import MainWindow
 from functions import load_config
 
 if __name__ == "__main__":
+    # Required for download worker processes in the frozen Windows executable
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     apply_stylesheet(app, theme='dark_teal.xml')
 
@@ -0,0 +1,246 @@
+import sys
+import time
+import json
+import pstats
+import cProfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# Default export file, stored next to config.json
+METRICS_FILE = "tc_guidl_metrics.json"
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+# Global metrics registry
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_started_at = datetime.now()
+# Active cProfile session (None if profiling is off)
+_profiler = None
+# Profilers of the other threads of the session and the one of the calling thread, before Python 3.12
+_thread_profilers = []
+_thread_profiler = threading.local()
+# cProfile uses sys.monitoring from Python 3.12 on, one enable() then profiles every thread
+PROFILES_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+def _new_histogram():
+    return {"count": 0, "sum_ms": 0.0, "min_ms": None, "max_ms": None, "buckets": [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)}
+
+
+def count(name, value=1):
+    """Increase a counter."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def get_counter(name):
+    """Return the current value of a counter."""
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def observe(name, duration_ms):
+    """Record a duration in the latency histogram of a span."""
+    bucket = len(HISTOGRAM_BUCKETS_MS)
+    for index, upper_bound in enumerate(HISTOGRAM_BUCKETS_MS):
+        if duration_ms <= upper_bound:
+            bucket = index
+            break
+
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = _new_histogram()
+        histogram["count"] += 1
+        histogram["sum_ms"] += duration_ms
+        histogram["min_ms"] = duration_ms if histogram["min_ms"] is None else min(histogram["min_ms"], duration_ms)
+        histogram["max_ms"] = duration_ms if histogram["max_ms"] is None else max(histogram["max_ms"], duration_ms)
+        histogram["buckets"][bucket] += 1
+
+
+@contextmanager
+def span(name):
+    """Measure the duration of a block, e.g. `with span("helix.clips.page"): ...`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, (time.perf_counter() - start) * 1000)
+
+
+def record_response(name, response):
+    """Count a HTTP request and its payload size."""
+    count(f"{name}.requests")
+    count(f"{name}.bytes", len(response.content or b""))
+    if response.status_code >= 400:
+        count(f"{name}.errors.{response.status_code}")
+
+
+def cache_hit(name):
+    count(f"{name}.hits")
+
+
+def cache_miss(name):
+    count(f"{name}.misses")
+
+
+def snapshot():
+    """
+    Return a copy of all metrics.
+
+    Returns:
+        dict: Counters, histograms (incl. bucket bounds) and cache hit rates.
+    """
+    with _lock:
+        counters = dict(_counters)
+        histograms = {name: dict(histogram, buckets=list(histogram["buckets"])) for name, histogram in _histograms.items()}
+
+    cache_hit_rates = {}
+    for name, hits in counters.items():
+        if name.endswith(".hits"):
+            cache = name[:-len(".hits")]
+            total = hits + counters.get(f"{cache}.misses", 0)
+            cache_hit_rates[cache] = round(hits / total, 4) if total else None
+
+    return {
+        "started_at": _started_at.strftime("%Y-%m-%d %H:%M:%S"),
+        "exported_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "bucket_bounds_ms": list(HISTOGRAM_BUCKETS_MS),
+        "counters": counters,
+        "histograms": histograms,
+        "cache_hit_rates": cache_hit_rates,
+    }
+
+
+def export_metrics(file_path=METRICS_FILE):
+    """
+    Write the current metrics to a JSON file.
+
+    Returns:
+        dict: A dictionary indicating success or error details.
+    """
+    try:
+        with open(file_path, "w") as file:
+            json.dump(snapshot(), file, indent=4)
+        return {"success": True, "message": f"Metrics exported to {file_path}."}
+    except IOError as e:
+        return {"success": False, "error": "SaveError", "message": f"Failed to export metrics: {e}"}
+
+
+def reset_metrics():
+    """Clear all counters and histograms."""
+    global _started_at
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _started_at = datetime.now()
+
+
+def is_profiling():
+    return _profiler is not None
+
+
+class _ProfileSnapshot:
+    """Stats of a profiler that is still enabled in another thread, for pstats.Stats()."""
+
+    def __init__(self, profiler):
+        profiler.snapshot_stats()
+        self.stats = profiler.stats
+
+    def create_stats(self):
+        pass  # Profile.create_stats() would disable the profiler of the calling thread, not of its own
+
+
+def profile_current_thread(*args):
+    """
+    Profile the calling thread in the running session.
+
+    Before Python 3.12 a cProfile.Profile only sees the thread that enabled
+    it and must not be shared, so every thread gets its own one; they are
+    merged when the session stops. This is installed as threading profile
+    hook; QThreads are not covered by that hook and call this at the start of
+    run(). Threads that outlive a session (e.g. the lanes of jobs.py) drop
+    their profiler the next time they call this. From Python 3.12 on,
+    cProfile uses sys.monitoring and a single enable() already covers all
+    threads, so there is nothing to do.
+    """
+    if PROFILES_ALL_THREADS:
+        return
+    session = _profiler
+    profiler, profiler_session = getattr(_thread_profiler, "current", None) or (None, None)
+    if profiler is not None and profiler_session is not session:
+        profiler.disable()
+        profiler = _thread_profiler.current = None
+    if session is None or profiler is not None:
+        return
+    profiler = cProfile.Profile()
+    with _lock:
+        if _profiler is not session:
+            return
+        _thread_profilers.append(profiler)
+    _thread_profiler.current = (profiler, session)
+    profiler.enable()
+
+
+def start_profiling():
+    """
+    Start a cProfile session for the calling thread and all threads started from now on.
+
+    Returns:
+        dict: A dictionary indicating success or error details.
+    """
+    global _profiler
+    if _profiler is not None:
+        return {"success": True, "message": "Profiling is already running."}
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Another profiler (or debugger) owns the profiling hook
+        return {"success": False, "error": "ProfilerActive", "message": f"Failed to start profiling: {e}"}
+    with _lock:
+        _profiler = profiler
+        _thread_profilers.clear()
+    if not PROFILES_ALL_THREADS:
+        _thread_profiler.current = (profiler, profiler)
+        # The hook is called on every Python call of a thread until enable() replaces it
+        threading.setprofile(profile_current_thread)
+    return {"success": True, "message": "Profiling started."}
+
+
+def stop_profiling(file_path=None):
+    """
+    Stop the cProfile session and optionally save the stats (readable with pstats/snakeviz).
+
+    Before Python 3.12 the profilers of the other threads are merged into the
+    stats as they are at this moment.
+
+    Returns:
+        dict: A dictionary indicating success or error details.
+    """
+    global _profiler
+    with _lock:
+        profiler = _profiler
+        _profiler = None
+        thread_profilers = list(_thread_profilers)
+        _thread_profilers.clear()
+    if profiler is None:
+        return {"success": False, "error": "NotRunning", "message": "Profiling is not running."}
+
+    if not PROFILES_ALL_THREADS:
+        threading.setprofile(None)
+        _thread_profiler.current = None
+    profiler.disable()
+    if file_path:
+        try:
+            stats = pstats.Stats(profiler)
+            for thread_profiler in thread_profilers:
+                stats.add(pstats.Stats(_ProfileSnapshot(thread_profiler)))
+            stats.dump_stats(file_path)
+        except IOError as e:
+            return {"success": False, "error": "SaveError", "message": f"Failed to save profile: {e}"}
+        return {"success": True, "message": f"Profile saved to {file_path}."}
+    return {"success": True, "message": "Profiling stopped."}
@@ -0,0 +1,181 @@
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dedup import hash_file, record_entry
+from quality import DEFAULT_QUALITY
+from storage import is_remote_target
+from verify import MP4_EXTENSIONS, check_container, read_box_types
+
+# Valid values for the "postprocess" user setting
+POSTPROCESS_MODES = ("off", "faststart", "loudnorm")
+# EBU R128 targets of the loudness normalization
+LOUDNORM_FILTER = "loudnorm=I=-16:TP=-1.5:LRA=11"
+LOUDNORM_AUDIO_BITRATE = "160k"
+
+
+def is_ffmpeg_available():
+    return shutil.which("ffmpeg") is not None
+
+
+def is_faststart(file_path):
+    """Check whether the "moov" box of an MP4 file comes before the media data, so players can start before the download ends."""
+    try:
+        box_types = read_box_types(file_path)
+    except ValueError:
+        return False
+    return "moov" in box_types and "mdat" in box_types and box_types.index("moov") < box_types.index("mdat")
+
+
+def remux_clip(file_path, loudnorm=False):
+    """
+    Remux a clip into a faststart MP4 with ffmpeg, in a worker process of PostProcessor.
+
+    Video and audio are copied, only loudness normalization re-encodes the
+    audio. The result replaces the clip once ffmpeg succeeded and the new file
+    passed the container check.
+
+    Args:
+        file_path (str): The downloaded clip.
+        loudnorm (bool): Normalize the loudness of the audio track.
+
+    Returns:
+        dict: {"status": "done", "sha256", "size", "mtime"}, {"status": "unchanged"} or
+            {"status": "failed", "message"}.
+    """
+    if not file_path.lower().endswith(MP4_EXTENSIONS):
+        return {"status": "unchanged"}
+    if not loudnorm and is_faststart(file_path):
+        return {"status": "unchanged"}
+
+    temp_path = file_path + ".remux.part"
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", file_path,
+               "-map", "0:v?", "-map", "0:a?", "-c", "copy"]
+    if loudnorm:
+        command += ["-af", LOUDNORM_FILTER, "-c:a", "aac", "-b:a", LOUDNORM_AUDIO_BITRATE]
+    command += ["-movflags", "+faststart", "-f", "mp4", temp_path]
+    try:
+        process = subprocess.run(command, capture_output=True, text=True)
+        if process.returncode != 0:
+            return {"status": "failed", "message": process.stderr.strip().splitlines()[-1] if process.stderr.strip() else f"ffmpeg exit code {process.returncode}"}
+        reason = check_container(temp_path)
+        if reason:
+            return {"status": "failed", "message": f"Remuxed file is broken: {reason}"}
+        os.replace(temp_path, file_path)
+    except OSError as e:
+        return {"status": "failed", "message": str(e)}
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    stat = os.stat(file_path)
+    return {"status": "done", "sha256": hash_file(file_path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+class PostProcessor:
+    """
+    Remux finished downloads in a pool of worker processes.
+
+    Clips are submitted as soon as their download finished, so remuxing
+    runs while the next clips are downloaded. collect() records the new
+    hash and size of remuxed clips in the manifest and must be called from
+    the thread that downloads, close() waits for the remaining clips.
+    """
+
+    def __init__(self, dl_folder, loudnorm=False, processes=0, status_callback=None):
+        self.dl_folder = dl_folder
+        self.loudnorm = loudnorm
+        self.status_callback = status_callback
+        self.executor = ProcessPoolExecutor(max_workers=processes or os.cpu_count() or 1)
+        self.lock = threading.Lock()
+        self.pending = {}  # future -> (file_path, clip_id, quality, manifest)
+        self.remuxed = 0
+        self.failed = 0
+
+    def status(self, message):
+        print(message)
+        if self.status_callback:
+            self.status_callback(message)
+
+    def submit(self, file_path, clip_id=None, quality=DEFAULT_QUALITY, manifest=None):
+        """Queue a downloaded clip, the manifest (if given) is updated with the remuxed file."""
+        future = self.executor.submit(remux_clip, file_path, self.loudnorm)
+        with self.lock:
+            self.pending[future] = (file_path, clip_id, quality, manifest)
+
+    def collect(self, wait=False):
+        """Handle the clips that finished remuxing, with wait=True all submitted clips."""
+        with self.lock:
+            futures = [future for future in self.pending if wait or future.done()]
+        for future in futures:
+            with self.lock:
+                file_path, clip_id, quality, manifest = self.pending.pop(future)
+            if future.cancelled():
+                continue
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"status": "failed", "message": str(e)}
+
+            file_name = os.path.relpath(file_path, self.dl_folder).replace(os.sep, "/")
+            if result["status"] == "failed":
+                self.failed += 1
+                self.status(f"Warning: Post-processing failed for {file_name}. {result['message']}")
+            elif result["status"] == "done":
+                self.remuxed += 1
+                if manifest is not None and clip_id:
+                    record_entry(self.dl_folder, manifest, clip_id, file_name, result["sha256"], result["size"], result["mtime"], quality)
+
+    def close(self, cancel=False):
+        """
+        Wait for the submitted clips and stop the worker processes.
+
+        Args:
+            cancel (bool): Drop the clips that have not started yet.
+        """
+        if cancel:
+            with self.lock:
+                for future in self.pending:
+                    future.cancel()
+        self.collect(wait=True)
+        self.executor.shutdown()
+        if self.remuxed or self.failed:
+            self.status(f"Info: {self.remuxed} clips post-processed, {self.failed} failed.")
+
+
+class FinishedDownloads:
+    """Collects the clips a download worker process finished, so its parent can post-process them."""
+
+    def __init__(self):
+        self.items = []
+
+    def submit(self, file_path, clip_id=None, quality=DEFAULT_QUALITY, manifest=None):
+        self.items.append((file_path, clip_id, quality))
+
+    def collect(self, wait=False):
+        pass
+
+
+def create_postprocessor(dl_folder, user_config, status_callback=None):
+    """
+    Create the post-processing stage configured in the user settings.
+
+    Returns:
+        PostProcessor: The post-processor, or None if post-processing is off or not possible.
+    """
+    mode = user_config.get("postprocess", "off")
+    if mode not in POSTPROCESS_MODES or mode == "off":
+        return None
+    message = None
+    if is_remote_target(dl_folder):
+        message = "Warning: Post-processing needs a local download folder, clips are stored as downloaded."
+    elif not is_ffmpeg_available():
+        message = "Warning: Post-processing needs ffmpeg, clips are stored as downloaded."
+    if message:
+        print(message)
+        if status_callback:
+            status_callback(message)
+        return None
+    return PostProcessor(dl_folder, loudnorm=mode == "loudnorm", processes=user_config.get("postprocess_processes", 0),
+                         status_callback=status_callback)
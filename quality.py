@@ -0,0 +1,160 @@
+import os
+import re
+
+# Quality offered in the GUI; any "<height>p", "<kbps>k" or "<height>p@<kbps>k" works as well
+QUALITY_PRESETS = ("source", "1080p", "720p", "480p", "360p", "audio")
+DEFAULT_QUALITY = "source"
+# Rough bytes per second of a Twitch clip by maximum height, used for size estimates
+BYTES_PER_SECOND_BY_HEIGHT = ((360, 110_000), (480, 190_000), (720, 400_000), (1080, 750_000))
+SOURCE_BYTES_PER_SECOND = 750_000
+AUDIO_BYTES_PER_SECOND = 20_000
+QUALITY_PATTERN = re.compile(r"^(?:(\d+)p)?(?:@?(\d+)k)?$")
+
+
+def parse_quality(text):
+    """
+    Parse a quality profile.
+
+    Args:
+        text (str): "source", "audio", a maximum height ("480p"), a maximum bitrate
+            in kbit/s ("1500k") or both ("720p@2500k").
+
+    Returns:
+        dict: {"name", "max_height", "max_bitrate", "audio_only"}
+
+    Raises:
+        ValueError: If the text is not a valid profile.
+    """
+    name = (text or DEFAULT_QUALITY).strip().lower()
+    profile = {"name": name, "max_height": None, "max_bitrate": None, "audio_only": False}
+    if name == "source":
+        return profile
+    if name == "audio":
+        profile["audio_only"] = True
+        return profile
+
+    match = QUALITY_PATTERN.match(name)
+    if not match or not any(match.groups()):
+        raise ValueError(f"Invalid quality '{text}', use e.g. source, 720p, 1500k, 720p@2500k or audio.")
+    if match.group(1):
+        profile["max_height"] = int(match.group(1))
+    if match.group(2):
+        profile["max_bitrate"] = int(match.group(2))
+    return profile
+
+
+def is_source(profile):
+    return profile["name"] == "source"
+
+
+def get_format_options(profile):
+    """
+    Return the yt-dlp options that select the format of a profile.
+
+    Formats without height or bitrate information are accepted ("<=?"), the
+    smallest format is the fallback if nothing matches. Audio-only profiles
+    extract the audio track with ffmpeg.
+    """
+    if is_source(profile):
+        return {}
+    if profile["audio_only"]:
+        return {
+            "format": "bestaudio/worst",
+            "postprocessors": [{"key": "FFmpegExtractAudio", "preferredcodec": "m4a"}],
+        }
+
+    conditions = ""
+    if profile["max_height"]:
+        conditions += f"[height<=?{profile['max_height']}]"
+    if profile["max_bitrate"]:
+        conditions += f"[tbr<=?{profile['max_bitrate']}]"
+    return {"format": f"best{conditions}/worst"}
+
+
+def get_quality_filename(filename, profile):
+    """
+    Return the file name of a clip in a profile, e.g. "clip.mp4" -> "clip [480p].mp4".
+
+    Lower quality copies get their own name, so a later source quality
+    download does not mistake them for the full clip.
+    """
+    if is_source(profile):
+        return filename
+    base = filename[:-len(".mp4")] if filename.endswith(".mp4") else filename
+    extension = ".m4a" if profile["audio_only"] else ".mp4"
+    return f"{base} [{profile['name']}]{extension}"
+
+
+def get_source_filename(filename, profile):
+    """Reverse get_quality_filename(), e.g. "clip [480p].mp4" -> "clip.mp4"."""
+    if is_source(profile):
+        return filename
+    base = os.path.splitext(filename)[0]
+    suffix = f" [{profile['name']}]"
+    if base.endswith(suffix):
+        base = base[:-len(suffix)]
+    return base + ".mp4"
+
+
+def get_bytes_per_second(profile):
+    """Estimate the bytes per second of a clip in a profile."""
+    if profile["audio_only"]:
+        return AUDIO_BYTES_PER_SECOND
+    bytes_per_second = SOURCE_BYTES_PER_SECOND
+    if profile["max_height"]:
+        for height, rate in BYTES_PER_SECOND_BY_HEIGHT:
+            if profile["max_height"] <= height:
+                bytes_per_second = rate
+                break
+    if profile["max_bitrate"]:
+        bytes_per_second = min(bytes_per_second, profile["max_bitrate"] * 1000 // 8)
+    return bytes_per_second
+
+
+def satisfies(existing_quality, wanted_quality):
+    """Check whether an existing copy can be used instead of downloading a clip in a quality."""
+    return existing_quality == wanted_quality or existing_quality == "source"
+
+
+def resolve_quality(broadcaster_name, run_quality, user_config):
+    """
+    Return the quality of a clip.
+
+    Args:
+        broadcaster_name (str): The broadcaster of the clip.
+        run_quality (str): The quality chosen for this run, or None/"default" to use the settings.
+        user_config (dict): The user settings with "quality" and "quality_by_broadcaster".
+
+    Returns:
+        str: The quality profile name.
+    """
+    if run_quality and run_quality != "default":
+        return run_quality
+    by_broadcaster = {name.lower(): quality for name, quality in user_config.get("quality_by_broadcaster", {}).items()}
+    return by_broadcaster.get((broadcaster_name or "").lower(), user_config.get("quality", DEFAULT_QUALITY))
+
+
+def parse_quality_by_broadcaster(text):
+    """
+    Parse per-broadcaster qualities entered as "name=480p, other=audio".
+
+    Returns:
+        dict: {"qualities": {name: quality}} or an error message.
+    """
+    qualities = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        name, separator, quality = part.partition("=")
+        if not separator or not name.strip():
+            return {"error": "INVALID_QUALITY", "message": f"Error: Invalid broadcaster quality '{part.strip()}', use name=quality."}
+        try:
+            parse_quality(quality)
+        except ValueError as e:
+            return {"error": "INVALID_QUALITY", "message": f"Error: {e}"}
+        qualities[name.strip()] = quality.strip().lower()
+    return {"qualities": qualities}
+
+
+def format_quality_by_broadcaster(qualities):
+    return ", ".join(f"{name}={quality}" for name, quality in qualities.items())
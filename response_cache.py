@@ -0,0 +1,128 @@
+import os
+import gzip
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+# Cache folder, stored next to config.json
+CACHE_FOLDER = "helix_cache"
+# Windows ending more than this many seconds before the fetch are complete and never change
+CLOSED_WINDOW_MARGIN = 10 * 60
+# Time to live of windows that were still open when they were fetched
+OPEN_WINDOW_TTL = 5 * 60
+# Clips per page when replaying a cached window
+REPLAY_PAGE_SIZE = 100
+
+
+def get_cache_path(broadcaster_id, start_timestamp, end_timestamp, page_sizes):
+    """Return the cache file of an exact search window (RFC 3339 bounds)."""
+    key = f"{broadcaster_id}|{start_timestamp}|{end_timestamp}|{','.join(map(str, page_sizes))}"
+    return os.path.join(CACHE_FOLDER, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jsonl.gz")
+
+
+def is_closed_window(end_timestamp, fetched_at):
+    """Check whether a window ended long enough before it was fetched to be immutable."""
+    end = datetime.strptime(end_timestamp, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+    return end <= fetched_at - timedelta(seconds=CLOSED_WINDOW_MARGIN)
+
+
+def remove_stale_entry(cache_path, mtime):
+    """Remove an expired or broken cache entry, unless a writer replaced it since it was read."""
+    try:
+        if os.path.getmtime(cache_path) == mtime:
+            os.remove(cache_path)
+    except OSError:
+        pass  # Removed by another reader, or replaced and in use
+
+
+def read_cached_pages(cache_path):
+    """
+    Return a generator over the cached clip pages of a window, or None on a cache miss.
+
+    Expired entries of open windows are removed. The file is streamed, so
+    replaying a large window does not load it into memory at once.
+    """
+    mtime = None
+    try:
+        mtime = os.path.getmtime(cache_path)
+        with gzip.open(cache_path, "rt", encoding="utf-8") as file:
+            header = json.loads(file.readline())
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, json.JSONDecodeError):
+        remove_stale_entry(cache_path, mtime)
+        return None
+
+    if not header.get("closed") and time.time() - header.get("fetched_at", 0) > OPEN_WINDOW_TTL:
+        remove_stale_entry(cache_path, mtime)
+        return None
+
+    def pages():
+        with gzip.open(cache_path, "rt", encoding="utf-8") as file:
+            file.readline()  # Header
+            page = []
+            for line in file:
+                page.append(json.loads(line))
+                if len(page) >= REPLAY_PAGE_SIZE:
+                    yield page
+                    page = []
+            if page:
+                yield page
+
+    return pages()
+
+
+class CacheWriter:
+    """
+    Write the raw clips of a window to the cache while they are fetched.
+
+    The data goes to a temporary file that only replaces the cache entry on
+    commit(), so an interrupted or failed search never leaves a partial entry.
+    Every writer gets its own temporary file, so two searches of the same
+    window (e.g. GUI and job API) do not write into each other's file.
+    """
+
+    def __init__(self, cache_path, end_timestamp):
+        os.makedirs(CACHE_FOLDER, exist_ok=True)
+        self.cache_path = cache_path
+        descriptor, self.temp_path = tempfile.mkstemp(prefix=os.path.basename(cache_path) + ".", suffix=".tmp",
+                                                      dir=os.path.dirname(cache_path) or None)
+        os.close(descriptor)
+        fetched_at = datetime.now(timezone.utc)
+        header = {
+            "fetched_at": fetched_at.timestamp(),
+            "closed": is_closed_window(end_timestamp, fetched_at),
+        }
+        self.file = gzip.open(self.temp_path, "wt", encoding="utf-8")
+        self.file.write(json.dumps(header) + "\n")
+
+    def write_clips(self, clips):
+        for clip in clips:
+            self.file.write(json.dumps(clip, ensure_ascii=False) + "\n")
+
+    def commit(self):
+        self.file.close()
+        os.replace(self.temp_path, self.cache_path)
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+def clear_cache():
+    """
+    Remove all cached Helix responses.
+
+    Returns:
+        dict: A dictionary indicating success or error details.
+    """
+    try:
+        if os.path.isdir(CACHE_FOLDER):
+            shutil.rmtree(CACHE_FOLDER)
+        return {"success": True, "message": "API cache cleared."}
+    except OSError as e:
+        return {"success": False, "error": "DeleteError", "message": f"Failed to clear API cache: {e}"}
@@ -0,0 +1,107 @@
+import re
+import heapq
+import itertools
+import threading
+
+
+def created_at_number(clip):
+    """
+    Return the creation time of a clip as sortable number, e.g. "2025-01-31T22:00:00Z" -> 20250131220000.
+
+    Cheaper than parsing the timestamp, the queue of a large download is built in the GUI thread.
+    """
+    return int(re.sub(r"\D", "", clip.get("created_at", "")) or 0)
+
+
+# Download order policies: name -> (label, sort key, smaller keys are downloaded first)
+DOWNLOAD_POLICIES = {
+    "oldest": ("Oldest first", created_at_number),
+    "views": ("Most viewed first", lambda clip: -clip.get("view_count", 0)),
+    "shortest": ("Shortest first", lambda clip: clip.get("duration", 0.0)),
+    "newest": ("Newest first", lambda clip: -created_at_number(clip)),
+}
+DEFAULT_POLICY = "oldest"
+
+
+class DownloadQueue:
+    """
+    Priority queue of the clips of a download run.
+
+    Pinned clips come first in the order they were pinned, all other clips
+    in the order of the policy. Iterating the queue pops clips until it is
+    empty, so download_clips() and the process pool take the next clip only
+    when a worker is free. Changing the policy or pinning clips while the
+    download runs affects every clip that has not been started yet.
+
+    Entries are invalidated lazily: a reprioritized clip gets a new heap
+    entry with a higher version and the outdated entry is skipped on pop.
+    """
+
+    def __init__(self, clips, policy=DEFAULT_POLICY, pinned_ids=()):
+        self.lock = threading.Lock()
+        self.clips = {clip.get("id"): clip for clip in clips}
+        self.policy = policy if policy in DOWNLOAD_POLICIES else DEFAULT_POLICY
+        self.pins = {}  # clip_id -> pin order
+        self.pin_counter = itertools.count()
+        self.versions = {}
+        # Keeps the original order for equal keys
+        self.positions = {clip_id: index for index, clip_id in enumerate(self.clips)}
+        self.heap = []
+        for clip_id in pinned_ids:
+            if clip_id in self.clips:
+                self.pins[clip_id] = next(self.pin_counter)
+        self.rebuild()
+
+    def entry(self, clip_id):
+        version = self.versions[clip_id] = self.versions.get(clip_id, 0) + 1
+        pin = self.pins.get(clip_id)
+        key = DOWNLOAD_POLICIES[self.policy][1](self.clips[clip_id])
+        return (pin is None, pin or 0, key, self.positions[clip_id], version, clip_id)
+
+    def rebuild(self):
+        self.heap = [self.entry(clip_id) for clip_id in self.clips]
+        heapq.heapify(self.heap)
+
+    def set_policy(self, policy):
+        """Reorder the remaining clips by another policy."""
+        if policy not in DOWNLOAD_POLICIES:
+            raise ValueError(f"Unknown download policy '{policy}'.")
+        with self.lock:
+            self.policy = policy
+            self.rebuild()
+
+    def pin(self, clip_id):
+        """Move a clip to the front of the queue, after the clips pinned before it."""
+        with self.lock:
+            if clip_id not in self.clips or clip_id in self.pins:
+                return False
+            self.pins[clip_id] = next(self.pin_counter)
+            heapq.heappush(self.heap, self.entry(clip_id))
+            return True
+
+    def unpin(self, clip_id):
+        with self.lock:
+            if self.pins.pop(clip_id, None) is None or clip_id not in self.clips:
+                return False
+            heapq.heappush(self.heap, self.entry(clip_id))
+            return True
+
+    def pop(self):
+        """Return the next clip to download, or None if the queue is empty."""
+        with self.lock:
+            while self.heap:
+                *_, version, clip_id = heapq.heappop(self.heap)
+                if clip_id in self.clips and self.versions.get(clip_id) == version:
+                    return self.clips.pop(clip_id)
+            return None
+
+    def __len__(self):
+        with self.lock:
+            return len(self.clips)
+
+    def __iter__(self):
+        while True:
+            clip = self.pop()
+            if clip is None:
+                return
+            yield clip
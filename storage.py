@@ -0,0 +1,301 @@
+import os
+import uuid
+import shutil
+import threading
+import posixpath
+
+# Targets starting with this scheme are stored in an S3-compatible bucket, e.g. "s3://bucket/clips"
+S3_SCHEME = "s3://"
+# Size of the parts of a multipart upload (S3 requires at least 5 MiB except for the last part)
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Open backends by target, so clients and pending manifest lines are shared within a process
+_storages = {}
+_storages_lock = threading.Lock()
+
+
+def is_remote_target(target):
+    """Check whether a download target is an object storage URL instead of a local folder."""
+    return bool(target) and target.lower().startswith(S3_SCHEME)
+
+
+def get_storage(target):
+    """
+    Return the storage backend of a download target.
+
+    Args:
+        target (str): A local folder or an "s3://bucket/prefix" URL. The endpoint of
+            S3-compatible servers (MinIO, ...) and the credentials are taken from the
+            usual AWS environment variables / config files, e.g. AWS_ENDPOINT_URL.
+
+    Returns:
+        LocalStorage or S3Storage: The backend.
+    """
+    with _storages_lock:
+        storage = _storages.get(target)
+        if storage is None:
+            if is_remote_target(target):
+                bucket, _, prefix = target[len(S3_SCHEME):].partition("/")
+                storage = S3Storage(bucket, prefix)
+            else:
+                storage = LocalStorage(target)
+            _storages[target] = storage
+        return storage
+
+
+def link_file(source_path, target_path):
+    """
+    Create a hard link, replacing the target if it already exists.
+
+    Returns:
+        bool: True if the link was created, False if the file system does not support it.
+    """
+    temp_path = target_path + ".tclink"
+    try:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        os.link(source_path, temp_path)
+        os.replace(temp_path, target_path)
+        return True
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
+
+
+class LocalStorage:
+    """
+    Files in a local download folder.
+
+    Keys are file names relative to the folder with "/" as separator.
+    """
+
+    is_local = True
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        return os.path.normpath(os.path.join(self.root, key))
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def size(self, key):
+        return os.path.getsize(self.path(key))
+
+    def read_text(self, key):
+        """Return the content of a text file, or None if it does not exist."""
+        try:
+            with open(self.path(key), "r", encoding="utf-8") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def append_text(self, key, text):
+        with open(self.path(key), "a", encoding="utf-8") as file:
+            file.write(text)
+
+    def open_upload(self, key):
+        return LocalUpload(self.path(key))
+
+    def copy(self, source_key, target_key):
+        """Hard-link a file to a second name, returns False if the file system does not support it."""
+        target_path = self.path(target_key)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        return link_file(self.path(source_key), target_path)
+
+    def remove(self, key):
+        if self.exists(key):
+            os.remove(self.path(key))
+
+    def free_space(self):
+        """Return the free bytes of the folder."""
+        os.makedirs(self.root, exist_ok=True)
+        return shutil.disk_usage(self.root).free
+
+    def take_pending(self):
+        return {}  # Appended text is written at once
+
+    def flush(self):
+        pass
+
+
+class LocalUpload:
+    """Write a file through a temporary file that only replaces the target on commit()."""
+
+    def __init__(self, file_path):
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        self.file_path = file_path
+        self.temp_path = file_path + ".part"
+        self.file = open(self.temp_path, "wb")
+
+    def write(self, data):
+        self.file.write(data)
+
+    def commit(self):
+        self.file.close()
+        os.replace(self.temp_path, self.file_path)
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class S3Storage:
+    """
+    Objects in an S3-compatible bucket (requires boto3).
+
+    Clip bytes are streamed into multipart uploads, nothing is stored on the
+    local disk. Objects cannot be appended to, so appended text (the
+    manifest) is kept per process until flush() writes it as a new segment
+    object "<key>.d/<session>-<number>.jsonl"; read_text() joins the base
+    object, all segments and the text not flushed yet. Parallel download
+    processes therefore never overwrite each other's manifest lines, and
+    every line is uploaded once.
+    """
+
+    is_local = False
+
+    def __init__(self, bucket, prefix=""):
+        import boto3
+
+        self.client = boto3.client("s3")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.session = uuid.uuid4().hex
+        self.segments = 0  # Segments written by this session
+        self.pending = {}  # key -> appended text of this session that was not flushed yet
+        self.lock = threading.Lock()
+
+    def object_key(self, key):
+        return posixpath.join(self.prefix, key) if self.prefix else key
+
+    def path(self, key):
+        return f"{S3_SCHEME}{self.bucket}/{self.object_key(key)}"
+
+    def head(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def exists(self, key):
+        return self.head(key) is not None
+
+    def size(self, key):
+        return self.head(key)["ContentLength"]
+
+    def read_object(self, object_key):
+        response = self.client.get_object(Bucket=self.bucket, Key=object_key)
+        return response["Body"].read().decode("utf-8")
+
+    def read_text(self, key):
+        """Return the content of a text object and its segments, or None if none exists."""
+        parts = []
+        if self.exists(key):
+            parts.append(self.read_object(self.object_key(key)))
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.object_key(key) + ".d/"):
+            for item in page.get("Contents", []):
+                parts.append(self.read_object(item["Key"]))
+        with self.lock:
+            if key in self.pending:
+                parts.append(self.pending[key])
+        return "".join(parts) if parts else None
+
+    def append_text(self, key, text):
+        with self.lock:
+            self.pending[key] = self.pending.get(key, "") + text
+
+    def take_pending(self):
+        """
+        Return and forget the text appended since the last flush, e.g. to pass it to another process.
+
+        Returns:
+            dict: key -> appended text, for append_text() of the receiving storage.
+        """
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        return pending
+
+    def flush(self):
+        """Write the text appended since the last flush as new segments."""
+        with self.lock:
+            pending = dict(self.pending)
+        for key, text in pending.items():
+            with self.lock:
+                self.segments += 1
+                segment_key = self.object_key(key) + f".d/{self.session}-{self.segments:06d}.jsonl"
+            self.client.put_object(Bucket=self.bucket, Key=segment_key, Body=text.encode("utf-8"))
+            with self.lock:
+                # Text appended during the upload stays pending for the next flush
+                remaining = self.pending[key][len(text):]
+                if remaining:
+                    self.pending[key] = remaining
+                else:
+                    del self.pending[key]
+
+    def open_upload(self, key):
+        return S3Upload(self.client, self.bucket, self.object_key(key))
+
+    def copy(self, source_key, target_key):
+        """Copy an object on the server, the bytes never pass through this computer."""
+        self.client.copy_object(Bucket=self.bucket, Key=self.object_key(target_key),
+                                CopySource={"Bucket": self.bucket, "Key": self.object_key(source_key)})
+        return True
+
+    def remove(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+    def free_space(self):
+        return None  # Unknown and not limited by this computer
+
+
+class S3Upload:
+    """
+    Stream bytes into an object with a multipart upload.
+
+    At most one part is buffered in memory. Small files are stored with a
+    single put_object() on commit().
+    """
+
+    def __init__(self, client, bucket, key):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.buffer = bytearray()
+        self.upload_id = None
+        self.parts = []
+
+    def write(self, data):
+        self.buffer.extend(data)
+        if len(self.buffer) >= MULTIPART_CHUNK_SIZE:
+            self.upload_part()
+
+    def upload_part(self):
+        if self.upload_id is None:
+            self.upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=self.key)["UploadId"]
+        part_number = len(self.parts) + 1
+        response = self.client.upload_part(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                                           PartNumber=part_number, Body=bytes(self.buffer))
+        self.parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+        self.buffer.clear()
+
+    def commit(self):
+        if self.upload_id is None:
+            self.client.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self.buffer))
+            return
+        if self.buffer:
+            self.upload_part()
+        self.client.complete_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                                              MultipartUpload={"Parts": self.parts})
+
+    def abort(self):
+        if self.upload_id is not None:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+        self.buffer.clear()
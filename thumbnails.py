@@ -0,0 +1,170 @@
+import os
+import threading
+import requests
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QBuffer, QByteArray, QIODevice, QSize, Qt, Signal
+from PySide6.QtGui import QImage
+import metrics
+
+# Thumbnail cache folder, stored next to config.json
+THUMBNAIL_FOLDER = "thumbnails"
+# Size of the thumbnails shown in the clip list
+THUMBNAIL_SIZE = QSize(96, 54)
+# Default size limit of the on-disk cache
+DEFAULT_CACHE_MB = 200
+# Parallel thumbnail downloads
+THUMBNAIL_WORKERS = 4
+
+
+class ThumbnailCache:
+    """
+    Size-bounded on-disk LRU cache of downscaled thumbnails.
+
+    Every thumbnail is a small JPEG named after its clip ID. The access order
+    is tracked with the file modification time, so it survives restarts. The
+    folder is indexed on first use (in a worker thread, never in the GUI thread).
+    """
+
+    def __init__(self, folder=THUMBNAIL_FOLDER, max_bytes=DEFAULT_CACHE_MB * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = None  # clip_id -> (last_used, size)
+        self.total_bytes = 0
+
+    def get_path(self, clip_id):
+        return os.path.join(self.folder, f"{clip_id}.jpg")
+
+    def ensure_index(self):
+        if self.entries is not None:
+            return
+        self.entries = {}
+        os.makedirs(self.folder, exist_ok=True)
+        for entry in os.scandir(self.folder):
+            if entry.is_file() and entry.name.endswith(".jpg"):
+                stat = entry.stat()
+                self.entries[entry.name[:-len(".jpg")]] = (stat.st_mtime, stat.st_size)
+                self.total_bytes += stat.st_size
+
+    def load(self, clip_id):
+        """Return the cached thumbnail bytes or None, and mark the entry as recently used."""
+        with self.lock:
+            self.ensure_index()
+            if clip_id not in self.entries:
+                metrics.cache_miss("thumbnail_cache")
+                return None
+            path = self.get_path(clip_id)
+            try:
+                with open(path, "rb") as file:
+                    data = file.read()
+                os.utime(path)
+            except OSError:
+                self.total_bytes -= self.entries.pop(clip_id)[1]
+                metrics.cache_miss("thumbnail_cache")
+                return None
+            self.entries[clip_id] = (os.path.getmtime(path), len(data))
+            metrics.cache_hit("thumbnail_cache")
+            return data
+
+    def store(self, clip_id, data):
+        """Save a thumbnail and evict the least recently used entries above the size limit."""
+        with self.lock:
+            self.ensure_index()
+            path = self.get_path(clip_id)
+            with open(path, "wb") as file:
+                file.write(data)
+            if clip_id in self.entries:
+                self.total_bytes -= self.entries[clip_id][1]
+            self.entries[clip_id] = (os.path.getmtime(path), len(data))
+            self.total_bytes += len(data)
+
+            if self.total_bytes > self.max_bytes:
+                for old_id, (_, size) in sorted(self.entries.items(), key=lambda item: item[1][0]):
+                    if self.total_bytes <= self.max_bytes * 0.9 or old_id == clip_id:
+                        break
+                    try:
+                        os.remove(self.get_path(old_id))
+                    except OSError:
+                        pass
+                    del self.entries[old_id]
+                    self.total_bytes -= size
+
+
+class ThumbnailTask(QRunnable):
+    """Load a single thumbnail from the cache or download and downscale it."""
+
+    def __init__(self, loader, clip_id, thumbnail_url, generation):
+        super().__init__()
+        self.loader = loader
+        self.clip_id = clip_id
+        self.thumbnail_url = thumbnail_url
+        self.generation = generation
+
+    def run(self):
+        # Skip work for rows of an older search
+        if self.generation != self.loader.generation:
+            return
+        image = QImage()
+        try:
+            data = self.loader.cache.load(self.clip_id)
+            if data is None:
+                with metrics.span("thumbnails.download"):
+                    response = requests.get(self.thumbnail_url, timeout=10)
+                metrics.record_response("thumbnails", response)
+                response.raise_for_status()
+                image.loadFromData(response.content)
+                image = image.scaled(THUMBNAIL_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+                buffer_data = QByteArray()
+                buffer = QBuffer(buffer_data)
+                buffer.open(QIODevice.WriteOnly)
+                image.save(buffer, "JPG", 85)
+                self.loader.cache.store(self.clip_id, bytes(buffer_data.data()))
+            else:
+                image.loadFromData(data)
+        except Exception as e:
+            metrics.count("thumbnails.failed")
+            self.loader.thumbnail_failed.emit(self.clip_id, str(e), self.generation)
+            return
+
+        if image.isNull():
+            metrics.count("thumbnails.failed")
+            self.loader.thumbnail_failed.emit(self.clip_id, "The image could not be decoded.", self.generation)
+        else:
+            self.loader.thumbnail_loaded.emit(self.clip_id, image, self.generation)
+
+
+class ThumbnailLoader(QObject):
+    """
+    Load thumbnails in a background thread pool.
+
+    thumbnail_loaded and thumbnail_failed (clip ID, message, generation) are
+    emitted in the GUI thread; both handlers call finished(), so a failed
+    thumbnail is requested again when its row is shown the next time. QImage
+    (not QPixmap) is used in the workers because it is safe outside the GUI thread.
+    """
+
+    thumbnail_loaded = Signal(str, QImage, int)
+    thumbnail_failed = Signal(str, str, int)
+
+    def __init__(self, cache=None, parent=None):
+        super().__init__(parent)
+        self.cache = cache or ThumbnailCache()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(THUMBNAIL_WORKERS)
+        self.pending = set()
+        self.generation = 0
+
+    def reset(self):
+        """Drop all queued requests, e.g. when a new search starts."""
+        self.generation += 1
+        self.pool.clear()
+        self.pending.clear()
+
+    def request(self, clip_id, thumbnail_url):
+        if clip_id in self.pending or not thumbnail_url:
+            return
+        self.pending.add(clip_id)
+        self.pool.start(ThumbnailTask(self, clip_id, thumbnail_url, self.generation))
+
+    def finished(self, clip_id):
+        self.pending.discard(clip_id)
@@ -0,0 +1,143 @@
+import re
+from datetime import datetime, timedelta, timezone
+
+# Relative presets for the search window, "Custom" uses the From/To fields
+PRESETS = {
+    "Custom": None,
+    "Last hour": timedelta(hours=1),
+    "Last 6 hours": timedelta(hours=6),
+    "Last 24 hours": timedelta(hours=24),
+    "Today": "today",
+    "Yesterday": "yesterday",
+    "Last 7 days": timedelta(days=7),
+    "Last 30 days": timedelta(days=30),
+}
+# Relative times like "6h", "-30m", "2d", "1w"
+RELATIVE_TIME_PATTERN = re.compile(r"^-?(\d+)\s*([mhdw])$")
+RELATIVE_TIME_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+def localize(moment, tz=None):
+    """
+    Attach a time zone to a naive datetime.
+
+    Without tz the local time zone of this computer is used with the UTC
+    offset valid at that moment, so ranges across a DST change stay exact.
+    """
+    if moment.tzinfo is not None:
+        return moment
+    if tz is None:
+        return moment.astimezone()
+    return moment.replace(tzinfo=tz)
+
+
+def now_local():
+    return datetime.now().astimezone().replace(microsecond=0)
+
+
+def to_rfc3339(moment):
+    """
+    Format a point in time as RFC 3339 UTC timestamp, e.g. "2025-01-31T22:00:00Z".
+
+    Args:
+        moment (datetime or str): Aware datetimes are converted to UTC, naive datetimes and
+            ISO 8601 strings without offset are taken as UTC.
+    """
+    if isinstance(moment, str):
+        moment = datetime.fromisoformat(moment)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).replace(microsecond=0).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_time(text, tz=None, now=None):
+    """
+    Parse a point in time entered by a user.
+
+    Accepts "now", relative times before now ("6h", "-30m", "2d", "1w"), dates
+    ("2025-01-31", local midnight) and ISO 8601 date-times with or without
+    offset (without offset they are local time).
+
+    Returns:
+        datetime: An aware datetime.
+
+    Raises:
+        ValueError: If the text is not a valid time.
+    """
+    now = now or now_local()
+    text = text.strip()
+    if text.lower() == "now":
+        return now
+
+    match = RELATIVE_TIME_PATTERN.match(text.lower())
+    if match:
+        return now - timedelta(**{RELATIVE_TIME_UNITS[match.group(2)]: int(match.group(1))})
+
+    return localize(datetime.fromisoformat(text), tz)
+
+
+def day_range(date_from, date_to, tz=None, now=None):
+    """
+    Return the window from local midnight of date_from to the end of date_to (inclusive).
+
+    The end is capped at now, so a range ending today does not reach into the future.
+
+    Returns:
+        tuple: (start, end) as aware datetimes.
+    """
+    now = now or now_local()
+    start = localize(datetime(date_from.year, date_from.month, date_from.day), tz)
+    end = localize(datetime(date_to.year, date_to.month, date_to.day) + timedelta(days=1), tz)
+    return start, min(end, now)
+
+
+def preset_range(preset, tz=None, now=None):
+    """
+    Resolve a preset name to its window.
+
+    Returns:
+        tuple: (start, end) as aware datetimes, or None for "Custom" and unknown presets.
+    """
+    now = now or now_local()
+    value = PRESETS.get(preset)
+    if value is None:
+        return None
+    if value == "today":
+        return day_range(now.date(), now.date(), tz, now)
+    if value == "yesterday":
+        yesterday = now.date() - timedelta(days=1)
+        return day_range(yesterday, yesterday, tz, now)
+    return now - value, now
+
+
+def validate_range(start, end):
+    """
+    Check a search window.
+
+    Returns:
+        dict: {"success": True} or an error message.
+    """
+    if end <= start:
+        return {"error": "INVALID_RANGE", "message": "Error: End time must be later than start time."}
+    return {"success": True}
+
+
+def split_range(start_timestamp, end_timestamp, parts, min_seconds=3600):
+    """
+    Split a window of RFC 3339 timestamps into consecutive parts of equal length.
+
+    Args:
+        start_timestamp (str): Start of the window, e.g. "2025-01-01T00:00:00Z".
+        end_timestamp (str): End of the window.
+        parts (int): Wanted number of parts.
+        min_seconds (int): Fewer parts are returned if they would be shorter than this.
+
+    Returns:
+        list: (start, end) RFC 3339 pairs, adjacent parts share their bound.
+    """
+    start = datetime.strptime(start_timestamp, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+    end = datetime.strptime(end_timestamp, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+    parts = max(1, min(parts, int((end - start).total_seconds() // min_seconds)))
+    step = (end - start) / parts
+    bounds = [to_rfc3339(start + step * index) for index in range(parts)] + [end_timestamp]
+    return list(zip(bounds, bounds[1:]))
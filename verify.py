@@ -0,0 +1,278 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dedup import MANIFEST_FILE, load_manifest, hash_file
+from storage import get_storage
+from locks import LOCK_FOLDER, ClipLock, active_locks
+from quality import DEFAULT_QUALITY
+
+# Files that passed the last verification, stored inside every download folder
+VERIFY_CACHE_FILE = "tc_guidl_verified.json"
+# Containers whose box structure is probed
+MP4_EXTENSIONS = (".mp4", ".m4a", ".mov")
+# Boxes every complete MP4 file has on the top level
+REQUIRED_BOXES = ("ftyp", "moov", "mdat")
+# Leftovers of aborted downloads and links
+PARTIAL_SUFFIXES = (".part", ".tclink", ".ytdl")
+# Report progress after this many files
+PROGRESS_INTERVAL = 1000
+
+
+def read_box_types(file_path):
+    """
+    Return the types of the top-level boxes of an MP4 file in file order.
+
+    Only the box headers are read, so a file of any size is walked with a few
+    small reads.
+
+    Raises:
+        ValueError: If the box structure is broken, e.g. a box ends after the end of the file.
+    """
+    box_types = []
+    try:
+        file_size = os.path.getsize(file_path)
+        with open(file_path, "rb") as file:
+            offset = 0
+            while offset < file_size:
+                file.seek(offset)
+                header = file.read(8)
+                if len(header) < 8:
+                    raise ValueError(f"truncated box header at byte {offset}")
+                box_size = int.from_bytes(header[:4], "big")
+                box_type = header[4:].decode("latin-1")
+                header_size = 8
+                if box_size == 1:
+                    large_size = file.read(8)
+                    if len(large_size) < 8:
+                        raise ValueError(f"truncated box header at byte {offset}")
+                    box_size = int.from_bytes(large_size, "big")
+                    header_size = 16
+                elif box_size == 0:
+                    box_size = file_size - offset  # Box extends to the end of the file
+                if box_size < header_size:
+                    raise ValueError(f"invalid '{box_type}' box at byte {offset}")
+                if offset + box_size > file_size:
+                    raise ValueError(f"'{box_type}' box ends after the end of the file")
+                box_types.append(box_type)
+                offset += box_size
+    except OSError as e:
+        raise ValueError(f"unreadable ({e})")
+    return box_types
+
+
+def check_container(file_path):
+    """
+    Probe the container structure of a media file.
+
+    A file cut off by a killed download ends inside a box or misses the
+    "moov" box that yt-dlp and ffmpeg write last.
+
+    Args:
+        file_path (str): The file to probe.
+
+    Returns:
+        str: Why the file is broken, or None if it looks complete (or is not an MP4 container).
+    """
+    if not file_path.lower().endswith(MP4_EXTENSIONS):
+        return None
+    try:
+        box_types = read_box_types(file_path)
+    except ValueError as e:
+        return str(e)
+
+    missing = [box for box in REQUIRED_BOXES if box not in box_types]
+    if missing:
+        return f"missing {', '.join(missing)} box"
+    return None
+
+
+def load_verify_cache(dl_folder):
+    """Return {file_name: {"size", "mtime", "sha256"}} of the files that passed the last verification."""
+    try:
+        with open(os.path.join(dl_folder, VERIFY_CACHE_FILE), "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_verify_cache(dl_folder, cache):
+    cache_path = os.path.join(dl_folder, VERIFY_CACHE_FILE)
+    temp_path = cache_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(cache, file, ensure_ascii=False)
+    os.replace(temp_path, cache_path)
+
+
+def verify_entry(dl_folder, entry, cached, full):
+    """
+    Verify the file of a manifest entry.
+
+    Returns:
+        dict: {"entry", "status", "reason", "stat"} with status "ok", "unchanged" or "bad".
+    """
+    file_path = os.path.join(dl_folder, entry["file"])
+    result = {"entry": entry, "status": "bad", "reason": None, "stat": None}
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        result["reason"] = "missing"
+        return result
+    result["stat"] = stat
+
+    if entry.get("size") is not None and stat.st_size != entry["size"]:
+        result["reason"] = f"size {stat.st_size} bytes, recorded {entry['size']} bytes"
+        return result
+
+    # Unchanged since it was last verified: skip reading the file
+    if not full and cached and cached.get("size") == stat.st_size and cached.get("mtime") == stat.st_mtime \
+            and cached.get("sha256") == entry.get("sha256"):
+        result["status"] = "unchanged"
+        return result
+
+    reason = check_container(file_path)
+    if reason:
+        result["reason"] = reason
+        return result
+    if entry.get("sha256") and hash_file(file_path) != entry["sha256"]:
+        result["reason"] = "checksum mismatch"
+        return result
+    result["status"] = "ok"
+    return result
+
+
+def find_untracked_files(dl_folder, tracked_files):
+    """
+    Return the partial downloads and the media files that are not in the manifest.
+
+    Returns:
+        tuple: (partial file paths, untracked file names)
+    """
+    partial_files = []
+    untracked_files = []
+    for root, dirs, files in os.walk(dl_folder):
+        dirs[:] = [name for name in dirs if name != LOCK_FOLDER]
+        for name in files:
+            if name in (MANIFEST_FILE, VERIFY_CACHE_FILE):
+                continue
+            path = os.path.join(root, name)
+            if name.endswith(PARTIAL_SUFFIXES):
+                partial_files.append(path)
+                continue
+            file_name = os.path.relpath(path, dl_folder).replace(os.sep, "/")
+            if file_name not in tracked_files and name.lower().endswith(MP4_EXTENSIONS):
+                untracked_files.append(file_name)
+    return partial_files, untracked_files
+
+
+def verify_archive(dl_folder, full=False, repair=False, workers=None, status_callback=None):
+    """
+    Verify the downloaded clips of a folder against its manifest.
+
+    Every file recorded in the manifest is checked for existence, size,
+    container structure and SHA-256 hash, files that are not in the manifest
+    only for their container structure. The checks run in a thread pool;
+    files with the same size and modification time as at their last
+    successful verification are not read again unless full is set.
+
+    Args:
+        dl_folder (str): The local download folder.
+        full (bool): Hash every file, even unchanged ones.
+        repair (bool): Remove broken files and leftovers of aborted downloads, the broken
+            clips are returned in "requeue" for redownload_clips(). Clips another instance
+            is downloading are left alone.
+        workers (int, optional): Number of threads, defaults to four per CPU (at most 32).
+        status_callback (callable, optional): Receives status messages.
+
+    Returns:
+        dict: The verification results or an error message.
+    """
+    if not get_storage(dl_folder).is_local:
+        return {"success": False, "error": "NotSupported", "message": "Verification only works on local folders."}
+    if not os.path.isdir(dl_folder):
+        return {"success": False, "error": "FolderNotFound", "message": f"Folder '{dl_folder}' does not exist."}
+
+    manifest = load_manifest(dl_folder)
+    entries = list(manifest["clips"].values())
+    cache = load_verify_cache(dl_folder)
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+
+    def report(message):
+        print(message)
+        if status_callback:
+            status_callback(message)
+
+    report(f"Info: Verifying {len(entries)} clips with {workers} threads...")
+    new_cache = {}
+    bad_entries = []
+    counts = {"ok": 0, "unchanged": 0, "bad": 0}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda entry: verify_entry(dl_folder, entry, cache.get(entry["file"]), full), entries)
+        for index, result in enumerate(results, 1):
+            entry = result["entry"]
+            counts[result["status"]] += 1
+            if result["status"] == "bad":
+                bad_entries.append(entry)
+                report(f"Warning: {entry['file']}: {result['reason']}")
+            else:
+                stat = result["stat"]
+                new_cache[entry["file"]] = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": entry.get("sha256")}
+            if index % PROGRESS_INTERVAL == 0:
+                report(f"Info: {index}/{len(entries)} clips verified...")
+
+    # Files without manifest entry, e.g. from before the manifest existed or from a killed run
+    partial_files, untracked_files = find_untracked_files(dl_folder, {entry["file"] for entry in entries})
+    broken_untracked = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for file_name, reason in zip(untracked_files, executor.map(
+                lambda name: check_container(os.path.join(dl_folder, name)), untracked_files)):
+            if reason:
+                broken_untracked.append(file_name)
+                report(f"Warning: {file_name} (not in manifest): {reason}")
+
+    # The partial files may belong to downloads of other instances sharing the folder
+    if repair and partial_files and active_locks(dl_folder):
+        report(f"Info: Other instances are downloading to this folder, {len(partial_files)} partial downloads kept.")
+        partial_files = []
+
+    requeue = []
+    if repair:
+        for entry in bad_entries:
+            # Another instance is downloading the clip again, its file is about to be replaced
+            clip_lock = ClipLock(dl_folder, f"{entry.get('clip_id')}.{entry.get('quality', DEFAULT_QUALITY)}")
+            holder = clip_lock.read_holder()
+            if holder and not clip_lock.is_stale(holder):
+                report(f"Info: {entry['file']} is being downloaded by {holder.get('host', 'another instance')}, kept.")
+                continue
+            file_path = os.path.join(dl_folder, entry["file"])
+            try:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+            except OSError as e:
+                report(f"Warning: Unable to remove {file_path}. {e}")
+            requeue.append(entry)
+        for file_path in partial_files + [os.path.join(dl_folder, name) for name in broken_untracked]:
+            try:
+                os.remove(file_path)
+            except OSError as e:
+                report(f"Warning: Unable to remove {file_path}. {e}")
+
+    save_verify_cache(dl_folder, new_cache)
+
+    message = (f"Info: {counts['ok'] + counts['unchanged']} of {len(entries)} clips OK "
+               f"({counts['unchanged']} unchanged since the last verification), {counts['bad']} broken or missing, "
+               f"{len(broken_untracked)} broken files not in manifest, {len(partial_files)} partial downloads.")
+    if repair and (bad_entries or broken_untracked or partial_files):
+        message += " Broken files and partial downloads removed."
+    report(message)
+    return {
+        "success": True,
+        "message": message,
+        "checked": len(entries),
+        "ok": counts["ok"],
+        "unchanged": counts["unchanged"],
+        "bad": [entry["file"] for entry in bad_entries],
+        "broken_untracked": broken_untracked,
+        "partial_files": partial_files,
+        "requeue": requeue,
+    }
+
@@ -0,0 +1,123 @@
+import os
+from yt_dlp import YoutubeDL
+from yt_dlp.utils import download_range_func
+from jobs import JobCancelled
+import metrics
+from storage import is_remote_target
+from functions import remove_partial_download
+
+# Twitch VOD URL
+VOD_URL = "https://www.twitch.tv/videos/{video_id}"
+
+
+def format_offset(seconds):
+    """Format a VOD offset for file names, e.g. 3725 -> "01-02-05"."""
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}-{seconds % 3600 // 60:02d}-{seconds % 60:02d}"
+
+
+def plan_context_windows(clips, context_seconds, merge_gap=0):
+    """
+    Plan the VOD sections to download around clips.
+
+    Every clip with a VOD offset gets the window [offset - context, offset +
+    duration + context]. Windows of the same VOD that overlap (or are less
+    than merge_gap seconds apart) are merged, so every second of a VOD is
+    downloaded at most once.
+
+    Args:
+        clips (list): The clips.
+        context_seconds (int): Seconds of context before and after each clip.
+        merge_gap (int): Merge windows separated by at most this many seconds.
+
+    Returns:
+        list: Dictionaries with "video_id", "start", "end" (seconds) and "clip_ids", sorted by VOD and start.
+    """
+    windows_by_video = {}
+    for clip in clips:
+        video_id = clip.get("video_id")
+        vod_offset = clip.get("vod_offset")
+        if not video_id or vod_offset is None:
+            continue
+        start = max(0, vod_offset - context_seconds)
+        end = vod_offset + clip.get("duration", 0.0) + context_seconds
+        windows_by_video.setdefault(video_id, []).append((start, end, clip.get("id")))
+
+    windows = []
+    for video_id, video_windows in sorted(windows_by_video.items()):
+        video_windows.sort()
+        current = None
+        for start, end, clip_id in video_windows:
+            if current and start <= current["end"] + merge_gap:
+                current["end"] = max(current["end"], end)
+                current["clip_ids"].append(clip_id)
+            else:
+                current = {"video_id": video_id, "start": start, "end": end, "clip_ids": [clip_id]}
+                windows.append(current)
+    return windows
+
+
+def download_context_windows(windows, dl_folder, status_callback, job=None):
+    """
+    Download VOD sections with yt-dlp.
+
+    Only the HLS segments covering a window are fetched, not the whole VOD.
+    The sections are cut without re-encoding, so they start at the keyframe
+    before the window start.
+
+    Args:
+        windows (list): Windows returned by plan_context_windows().
+        dl_folder (str): The download folder.
+        status_callback (callable): Receives status messages.
+        job (JobControl, optional): Checked before every window and on yt-dlp progress updates.
+
+    Returns:
+        list: The paths of the downloaded sections.
+    """
+    downloaded_sections = []
+    if is_remote_target(dl_folder):
+        # Sections are cut by ffmpeg, which needs a local file
+        if status_callback:
+            status_callback("Warning: VOD context is only downloaded to local folders.")
+        return downloaded_sections
+
+    def progress_hook(progress):
+        job.check()
+
+    for window in windows:
+        if job:
+            job.check()
+        filename = f"VOD {window['video_id']} {format_offset(window['start'])} - {format_offset(window['end'])}.mp4"
+        file_path = os.path.join(dl_folder, filename)
+        if os.path.exists(file_path):
+            downloaded_sections.append(file_path)
+            continue
+
+        print(f"Downloading VOD context: {filename}")
+        if status_callback:
+            status_callback(f"Downloading VOD context: {filename} ({len(window['clip_ids'])} clips)")
+
+        ydl_opts = {
+            "outtmpl": file_path,
+            "quiet": True,
+            "download_ranges": download_range_func(None, [(window["start"], window["end"])]),
+        }
+        if job:
+            ydl_opts["progress_hooks"] = [progress_hook]
+
+        try:
+            with metrics.span("download.vod_context"):
+                with YoutubeDL(ydl_opts) as ydl:
+                    ydl.download([VOD_URL.format(video_id=window["video_id"])])
+            metrics.count("download.vod_context.seconds", int(window["end"] - window["start"]))
+            downloaded_sections.append(file_path)
+        except Exception as e:
+            if job and job.is_cancelled():
+                # An existing section counts as downloaded on the next run
+                remove_partial_download(file_path)
+                raise JobCancelled(str(e))
+            print(f"Error: Failed to download VOD context {filename}. {e}")
+            if status_callback:
+                status_callback(f"Error: Failed to download VOD context {filename}. {e}")
+
+    return downloaded_sections
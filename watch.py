@@ -0,0 +1,191 @@
+import time
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from functions import get_broadcaster_id, get_clips, build_clip_filename, download_clips, get_user_config
+from quality import resolve_quality
+from postprocess import create_postprocessor
+from time_range import to_rfc3339
+import metrics
+
+# Default polling bounds in seconds
+DEFAULT_MIN_INTERVAL = 60
+DEFAULT_MAX_INTERVAL = 30 * 60
+# Default Helix requests per hour for all watched channels together
+DEFAULT_REQUESTS_PER_HOUR = 600
+# Clips show up in the API with a delay, so every window overlaps the previous one
+DEFAULT_OVERLAP = 10 * 60
+# Watch polls only cover short windows, a single pass with the largest page size is enough
+WATCH_PAGE_SIZES = (99,)
+
+
+def utc_now():
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+class ChannelState:
+    """Polling state of a single watched broadcaster."""
+
+    __slots__ = ("name", "broadcaster_id", "interval", "next_poll", "last_poll", "seen")
+
+    def __init__(self, name, broadcaster_id, interval, start):
+        self.name = name
+        self.broadcaster_id = broadcaster_id
+        self.interval = interval
+        self.next_poll = start
+        self.last_poll = start
+        self.seen = {}  # clip_id -> created_at, pruned to the overlap window
+
+
+class RequestBudget:
+    """Sliding one-hour window of Helix requests."""
+
+    def __init__(self, requests_per_hour):
+        self.requests_per_hour = requests_per_hour
+        self.requests = deque()  # (timestamp, cost)
+        self.used = 0
+
+    def expire(self, now):
+        while self.requests and self.requests[0][0] <= now - 3600:
+            self.used -= self.requests.popleft()[1]
+
+    def wait_time(self, now):
+        """Seconds until the next request fits into the budget."""
+        self.expire(now)
+        if self.used < self.requests_per_hour or not self.requests:
+            return 0
+        return self.requests[0][0] + 3600 - now
+
+    def add(self, now, cost):
+        if cost:
+            self.requests.append((now, cost))
+            self.used += cost
+
+
+class Watcher:
+    """
+    Poll a set of broadcasters for new clips and download them.
+
+    Every channel has its own interval between min_interval and max_interval:
+    it halves when a poll found new clips and grows by 50% when it did not,
+    so active channels are checked often and idle channels rarely. Each poll
+    only queries the window since the previous poll (plus an overlap for
+    late-indexed clips). Memory stays flat: the seen clip IDs of a channel are
+    pruned to that window and the request budget only keeps the last hour.
+    """
+
+    def __init__(self, channels, dl_folder, spacer_template, clip_filter=None, dedup_mode="link",
+                 min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+                 requests_per_hour=DEFAULT_REQUESTS_PER_HOUR, overlap=DEFAULT_OVERLAP,
+                 quality=None, status_callback=None):
+        self.channel_names = channels
+        self.dl_folder = dl_folder
+        self.spacer_template = spacer_template
+        self.clip_filter = clip_filter
+        self.dedup_mode = dedup_mode
+        self.quality = quality  # None uses the quality settings per broadcaster
+        self.max_interval = max_interval
+        self.overlap = timedelta(seconds=overlap)
+        self.budget = RequestBudget(requests_per_hour)
+        self.status_callback = status_callback
+        self.stop_event = threading.Event()
+        self.channels = []
+
+        # Every channel polled at min_interval must fit into the hourly budget
+        self.min_interval = max(min_interval, 3600 * len(channels) / requests_per_hour)
+        if self.min_interval > min_interval:
+            self.status(f"Info: Minimum interval raised to {self.min_interval:.0f}s to stay within {requests_per_hour} requests per hour.")
+
+    def status(self, message):
+        print(message)
+        if self.status_callback:
+            self.status_callback(message)
+
+    def resolve_channels(self):
+        """Look up the broadcaster IDs. Returns an error dictionary if a channel does not exist."""
+        start = utc_now()
+        for name in self.channel_names:
+            result = get_broadcaster_id(name)
+            if "error" in result:
+                return result
+            self.channels.append(ChannelState(name, result["id"], self.min_interval, start))
+        return {"success": True}
+
+    def poll(self, channel, now):
+        """
+        Fetch the clips of a channel created since its last poll and return the unseen ones.
+
+        Raises:
+            RequestException: If the window could not be fetched completely; last_poll is not advanced then.
+        """
+        window_start = channel.last_poll - self.overlap
+        requests_before = metrics.get_counter("helix.clips.requests")
+        errors = []
+        clips = get_clips(channel.broadcaster_id, window_start, now, clip_filter=self.clip_filter,
+                          page_sizes=WATCH_PAGE_SIZES, use_cache=False, errors=errors)
+        cost = metrics.get_counter("helix.clips.requests") - requests_before
+        self.budget.add(time.time(), max(cost, 1))
+        if errors:
+            raise errors[0]
+
+        new_clips = [clip for clip in clips if clip.id not in channel.seen]
+        for clip in new_clips:
+            channel.seen[clip.id] = clip.created_at
+
+        # Forget clips that can no longer show up in the next window
+        oldest = to_rfc3339(now - self.overlap)
+        channel.seen = {clip_id: created_at for clip_id, created_at in channel.seen.items() if created_at >= oldest}
+        channel.last_poll = now
+        return new_clips
+
+    def adapt_interval(self, channel, found_clips, now):
+        if found_clips:
+            channel.interval = max(self.min_interval, channel.interval / 2)
+        else:
+            channel.interval = min(self.max_interval, channel.interval * 1.5)
+        channel.next_poll = now + timedelta(seconds=channel.interval)
+
+    def download(self, clips):
+        user_config = get_user_config()
+        for clip in clips:
+            clip.filename = build_clip_filename(clip, self.spacer_template)
+            clip.quality = resolve_quality(clip.broadcaster_name, self.quality, user_config)
+        postprocessor = create_postprocessor(self.dl_folder, user_config, self.status_callback)
+        try:
+            return download_clips(clips, self.dl_folder, self.status_callback, dedup_mode=self.dedup_mode, postprocessor=postprocessor)
+        finally:
+            if postprocessor:
+                postprocessor.close()
+
+    def run(self):
+        """Poll until stop() is called."""
+        if not self.channels:
+            result = self.resolve_channels()
+            if "error" in result:
+                self.status(result["message"])
+                return result
+
+        self.status(f"Info: Watching {', '.join(channel.name for channel in self.channels)}.")
+        while not self.stop_event.is_set():
+            channel = min(self.channels, key=lambda state: state.next_poll)
+            delay = max((channel.next_poll - utc_now()).total_seconds(), self.budget.wait_time(time.time()))
+            if delay > 0 and self.stop_event.wait(delay):
+                break
+
+            now = utc_now()
+            try:
+                new_clips = self.poll(channel, now)
+            except Exception as e:
+                # last_poll stays unchanged, so the next window covers the failed one
+                self.status(f"Error: Polling {channel.name} failed. {e}")
+                new_clips = []
+
+            self.adapt_interval(channel, new_clips, now)
+            if new_clips:
+                self.status(f"Info: {len(new_clips)} new clips from {channel.name}, next poll in {channel.interval:.0f}s.")
+                self.download(new_clips)
+
+        return {"success": True, "message": "Watch mode stopped."}
+
+    def stop(self):
+        self.stop_event.set()
@@ -1,11 +1,15 @@
 import sys
 import os
-from PySide6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QSpacerItem, QSizePolicy, QStatusBar, QStackedWidget, QLabel
+from PySide6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QSpacerItem, QSizePolicy, QStatusBar, QStackedWidget, QLabel, QStyle
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QIcon, QPixmap, QMovie
 from home_widget import HomeWidget
 from config_widget import ConfigWidget
 from help_widget import HelpWidget
+from archive_widget import ArchiveWidget
+from leaderboard_widget import LeaderboardWidget
+from api import start_api_server
+from download_pool import shutdown_download_pool
 from functions import *
 
 class MainWindow(QMainWindow):
@@ -58,6 +62,24 @@ class MainWindow(QMainWindow):
         self.home_button.clicked.connect(self.show_home_widget)
         self.left_layout.addWidget(self.home_button, alignment=Qt.AlignTop)
 
+        self.archive_button = QPushButton(self)
+        self.archive_button.setFixedSize(50, 50)
+        self.archive_button.setStyleSheet("border: none;background-color: none;")
+        self.archive_button.setToolTip("Search downloaded clips")
+        self.archive_button.setIcon(self.style().standardIcon(QStyle.SP_FileDialogContentsView))
+        self.archive_button.setIconSize(self.home_button.iconSize())
+        self.archive_button.clicked.connect(self.show_archive_widget)
+        self.left_layout.addWidget(self.archive_button, alignment=Qt.AlignTop)
+
+        self.leaderboard_button = QPushButton(self)
+        self.leaderboard_button.setFixedSize(50, 50)
+        self.leaderboard_button.setStyleSheet("border: none;background-color: none;")
+        self.leaderboard_button.setToolTip("Most viewed clips of several channels")
+        self.leaderboard_button.setIcon(self.style().standardIcon(QStyle.SP_FileDialogDetailedView))
+        self.leaderboard_button.setIconSize(self.home_button.iconSize())
+        self.leaderboard_button.clicked.connect(self.show_leaderboard_widget)
+        self.left_layout.addWidget(self.leaderboard_button, alignment=Qt.AlignTop)
+
         self.left_layout.addSpacerItem(QSpacerItem(20, 20, QSizePolicy.Minimum, QSizePolicy.Expanding))
 
         self.config_button = QPushButton(self)
@@ -112,6 +134,16 @@ class MainWindow(QMainWindow):
         self.config_widget.status_update.connect(self.update_status_bar)
         self.stacked_widget.addWidget(self.config_widget)
 
+        # Archive widget
+        self.archive_widget = ArchiveWidget(self)
+        self.archive_widget.status_update.connect(self.update_status_bar)
+        self.stacked_widget.addWidget(self.archive_widget)
+
+        # Leaderboard widget
+        self.leaderboard_widget = LeaderboardWidget(self)
+        self.leaderboard_widget.status_update.connect(self.update_status_bar)
+        self.stacked_widget.addWidget(self.leaderboard_widget)
+
         # Help widget
         self.help_widget = HelpWidget(self)
         self.help_widget.status_update.connect(self.update_status_bar)
@@ -120,11 +152,34 @@ class MainWindow(QMainWindow):
                 
         if not self.config_status.get("success"):
             self.show_config_widget()
+
+        # Job API for scripts and bots, shares the caches and download engine of this window
+        self.api_server = None
+        user_config = get_user_config()
+        if user_config.get("api_port"):
+            result = start_api_server(user_config["api_port"], user_config.get("api_token") or None, self.status_signal.emit)
+            self.api_server = result.get("server")
+            self.update_status_bar(result["message"])
         #self.update_status_bar(f"{self.config_status.get('message')}")
 
+    def closeEvent(self, event):
+        # Stop running searches and downloads instead of leaving them behind
+        self.home_widget.jobs.cancel_all()
+        self.leaderboard_widget.jobs.cancel_all()
+        if self.api_server:
+            self.api_server.stop()
+        shutdown_download_pool()
+        super().closeEvent(event)
+
     def show_home_widget(self):
         self.stacked_widget.setCurrentWidget(self.home_widget)
 
+    def show_archive_widget(self):
+        self.stacked_widget.setCurrentWidget(self.archive_widget)
+
+    def show_leaderboard_widget(self):
+        self.stacked_widget.setCurrentWidget(self.leaderboard_widget)
+
     def show_config_widget(self):
         self.stacked_widget.setCurrentWidget(self.config_widget)
 